@@ -4,150 +4,12 @@ Stoic Terminal - Day 1 Starter Code
 Database setup and quote collection from Quotable API and Project Gutenberg
 """
 
-import sqlite3
-import json
 import requests
-from typing import List, Dict, Optional
+from typing import List, Dict
 from datetime import datetime
 from pathlib import Path
 
-
-class QuoteDatabase:
-    """SQLite database abstraction for philosophical quotes"""
-    
-    def __init__(self, db_path: str = "quotes_v1.db"):
-        self.db_path = Path(db_path)
-        self.conn = None
-        self._init_database()
-    
-    def _init_database(self):
-        """Create database schema if it doesn't exist"""
-        self.conn = sqlite3.connect(str(self.db_path))
-        self.conn.row_factory = sqlite3.Row
-        
-        cursor = self.conn.cursor()
-        
-        # Main quotes table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS quotes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                text TEXT NOT NULL,
-                author TEXT NOT NULL,
-                source TEXT,
-                source_context TEXT,
-                source_year INTEGER,
-                translator TEXT,
-                length_category TEXT CHECK(length_category IN ('bite-sized', 'medium', 'extended')),
-                tradition TEXT,
-                tags TEXT,
-                embedding BLOB,
-                copyright_status TEXT DEFAULT 'public_domain',
-                date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Indexes for faster queries
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_author ON quotes(author)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tradition ON quotes(tradition)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_copyright ON quotes(copyright_status)")
-        
-        self.conn.commit()
-    
-    def add_quote(self, 
-                  text: str, 
-                  author: str,
-                  source: Optional[str] = None,
-                  source_context: Optional[str] = None,
-                  source_year: Optional[int] = None,
-                  translator: Optional[str] = None,
-                  tradition: Optional[str] = None,
-                  tags: Optional[List[str]] = None,
-                  copyright_status: str = 'public_domain') -> int:
-        """Add a quote to the database"""
-        
-        # Determine length category
-        length = len(text)
-        if length <= 150:
-            length_category = 'bite-sized'
-        elif length <= 400:
-            length_category = 'medium'
-        else:
-            length_category = 'extended'
-        
-        # Convert tags to JSON
-        tags_json = json.dumps(tags) if tags else json.dumps([])
-        
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO quotes (
-                text, author, source, source_context, source_year,
-                translator, length_category, tradition, tags, copyright_status
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (text, author, source, source_context, source_year,
-              translator, length_category, tradition, tags_json, copyright_status))
-        
-        self.conn.commit()
-        return cursor.lastrowid
-    
-    def get_all_quotes(self) -> List[Dict]:
-        """Retrieve all quotes"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM quotes ORDER BY date_added DESC")
-        
-        quotes = []
-        for row in cursor.fetchall():
-            quote = dict(row)
-            quote['tags'] = json.loads(quote['tags']) if quote['tags'] else []
-            quotes.append(quote)
-        
-        return quotes
-    
-    def search_by_tags(self, tags: List[str], match_mode: str = 'any') -> List[Dict]:
-        """Search quotes by tags"""
-        cursor = self.conn.cursor()
-        
-        if match_mode == 'any':
-            # Match any tag
-            conditions = " OR ".join(["tags LIKE ?" for _ in tags])
-            params = [f'%"{tag}"%' for tag in tags]
-        else:  # 'all'
-            # Match all tags
-            conditions = " AND ".join(["tags LIKE ?" for _ in tags])
-            params = [f'%"{tag}"%' for tag in tags]
-        
-        query = f"SELECT * FROM quotes WHERE {conditions}"
-        cursor.execute(query, params)
-        
-        quotes = []
-        for row in cursor.fetchall():
-            quote = dict(row)
-            quote['tags'] = json.loads(quote['tags']) if quote['tags'] else []
-            quotes.append(quote)
-        
-        return quotes
-    
-    def get_random_quote(self) -> Optional[Dict]:
-        """Get a random quote"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM quotes ORDER BY RANDOM() LIMIT 1")
-        
-        row = cursor.fetchone()
-        if row:
-            quote = dict(row)
-            quote['tags'] = json.loads(quote['tags']) if quote['tags'] else []
-            return quote
-        return None
-    
-    def count_quotes(self) -> int:
-        """Count total quotes in database"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM quotes")
-        return cursor.fetchone()[0]
-    
-    def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
+from stoic_terminal.database import QuoteDatabase
 
 
 class QuotableAPICollector:
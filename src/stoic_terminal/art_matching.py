@@ -0,0 +1,115 @@
+"""
+Semantic quote → art matching
+
+At build time each art piece's name, description and tags are embedded and
+scored against every stored quote embedding in chunked matrix multiplies;
+the best few pieces per quote are written to a flat binary table:
+
+    header:  magic (8 bytes) | top_k <I | piece count <I | pieces crc32 <I
+             | database fingerprint <I
+    rows:    top_k little-endian uint16 piece indices per quote id
+             (0xFFFF = no match), row i at header + i * top_k * 2
+
+Looking a quote up at display time is one seek and one small read, with no
+numpy or model import, however many quotes there are. Piece indices follow
+the metadata order, themes as listed in metadata.yaml and pieces within
+each theme (`piece_keys`); the crc32 ties a table to that exact piece list.
+The database fingerprint ties it to the quotes it was built from: after
+quotes are added, deleted or renumbered, or another database is opened,
+the table is ignored until it is rebuilt.
+"""
+
+import struct
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .profiling import span
+
+
+MATCHES_MAGIC = b"STARTM2\n"
+HEADER = struct.Struct("<8sIIII")
+NO_MATCH = 0xFFFF
+DEFAULT_TOP_K = 3
+
+
+def piece_keys(metadata: Dict) -> List[str]:
+    """Stable 'theme/index' key for every art piece"""
+    return [f"{theme}/{i}" for theme, pieces in metadata.items() for i in range(len(pieces or []))]
+
+
+def pieces_checksum(keys: List[str]) -> int:
+    return zlib.crc32("\n".join(keys).encode("utf-8"))
+
+
+def database_fingerprint(db) -> int:
+    """crc32 of the schema version, largest quote id and quote count (all O(1) reads)"""
+    cursor = db.conn.cursor()
+    cursor.execute("SELECT MAX(id) FROM quotes")
+    max_id = cursor.fetchone()[0] or 0
+    # The length facet counts every quote once, without a COUNT(*) scan
+    cursor.execute("SELECT SUM(count) FROM facet_counts WHERE facet = 'length_category'")
+    count = cursor.fetchone()[0] or 0
+    return zlib.crc32(f"{db.schema_version()}:{max_id}:{count}".encode())
+
+
+def piece_text(piece: Dict) -> str:
+    """What a piece depicts, as a sentence for the embedding model"""
+    tags = ", ".join(tag for tag in piece.get('tags', []) if tag not in ("large", "small", "detailed"))
+    return f"{piece['name']}. {piece.get('description', '')}. Themes: {tags}"
+
+
+def build_matches(db, metadata: Dict, output: Path, top_k: int = DEFAULT_TOP_K,
+                  encoder: Optional[Callable] = None, chunk_size: int = 8192) -> int:
+    """Write the quote → art table for every embedded quote; returns the quote count"""
+    import numpy as np
+
+    from .embeddings import EmbeddingMatrix, encode
+
+    keys = piece_keys(metadata)
+    pieces = [piece for theme_pieces in metadata.values() for piece in theme_pieces or []]
+    matrix = EmbeddingMatrix.from_database(db)
+    if not len(matrix) or not pieces:
+        return 0
+
+    with span("art_matching.build"):
+        piece_vectors = (encoder or encode)([piece_text(piece) for piece in pieces])
+        top_k = min(top_k, len(pieces))
+
+        table = np.full((int(matrix.ids.max()) + 1, top_k), NO_MATCH, dtype="<u2")
+        for start in range(0, len(matrix), chunk_size):
+            scores = matrix.vectors[start:start + chunk_size] @ piece_vectors.T
+            top = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+            order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+            table[matrix.ids[start:start + chunk_size]] = np.take_along_axis(top, order, axis=1)
+
+    output = Path(output)
+    tmp_path = output.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MATCHES_MAGIC, top_k, len(keys), pieces_checksum(keys),
+                            database_fingerprint(db)))
+        f.write(table.tobytes())
+    tmp_path.replace(output)
+    return len(matrix)
+
+
+def lookup_matches(path: Path, quote_id: int, keys: List[str], fingerprint: int) -> List[str]:
+    """
+    Best-first piece keys for a quote, or [] if the table has none, or was
+    built for other pieces or another database state (`database_fingerprint`)
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, top_k, count, checksum, built_for = HEADER.unpack(f.read(HEADER.size))
+            if (magic != MATCHES_MAGIC or count != len(keys)
+                    or checksum != pieces_checksum(keys) or built_for != fingerprint):
+                return []
+            f.seek(HEADER.size + quote_id * top_k * 2)
+            row = f.read(top_k * 2)
+    except (OSError, struct.error):
+        return []
+
+    if len(row) < top_k * 2:
+        return []  # Quote added after the table was built
+    indices = struct.unpack(f"<{top_k}H", row)
+    return [keys[i] for i in indices if i != NO_MATCH and i < len(keys)]
@@ -0,0 +1,188 @@
+"""
+ASCII Art loader with LRU caching and responsive sizing.
+"""
+
+import random
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .art_matching import lookup_matches, piece_keys
+from .catalog import load_catalog
+from .config import ART_CATALOG_PATH, ART_DIR, ART_MATCHES_PATH
+from .profiling import span
+
+
+# Theme used when nothing matches a quote's tags
+FALLBACK_THEME = "general"
+
+
+class ASCIIArtLoader:
+    """Load and cache ASCII art with responsive sizing."""
+
+    def __init__(self,
+                 art_dir: str = str(ART_DIR),
+                 catalog_path: Optional[str] = str(ART_CATALOG_PATH),
+                 matches_path: Optional[str] = str(ART_MATCHES_PATH),
+                 db_fingerprint: Optional[int] = None):
+        self.art_dir = Path(art_dir)
+        self.metadata_path = self.art_dir / "metadata.yaml"
+        self.matches_path = Path(matches_path) if matches_path else None
+        # Which database quotes come from (art_matching.database_fingerprint);
+        # without it the match table can't be trusted and isn't read
+        self.db_fingerprint = db_fingerprint
+
+        # A current compiled catalog replaces the YAML parse and art file reads
+        self.catalog = load_catalog(catalog_path, str(self.art_dir)) if catalog_path else None
+        if self.catalog:
+            self.metadata = self.catalog['metadata']
+            self.headers = self.catalog['headers']
+        else:
+            self.metadata = self._load_metadata()
+            self.headers = None
+
+    def _load_metadata(self) -> Dict:
+        """Load ASCII art metadata from YAML file."""
+        if not self.metadata_path.exists():
+            raise FileNotFoundError(f"Metadata file not found: {self.metadata_path}")
+
+        with span("art.metadata"), open(self.metadata_path, 'r') as f:
+            import yaml
+
+            return yaml.safe_load(f)
+
+    @lru_cache(maxsize=128)
+    def load_art(self, filepath: str) -> str:
+        """Load ASCII art from file with LRU caching.
+
+        Args:
+            filepath: Relative path from art_dir (e.g., 'meditation/buddha_60.txt')
+
+        Returns:
+            The ASCII art as a string
+        """
+        if self.catalog and filepath in self.catalog['art']:
+            return self.catalog['art'][filepath]
+
+        full_path = self.art_dir / filepath
+
+        if not full_path.exists():
+            raise FileNotFoundError(f"ASCII art file not found: {full_path}")
+
+        with span("art.load_file"), open(full_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def get_art_by_theme(self, theme: str, terminal_width: int = 80) -> Optional[Tuple[str, Dict]]:
+        """Get random ASCII art for a theme, sized for terminal width.
+
+        Args:
+            theme: Theme name (meditation, adversity, exploration, nature, wisdom, general)
+            terminal_width: Current terminal width in columns
+
+        Returns:
+            Tuple of (art_string, metadata_dict) or None if not found
+        """
+        pieces = self.metadata.get(theme)
+        if not pieces:
+            return None
+
+        piece = random.choice(pieces)
+        variant = self._find_best_variant(piece['variants'], terminal_width)
+        if not variant:
+            return None
+
+        return self.load_art(variant['file']), piece
+
+    def _find_best_variant(self, variants: List[Dict], terminal_width: int) -> Optional[Dict]:
+        """Find the best-fitting art variant for the given terminal width.
+
+        Prefers variants that fit within the terminal but are as large as possible.
+        """
+        sorted_variants = sorted(variants, key=lambda v: v['width'], reverse=True)
+
+        for variant in sorted_variants:
+            if variant['width'] <= terminal_width - 4:  # Leave 4-column margin
+                return variant
+
+        # If nothing fits, return the smallest variant
+        return sorted_variants[-1] if sorted_variants else None
+
+    def get_art_by_tags(self, tags: List[str], terminal_width: int = 80) -> Optional[Tuple[str, Dict]]:
+        """Get ASCII art matching any of the given tags.
+
+        Args:
+            tags: List of tags to match (e.g., ['meditation', 'peace'])
+            terminal_width: Current terminal width in columns
+
+        Returns:
+            Tuple of (art_string, metadata_dict) or None if not found
+        """
+        wanted = set(tags)
+        matching_pieces = [
+            piece
+            for pieces in self.metadata.values()
+            for piece in pieces
+            if wanted.intersection(piece.get('tags', []))
+        ]
+        if not matching_pieces:
+            return None
+
+        piece = random.choice(matching_pieces)
+        variant = self._find_best_variant(piece['variants'], terminal_width)
+        if not variant:
+            return None
+
+        return self.load_art(variant['file']), piece
+
+    def get_matched_art(self, quote: Dict, terminal_width: int = 80) -> Optional[Tuple[str, Dict]]:
+        """Best semantically matched piece (precomputed table) that fits the width."""
+        if not self.matches_path or self.db_fingerprint is None or quote.get('id') is None:
+            return None
+
+        keys = piece_keys(self.metadata)
+        for key in lookup_matches(self.matches_path, quote['id'], keys, self.db_fingerprint):
+            theme, index = key.rsplit('/', 1)
+            piece = self.metadata[theme][int(index)]
+            variant = self._find_best_variant(piece['variants'], terminal_width)
+            if variant and variant['width'] <= terminal_width - 4:
+                return self.load_art(variant['file']), piece
+        return None
+
+    def get_art_for_quote(self, quote: Dict, terminal_width: int = 80) -> Optional[Tuple[str, Dict]]:
+        """Pick art for a quote: its precomputed semantic match, then a theme named
+        by one of its tags, then any tag match.
+
+        Falls back to the general theme so every quote gets something to show.
+        """
+        with span("art.select"):
+            art = self.get_matched_art(quote, terminal_width)
+            if art:
+                return art
+
+            for tag in quote.get('tags', []):
+                art = self.get_art_by_theme(tag, terminal_width)
+                if art:
+                    return art
+
+            return (self.get_art_by_tags(quote.get('tags', []), terminal_width)
+                    or self.get_art_by_theme(FALLBACK_THEME, terminal_width))
+
+    def list_themes(self) -> List[str]:
+        """Get list of available themes."""
+        return list(self.metadata.keys())
+
+    def get_cache_info(self) -> Dict:
+        """Get LRU cache statistics."""
+        cache_info = self.load_art.cache_info()
+        return {
+            'hits': cache_info.hits,
+            'misses': cache_info.misses,
+            'size': cache_info.currsize,
+            'maxsize': cache_info.maxsize
+        }
+
+
+def get_terminal_width() -> int:
+    """Get current terminal width in columns."""
+    return shutil.get_terminal_size().columns
@@ -0,0 +1,72 @@
+"""
+Author name normalization
+
+Quotes arrive with free-text authors ("Marcus Aurelius", "marcus aurelius",
+"Marcus Aurelius Antoninus", whatever Quotable returns). Every spelling is
+reduced to a lookup key; keys map through `author_aliases` to one row in
+`authors`, which holds the canonical display name.
+"""
+
+import re
+import sqlite3
+import unicodedata
+from typing import Dict, List, Optional
+
+
+# Known alternative spellings, by canonical name
+KNOWN_ALIASES: Dict[str, List[str]] = {
+    "Marcus Aurelius": ["Marcus Aurelius Antoninus", "Emperor Marcus Aurelius"],
+    "Seneca": ["Lucius Annaeus Seneca", "Seneca the Younger"],
+    "Sun Tzu": ["Sunzi", "Sun Zi", "Sun Wu"],
+    "Lao Tzu": ["Laozi", "Lao Tse", "Lao-Tze"],
+    "Confucius": ["Kong Fuzi", "Kongzi"],
+    "Epictetus": [],
+}
+
+
+def author_key(name: str) -> str:
+    """Lookup key: accents, case, punctuation and spacing removed"""
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_only = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^\w\s]", " ", ascii_only.lower()).split())
+
+
+def _canonical_for(key: str) -> str:
+    for canonical, aliases in KNOWN_ALIASES.items():
+        if key == author_key(canonical) or key in (author_key(alias) for alias in aliases):
+            return canonical
+    return ""
+
+
+def lookup_keys(name: str) -> List[str]:
+    """Keys to try for a spelling: its own, then its known canonical name's"""
+    key = author_key(name)
+    canonical = _canonical_for(key)
+    return [key, author_key(canonical)] if canonical else [key]
+
+
+def resolve_author_id(cursor: sqlite3.Cursor,
+                      name: str,
+                      cache: Optional[Dict[str, int]] = None) -> int:
+    """Author id for a spelling, creating the author (and alias) on first sight"""
+    key = author_key(name)
+    if cache is not None and key in cache:
+        return cache[key]
+
+    cursor.execute("SELECT author_id FROM author_aliases WHERE alias_key = ?", (key,))
+    row = cursor.fetchone()
+    if row:
+        author_id = row[0]
+    else:
+        canonical = _canonical_for(key) or " ".join(name.split())
+        canonical_key = author_key(canonical)
+        cursor.execute("INSERT OR IGNORE INTO authors (name, key) VALUES (?, ?)",
+                       (canonical, canonical_key))
+        cursor.execute("SELECT id FROM authors WHERE key = ?", (canonical_key,))
+        author_id = cursor.fetchone()[0]
+        cursor.execute("INSERT OR IGNORE INTO author_aliases (alias_key, author_id) VALUES (?, ?)",
+                       (key, author_id))
+
+    if cache is not None:
+        cache[key] = author_id
+    return author_id
@@ -0,0 +1,216 @@
+"""
+Batch rendering for MOTD fleets and static pages
+
+Renders many quotes (a sample or the whole corpus) in one process instead
+of paying CLI startup per quote. Quotes stream from SQLite in chunks to a
+worker pool that loads the art catalog once per worker; at most a few
+chunks are in flight, so memory stays flat however large the corpus is.
+Frames come out in a stable order and are reproducible for a given seed.
+
+Frames go to a directory (one `<id>.txt` per quote) or to a single indexed
+bundle:
+
+    magic (8 bytes) | frame bytes... | index: (id <I, offset <Q, length <I) * n
+    | footer: index offset <Q, count <I, magic (8 bytes)
+
+so a reader fetches frame i with two seeks, e.g. from a cron job:
+
+    python -m stoic_terminal.batch motd.stqb > /etc/motd
+"""
+
+import multiprocessing
+import os
+import random
+import struct
+import sys
+from collections import deque
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .art_matching import database_fingerprint
+from .ascii_art import ASCIIArtLoader
+from .database import QuoteDatabase
+from .display import HEADER_FONT, lookup_header, render_header, render_quote
+
+
+BUNDLE_MAGIC = b"STQBUN1\n"
+BUNDLE_SUFFIX = ".stqb"
+INDEX_ENTRY = struct.Struct("<IQI")
+FOOTER = struct.Struct("<QI8s")
+
+DEFAULT_CHUNK_SIZE = 256
+
+# Per-worker state, set up once by _init_worker
+_loader: Optional[ASCIIArtLoader] = None
+_options: Dict = {}
+
+
+def _init_worker(width: int, art: bool, seed: int, db_fingerprint: Optional[int] = None):
+    """Load the art catalog once per worker process"""
+    global _loader, _options
+    _loader = ASCIIArtLoader(db_fingerprint=db_fingerprint)
+    # Headers missing from the catalog are rendered once per worker, then reused
+    _options = {"width": width, "art": art, "seed": seed, "headers": _loader.headers or {}}
+
+
+def render_frame(quote: Dict) -> str:
+    """Render one quote with the worker's settings (deterministic per seed and id)"""
+    width, headers = _options["width"], _options["headers"]
+    random.seed(f"{_options['seed']}:{quote['id']}")  # Same art every run
+
+    art = None
+    if _options["art"]:
+        selected = _loader.get_art_for_quote(quote, width)
+        art = selected[0] if selected else None
+
+    if lookup_header(headers, quote['author'], width, HEADER_FONT) is None:
+        headers.setdefault(HEADER_FONT, {})[quote['author']] = render_header(
+            quote['author'], width, headers=headers
+        )
+    return render_quote(quote, art=art, width=width, headers=headers)
+
+
+def _render_chunk(quotes: List[Dict]) -> List[Tuple[int, str]]:
+    return [(quote['id'], render_frame(quote)) for quote in quotes]
+
+
+def iter_quote_chunks(db: QuoteDatabase,
+                      count: Optional[int] = None,
+                      seed: int = 0,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict]]:
+    """Quote dicts in chunks: the whole corpus in id order, or a seeded sample"""
+    if count is None:
+        for quotes in db.iter_quotes(chunk_size):
+            yield [_strip(quote) for quote in quotes]
+        return
+
+    ids = db.sample_quote_ids(count, seed)
+    for start in range(0, len(ids), chunk_size):
+        yield [_strip(quote) for quote in db.get_quotes_by_ids(ids[start:start + chunk_size])]
+
+
+def _strip(quote: Dict) -> Dict:
+    """Drop columns rendering never uses, so less is pickled to workers"""
+    quote.pop('embedding', None)
+    return quote
+
+
+def render_frames(db: QuoteDatabase,
+                  width: int = 80,
+                  count: Optional[int] = None,
+                  art: bool = True,
+                  seed: int = 0,
+                  workers: Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, str]]:
+    """Yield (quote_id, frame) for `count` sampled quotes, or all of them"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = iter_quote_chunks(db, count, seed, chunk_size)
+    setup = (width, art, seed, database_fingerprint(db))
+
+    if workers <= 1:
+        _init_worker(*setup)
+        for chunk in chunks:
+            yield from _render_chunk(chunk)
+        return
+
+    with multiprocessing.Pool(workers, _init_worker, setup) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_render_chunk, (chunk,)))
+            if len(pending) >= 2 * workers:  # Bounded in-flight work keeps memory flat
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def write_directory(frames: Iterator[Tuple[int, str]], directory: Path) -> int:
+    """Write one `<id>.txt` per frame; returns the frame count"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for quote_id, frame in frames:
+        (directory / f"{quote_id}.txt").write_text(frame, encoding="utf-8")
+        written += 1
+    return written
+
+
+def write_bundle(frames: Iterator[Tuple[int, str]], path: Path) -> int:
+    """Write frames into one indexed bundle file; returns the frame count"""
+    path = Path(path)
+    tmp_path = path.with_suffix(".tmp")
+    index = bytearray()
+    count = 0
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        for quote_id, frame in frames:
+            data = frame.encode("utf-8")
+            index += INDEX_ENTRY.pack(quote_id, f.tell(), len(data))
+            f.write(data)
+            count += 1
+        index_offset = f.tell()
+        f.write(index)
+        f.write(FOOTER.pack(index_offset, count, BUNDLE_MAGIC))
+    os.replace(tmp_path, path)
+    return count
+
+
+class BundleReader:
+    """Random access to frames in a bundle written by `write_bundle`"""
+
+    def __init__(self, path: Path):
+        self.file = open(path, "rb")
+        self.file.seek(-FOOTER.size, os.SEEK_END)
+        self.index_offset, self.count, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+        if magic != BUNDLE_MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is not a frame bundle")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def entry(self, position: int) -> Tuple[int, int, int]:
+        """(quote_id, offset, length) of the frame at `position`"""
+        if not 0 <= position < self.count:
+            raise IndexError(position)
+        self.file.seek(self.index_offset + position * INDEX_ENTRY.size)
+        return INDEX_ENTRY.unpack(self.file.read(INDEX_ENTRY.size))
+
+    def frame(self, position: int) -> str:
+        _, offset, length = self.entry(position)
+        self.file.seek(offset)
+        return self.file.read(length).decode("utf-8")
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def main():
+    """Print one frame from a bundle: today's (default), a random one, or by position"""
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python -m stoic_terminal.batch BUNDLE [random|POSITION]")
+        sys.exit(1)
+
+    with BundleReader(Path(sys.argv[1])) as bundle:
+        if not len(bundle):
+            sys.exit(1)
+        choice = sys.argv[2] if len(sys.argv) == 3 else None
+        if choice == "random":
+            position = random.randrange(len(bundle))
+        elif choice is not None:
+            position = int(choice) % len(bundle)
+        else:
+            position = date.today().toordinal() % len(bundle)  # Same frame fleet-wide today
+        print(bundle.frame(position), end="")
+
+
+if __name__ == "__main__":
+    main()
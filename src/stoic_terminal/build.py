@@ -0,0 +1,472 @@
+"""
+Dependency-tracked rebuilds of derived artifacts
+
+Every derived artifact is a `Target` with the inputs it is built from:
+
+- files: art metadata and art text, Gutenberg source texts, and the module
+  that builds it, so a code change rebuilds its output as well
+- database facets: digests of the rows a target reads (e.g. quote ids and
+  content hashes, distinct author names), each prefixed with the schema
+  `user_version`
+
+The build state records a content hash per input and, per target, the
+input digests it was last built from. A target is rebuilt when any of its
+digests differ or an output is missing; everything else is left alone.
+Independent targets build in parallel worker processes. A target that
+writes to the database only starts after the targets it depends on.
+
+Hashing is skipped for anything whose stat is unchanged: a file keeps its
+recorded hash while its size and mtime match, and the database facets are
+only queried when the database file (or its WAL) changed. A no-op build
+therefore stats a few dozen files and opens nothing.
+
+Optional targets (the schedule, the static encoder, the vector file and the
+zipapp bundle) are kept current only once they exist or when named
+explicitly. Targets that need sentence-transformers are skipped without it.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import (ART_CATALOG_PATH, ART_DIR, ART_MATCHES_PATH, BUILD_STATE_PATH, BUNDLE_PATH,
+                     GUTENBERG_DIR, SCHEDULE_PATH, STATIC_ENCODER_DIR, VECTORS_PATH)
+
+
+STATE_VERSION = 1
+PACKAGE_DIR = Path(__file__).resolve().parent
+INDEX_SUFFIX = ".lineidx"  # provenance.INDEX_SUFFIX, without importing numpy here
+
+# Rows each database facet is digested from
+DB_FACETS = {
+    "quotes": "SELECT id, content_hash FROM quotes ORDER BY id",
+    "embedded": "SELECT id, content_hash FROM quotes WHERE embedding IS NOT NULL ORDER BY id",
+    "names": """SELECT author FROM quotes
+                UNION SELECT tradition FROM quotes WHERE tradition IS NOT NULL ORDER BY 1""",
+    "schedule": """SELECT id, tradition, COALESCE(CAST(author_id AS TEXT), author), length_category
+                   FROM quotes ORDER BY id""",
+}
+DB_FILE = "file"  # Pseudo-facet: the whole database file (and WAL), hashed like any input file
+
+
+def _module(name: str) -> Path:
+    return PACKAGE_DIR / f"{name}.py"
+
+
+def _art_files() -> List[Path]:
+    return [ART_DIR / "metadata.yaml"] + sorted(ART_DIR.glob("*/*.txt"))
+
+
+def _source_texts() -> List[Path]:
+    return sorted(GUTENBERG_DIR.rglob("*.txt"))
+
+
+# ---------------------------------------------------------------------------
+# Build steps (run in worker processes; each opens its own connection)
+# ---------------------------------------------------------------------------
+
+def _open(db_path: str):
+    from .database import QuoteDatabase
+
+    # Read-write: some targets write to it while others read alongside them
+    return QuoteDatabase(db_path)
+
+
+def _build_embeddings(db_path: str) -> str:
+    from .embeddings import embed_missing
+
+    with _open(db_path) as db:
+        return f"embedded {embed_missing(db)} quotes"
+
+
+def _build_tags(db_path: str) -> str:
+    from .tagging import TagClassifier, tag_quotes
+
+    with _open(db_path) as db:
+        return f"tagged {tag_quotes(db, TagClassifier())} quotes"
+
+
+def _build_catalog(db_path: str) -> str:
+    from .catalog import compile_catalog
+
+    with _open(db_path) as db:
+        counts = compile_catalog(db, output=ART_CATALOG_PATH, matches_output=None)
+    return f"{counts['art']} art files, {counts['headers']} headers"
+
+
+def _build_art_matches(db_path: str) -> str:
+    import yaml
+
+    from .art_matching import build_matches
+
+    with open(ART_DIR / "metadata.yaml", 'r') as f:
+        metadata = yaml.safe_load(f)
+    with _open(db_path) as db:
+        return f"matched {build_matches(db, metadata, ART_MATCHES_PATH)} quotes"
+
+
+def _build_schedule(db_path: str) -> str:
+    from .schedule import update_schedule
+
+    with _open(db_path) as db:
+        result = update_schedule(db, SCHEDULE_PATH)
+    return f"{result['planned']} days planned"
+
+
+def _build_static_encoder(db_path: str) -> str:
+    from .static_encoder import distill
+
+    with _open(db_path) as db:
+        counts = distill(db, output=STATIC_ENCODER_DIR)
+    return f"{counts['tokens']} token vectors"
+
+
+def _build_vectors(db_path: str) -> str:
+    from .embeddings import database_vector_batches, write_vector_file
+
+    with _open(db_path) as db:
+        count = write_vector_file(VECTORS_PATH, database_vector_batches(db))
+    return f"{count} vectors, {VECTORS_PATH.stat().st_size / 1024 / 1024:.1f} MiB"
+
+
+def _bundle_data() -> Dict[str, Path]:
+    """Built artifacts the zipapp embeds, by name under its data/"""
+    files = {path.name: path
+             for path in (ART_CATALOG_PATH, ART_MATCHES_PATH, SCHEDULE_PATH, VECTORS_PATH)
+             if path.exists()}
+    if STATIC_ENCODER_DIR.is_dir():
+        files.update({f"{STATIC_ENCODER_DIR.name}/{path.name}": path
+                      for path in sorted(STATIC_ENCODER_DIR.iterdir()) if path.is_file()})
+    return files
+
+
+def _build_zipapp(db_path: str) -> str:
+    import sqlite3
+
+    from .bundle import build_bundle
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # A compact, consistent copy (includes anything still in the WAL)
+        copy = Path(workdir) / "quotes.db"
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("VACUUM INTO ?", (str(copy),))
+        finally:
+            conn.close()
+        result = build_bundle(BUNDLE_PATH, str(copy), _bundle_data())
+    return (f"{result['modules']} modules, {result['size'] / 1024 / 1024:.1f} MiB "
+            f"(bundle {result['id']})")
+
+
+def _build_line_indexes(db_path: str) -> str:
+    from .provenance import SourceText
+
+    for path in _source_texts():
+        SourceText(path).close()  # Opening rebuilds a stale index
+    return f"{len(_source_texts())} indexes"
+
+
+class Target:
+    """One derived artifact: what it is built from and how to build it"""
+
+    def __init__(self,
+                 name: str,
+                 build: Callable[[str], str],
+                 files: Callable[[], List[Path]] = list,
+                 db: Sequence[str] = (),
+                 deps: Sequence[str] = (),
+                 outputs: Callable[[], List[Path]] = list,
+                 requires: Optional[str] = None,
+                 optional: bool = False,
+                 writes_db: bool = False):
+        self.name = name
+        self.build = build
+        self.files = files
+        self.db = db
+        self.deps = deps
+        self.outputs = outputs
+        self.requires = requires    # Module the build step can't run without
+        self.optional = optional    # Only kept current once the output exists
+        self.writes_db = writes_db  # Recorded with the digests it leaves behind
+
+    def missing_outputs(self) -> List[Path]:
+        return [path for path in self.outputs() if not path.exists()]
+
+
+# The CLI offers config.BUILD_TARGETS without importing this module; tests/test_build.py
+# checks that both list the same targets in the same order
+TARGETS: Dict[str, Target] = {target.name: target for target in [
+    Target("embeddings", _build_embeddings, db=["quotes"],
+           requires="sentence_transformers", writes_db=True),
+    Target("tags", _build_tags, files=lambda: [_module("tagging")], db=["embedded"],
+           deps=["embeddings"], requires="sentence_transformers", writes_db=True),
+    Target("catalog", _build_catalog, files=lambda: _art_files() + [_module("catalog")],
+           db=["names"], outputs=lambda: [ART_CATALOG_PATH]),
+    Target("art-matches", _build_art_matches,
+           files=lambda: [ART_DIR / "metadata.yaml", _module("art_matching")],
+           db=["embedded"], deps=["embeddings"], outputs=lambda: [ART_MATCHES_PATH],
+           requires="sentence_transformers"),
+    Target("schedule", _build_schedule, files=lambda: [_module("schedule")], db=["schedule"],
+           outputs=lambda: [SCHEDULE_PATH], optional=True),
+    Target("static-encoder", _build_static_encoder, files=lambda: [_module("static_encoder")],
+           db=["quotes", "embedded"], deps=["embeddings"], outputs=lambda: [STATIC_ENCODER_DIR],
+           requires="sentence_transformers", optional=True),
+    Target("vectors", _build_vectors, files=lambda: [_module("embeddings")], db=["embedded"],
+           deps=["embeddings"], outputs=lambda: [VECTORS_PATH], optional=True),
+    Target("line-indexes", _build_line_indexes, files=lambda: _source_texts(),
+           outputs=lambda: [path.with_name(path.name + INDEX_SUFFIX) for path in _source_texts()]),
+    Target("zipapp", _build_zipapp,
+           files=lambda: sorted(PACKAGE_DIR.glob("*.py")) + list(_bundle_data().values()),
+           db=[DB_FILE],
+           deps=["catalog", "tags", "art-matches", "schedule", "static-encoder", "vectors"],
+           outputs=lambda: [BUNDLE_PATH], optional=True),
+]}
+
+
+def _run_target(name: str, db_path: str) -> Tuple[str, float]:
+    start = time.perf_counter()
+    summary = TARGETS[name].build(db_path)
+    return summary, time.perf_counter() - start
+
+
+# ---------------------------------------------------------------------------
+# Input fingerprints
+# ---------------------------------------------------------------------------
+
+def _stamp(path: Path) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Fingerprints:
+    """Content digests of build inputs, re-hashed only when their stat changes"""
+
+    def __init__(self, state: Dict, db_path: str):
+        self.files: Dict[str, List] = state.setdefault("files", {})
+        self.db_state: Dict = state.setdefault("db", {})
+        self.db_path = Path(db_path).resolve()
+        self.dirty = False
+
+    def file(self, path: Path) -> str:
+        """sha1 of a file's content ("missing" if it doesn't exist)"""
+        key = str(path)
+        stamp = _stamp(path)
+        if stamp is None:
+            return "missing"
+        recorded = self.files.get(key)
+        if recorded and recorded[:2] == stamp:
+            return recorded[2]
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha1.update(block)
+        digest = sha1.hexdigest()
+        self.files[key] = stamp + [digest]
+        self.dirty = True
+        return digest
+
+    def _db_stamp(self) -> List:
+        wal = self.db_path.with_name(self.db_path.name + "-wal")
+        return [str(self.db_path), _stamp(self.db_path), _stamp(wal)]
+
+    def db(self, facets: Iterable[str]) -> Dict[str, str]:
+        """Digests of database facets; queried only if the database changed since recorded"""
+        facets = list(facets)
+        stamp = self._db_stamp()
+        if self.db_state.get("stamp") != stamp:
+            self.db_state.clear()
+            self.db_state.update({"stamp": stamp, "digests": {}})
+        digests = self.db_state["digests"]
+        missing = [facet for facet in facets if facet not in digests]
+        if missing:
+            digests.update(self._query(missing))
+            self.dirty = True
+        return {facet: digests[facet] for facet in facets}
+
+    def _query(self, facets: List[str]) -> Dict[str, str]:
+        from .profiling import span
+
+        db = _open(str(self.db_path))
+        try:
+            version = db.schema_version()
+            digests = {}
+            for facet in facets:
+                with span(f"build.digest.{facet}"):
+                    digest = hashlib.sha1(f"user_version={version}".encode())
+                    cursor = db.conn.execute(DB_FACETS[facet])
+                    while True:
+                        rows = cursor.fetchmany(10_000)
+                        if not rows:
+                            break
+                        digest.update(repr([tuple(row) for row in rows]).encode())
+                    digests[facet] = digest.hexdigest()
+        finally:
+            db.close()
+        return digests
+
+    def database_changed(self):
+        """Forget the facet digests (a target just wrote to the database)"""
+        self.db_state.clear()
+
+    def inputs(self, target: Target) -> Dict[str, str]:
+        """{input name: digest} for a target"""
+        inputs = {str(path): self.file(path) for path in target.files()}
+        facets = [facet for facet in target.db if facet != DB_FILE]
+        inputs.update({f"db:{facet}": digest for facet, digest in self.db(facets).items()})
+        if DB_FILE in target.db:
+            wal = self.db_path.with_name(self.db_path.name + "-wal")
+            inputs.update({"db:file": self.file(self.db_path), "db:wal": self.file(wal)})
+        return inputs
+
+
+def load_state(path: Path = BUILD_STATE_PATH) -> Dict:
+    try:
+        state = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"version": STATE_VERSION}
+    return state if state.get("version") == STATE_VERSION else {"version": STATE_VERSION}
+
+
+def save_state(state: Dict, path: Path = BUILD_STATE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state, indent=1), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def select_targets(names: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Named targets plus everything they depend on, in dependency order.
+    Without names: every target, optional ones only if their output exists.
+    """
+    if names:
+        wanted = set(names)
+    else:
+        wanted = {name for name, target in TARGETS.items()
+                  if not target.optional or not target.missing_outputs()}
+    ordered: List[str] = []
+
+    def visit(name: str):
+        if name in ordered:
+            return
+        for dep in TARGETS[name].deps:
+            # Optional dependencies are built first when they exist, never created
+            if dep in wanted or not TARGETS[dep].optional or not TARGETS[dep].missing_outputs():
+                visit(dep)
+        ordered.append(name)
+
+    for name in TARGETS:
+        if name in wanted:
+            visit(name)
+    return ordered
+
+
+def build(db_path: str,
+          names: Optional[Iterable[str]] = None,
+          jobs: Optional[int] = None,
+          force: bool = False,
+          dry_run: bool = False,
+          state_path: Path = BUILD_STATE_PATH) -> Dict[str, Dict]:
+    """
+    Bring targets up to date. Returns {target: {"status", ...}} in build
+    order, where status is "fresh", "stale" (dry run), "built", "skipped"
+    or "failed"; rebuilt targets also list the inputs that changed.
+    """
+    if not Path(db_path).exists():
+        raise FileNotFoundError(f"Database not found: {db_path}")
+
+    state = load_state(state_path)
+    built = state.setdefault("targets", {})
+    fingerprints = Fingerprints(state, db_path)
+    pending = select_targets(names)
+    results: Dict[str, Dict] = {name: {} for name in pending}
+    running: Dict[Future, Tuple[str, Dict[str, str]]] = {}
+    executor: Optional[ProcessPoolExecutor] = None
+
+    def blocked(name: str) -> bool:
+        waiting = set(pending) | {running_name for running_name, _ in running.values()}
+        return any(dep in waiting for dep in TARGETS[name].deps)
+
+    try:
+        while pending or running:
+            for name in [name for name in pending if not blocked(name)]:
+                pending.remove(name)
+                target = TARGETS[name]
+                if any(results.get(dep, {}).get("status") == "failed" for dep in target.deps):
+                    results[name] = {"status": "skipped", "reason": "a dependency failed"}
+                    continue
+
+                inputs = fingerprints.inputs(target)
+                recorded = built.get(name)
+                if not force and recorded == inputs and not target.missing_outputs():
+                    results[name] = {"status": "fresh"}
+                    continue
+                changed = sorted(key for key in inputs
+                                 if recorded is None or recorded.get(key) != inputs[key])
+                if target.requires and not importlib.util.find_spec(target.requires):
+                    results[name] = {"status": "skipped",
+                                     "reason": f"needs {target.requires.replace('_', '-')}"}
+                    continue
+                if dry_run:
+                    results[name] = {"status": "stale", "changed": changed}
+                    continue
+
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=jobs or os.cpu_count())
+                future = executor.submit(_run_target, name, str(Path(db_path).resolve()))
+                running[future] = (name, inputs)
+                results[name] = {"changed": changed}
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, inputs = running.pop(future)
+                target = TARGETS[name]
+                try:
+                    summary, seconds = future.result()
+                except Exception as e:
+                    results[name].update(status="failed", reason=f"{type(e).__name__}: {e}")
+                    continue
+                if target.writes_db:
+                    # Record what the target left behind, or the next run repeats it
+                    fingerprints.database_changed()
+                    inputs = fingerprints.inputs(target)
+                results[name].update(status="built", summary=summary, seconds=seconds)
+                built[name] = inputs
+                fingerprints.dirty = True
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if fingerprints.dirty and not dry_run:
+        save_state(state, state_path)
+    return results
+
+
+def watch(db_path: str,
+          names: Optional[Iterable[str]] = None,
+          jobs: Optional[int] = None,
+          interval: float = 1.0,
+          report: Optional[Callable[[Dict[str, Dict], float], None]] = None):
+    """Rebuild whenever inputs change; polls with no-op builds every `interval` seconds"""
+    while True:
+        start = time.perf_counter()
+        results = build(db_path, names, jobs)
+        if report and any(result["status"] in ("built", "failed") for result in results.values()):
+            report(results, time.perf_counter() - start)
+        time.sleep(interval)
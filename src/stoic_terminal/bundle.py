@@ -0,0 +1,273 @@
+"""
+Single-file zipapp distribution
+
+`stoic-terminal build zipapp` packs the package and its data into one
+executable archive:
+
+    __main__.py                bootstrap, with the bundle id baked in
+    stoic_terminal/*.pyc       the modules the CLI can import, compiled with
+                               -OO, no sources
+    data/quotes.db             the quote database
+    data/...                   art catalog, art matches, schedule, static
+                               encoder table and vector file, whichever
+                               have been built
+
+Bytecode is compiled ahead of time (unchecked-hash .pyc), so a fresh
+machine never compiles a module. It only loads on the Python version that
+built the bundle; the shebang names that version. The archive comes first
+on sys.path, so the package is found without searching site-packages.
+Third-party packages are not bundled: once the catalog is current the
+display path imports none of them. Commands that need them (semantic
+search, tagging) import them from the host install as usual. The build
+modules are left out: the bundle carries none of their sources (art,
+Gutenberg texts) and its database copy is never written.
+
+SQLite can't open a database inside a zip. On first run, the data is
+therefore copied once to ~/.cache/stoic-terminal/bundles/<bundle id>.
+Members are stored uncompressed, so this is a plain copy. Every later run
+opens those files in place, and SQLite and the art tables mmap them. Each
+run holds a shared lock on its copy; a new bundle's first run removes
+copies of older bundles beyond the newest few, unless a running process
+still holds one. STOIC_TERMINAL_DATA and
+STOIC_TERMINAL_DB default to that copy, and STOIC_TERMINAL_STATIC_DB marks
+it as static, so it is opened without locks.
+"""
+
+import ast
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+PACKAGE = "stoic_terminal"
+DATA_PREFIX = "data/"
+DB_NAME = "quotes.db"
+COMPLETE_MARKER = ".complete"  # Written last, so a half-copied cache is never used
+IN_USE_LOCK = ".in-use"  # Shared-locked by every run of the bundle
+KEEP_BUNDLES = 3  # Extracted copies kept, newest first, in use or not
+
+# Modules the bundle starts from, and those it leaves out with everything only they import
+ENTRY_MODULES = ("__init__", "bundle")
+BUILD_ONLY_MODULES = ("build", "provenance")
+
+# Locks held for the life of the process (closing the descriptor releases them)
+_held_locks: List[int] = []
+
+MAIN_TEMPLATE = """\
+import sys
+if sys.version_info[:2] != {version!r}:
+    sys.exit("This bundle holds bytecode for Python %d.%d; run it with that version" % {version!r})
+from stoic_terminal.bundle import run
+sys.exit(run({bundle_id!r}, __file__))
+"""
+
+
+def _cache_roots():
+    """Where the data copy may live: the user cache, else the temp dir"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    yield Path(cache_home) / "stoic-terminal" / "bundles"
+    yield Path(tempfile.gettempdir()) / f"stoic-terminal-{os.getuid()}" / "bundles"
+
+
+def _extract(archive: str, target: Path):
+    """Copy the archive's data members into `target` (atomically, once)"""
+    import zipfile
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=target.parent))
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.filename.startswith(DATA_PREFIX) and not info.is_dir():
+                    path = staging / info.filename
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    with zf.open(info) as src, open(path, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+        (staging / COMPLETE_MARKER).touch()
+        try:
+            staging.rename(target)
+        except OSError:
+            return  # Another process finished first; use its copy
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    # Copies from earlier bundles would otherwise pile up with every upgrade
+    _prune(target)
+
+
+def _hold(target: Path) -> bool:
+    """Take a shared lock on an extracted copy for the life of the process"""
+    try:
+        import fcntl
+    except ImportError:
+        return True  # No flock on this platform; pruning goes by age alone
+
+    try:
+        fd = os.open(target / IN_USE_LOCK, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        return False
+    fcntl.flock(fd, fcntl.LOCK_SH)  # Waits out a prune that is removing this copy
+    _held_locks.append(fd)
+    return True
+
+
+def _remove_unused(path: Path):
+    """Delete an extracted copy unless a running process holds its lock"""
+    try:
+        import fcntl
+    except ImportError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+
+    try:
+        fd = os.open(path / IN_USE_LOCK, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        return
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return  # In use
+        # Marker first, so a run that was waiting for the lock sees the copy as gone
+        (path / COMPLETE_MARKER).unlink(missing_ok=True)
+        shutil.rmtree(path, ignore_errors=True)
+    finally:
+        os.close(fd)
+
+
+def _prune(target: Path):
+    """Remove copies of older bundles beyond the newest KEEP_BUNDLES, skipping those in use"""
+    copies = []
+    for path in target.parent.iterdir():
+        if path == target or path.name.startswith("."):
+            continue
+        try:
+            copies.append(((path / COMPLETE_MARKER).stat().st_mtime, path))
+        except OSError:
+            copies.append((0.0, path))  # Never completed
+    copies.sort(reverse=True)
+    for _, path in copies[KEEP_BUNDLES - 1:]:
+        _remove_unused(path)
+
+
+def data_dir(bundle_id: str, archive: str) -> Optional[Path]:
+    """The bundle's extracted data directory, copying it out of the archive on first use"""
+    for root in _cache_roots():
+        target = root / bundle_id
+        for _ in range(2):  # Again if a prune removed the copy before it was locked
+            if not (target / COMPLETE_MARKER).exists():
+                try:
+                    _extract(archive, target)
+                except OSError:
+                    break
+            if _hold(target) and (target / COMPLETE_MARKER).exists():
+                return target / "data"
+    return None
+
+
+def run(bundle_id: str, main_file: str) -> int:
+    """Entry point of the archive: point the config at the bundled data, then run the CLI"""
+    archive = os.path.dirname(main_file)
+    data = data_dir(bundle_id, archive)
+    if data is not None:
+        # Before anything imports config, which reads these once
+        os.environ.setdefault("STOIC_TERMINAL_DATA", str(data))
+        if (data / DB_NAME).exists():
+            os.environ.setdefault("STOIC_TERMINAL_DB", str(data / DB_NAME))
+            os.environ["STOIC_TERMINAL_STATIC_DB"] = str(data / DB_NAME)
+
+    from .cli import main
+
+    return main()
+
+
+# ---------------------------------------------------------------------------
+# Building
+# ---------------------------------------------------------------------------
+
+def _compile(source: Path, display_name: str, workdir: Path) -> bytes:
+    """-OO bytecode that is never checked against a source file"""
+    import py_compile
+
+    cfile = workdir / (source.stem + ".pyc")
+    py_compile.compile(str(source), cfile=str(cfile), dfile=display_name, doraise=True,
+                       optimize=2, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    return cfile.read_bytes()
+
+
+def runtime_modules(package_dir: Path) -> List[Path]:
+    """
+    Sources of the modules the bundle can import: those reachable from its
+    entry modules through package-relative imports, anywhere in a module
+    (the CLI imports its commands lazily), minus the build-only ones
+    """
+    seen = set()
+    pending = list(ENTRY_MODULES)
+    while pending:
+        name = pending.pop()
+        source = package_dir / f"{name}.py"
+        if name in seen or name in BUILD_ONLY_MODULES or not source.exists():
+            continue
+        seen.add(name)
+        for node in ast.walk(ast.parse(source.read_bytes(), str(source))):
+            if isinstance(node, ast.ImportFrom) and node.level == 1:
+                if node.module:
+                    pending.append(node.module.split(".")[0])
+                else:
+                    pending.extend(alias.name for alias in node.names)
+    return sorted(package_dir / f"{name}.py" for name in seen)
+
+
+def build_bundle(output: Path, db_path: str, data_files: Dict[str, Path],
+                 interpreter: Optional[str] = None) -> Dict:
+    """
+    Write the zipapp. `data_files` maps names under data/ to files to embed
+    (the database is added as quotes.db). Returns the bundle id and sizes.
+    """
+    import zipfile
+
+    package_dir = Path(__file__).resolve().parent
+    interpreter = interpreter or f"/usr/bin/env python{sys.version_info[0]}.{sys.version_info[1]}"
+    members: Dict[str, bytes] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for source in runtime_modules(package_dir):
+            name = f"{PACKAGE}/{source.name}"
+            members[name + "c"] = _compile(source, name, Path(workdir))
+    code_bytes = sum(len(data) for data in members.values())
+
+    files = {DATA_PREFIX + DB_NAME: Path(db_path)}
+    files.update({DATA_PREFIX + name: Path(path) for name, path in data_files.items()})
+    digest = hashlib.sha1()
+    for name in sorted(members):
+        digest.update(name.encode() + b"\0" + members[name])
+    for name in sorted(files):
+        digest.update(name.encode() + b"\0")
+        with open(files[name], "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    bundle_id = digest.hexdigest()[:16]
+
+    # Source, so a mismatched interpreter gets a clear message instead of a bad magic number
+    members["__main__.py"] = MAIN_TEMPLATE.format(
+        bundle_id=bundle_id, version=tuple(sys.version_info[:2])
+    ).encode()
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(output.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(f"#!{interpreter}\n".encode())
+        # Stored, not deflated: nothing to inflate on import, data copies out as is
+        with zipfile.ZipFile(f, "w", compression=zipfile.ZIP_STORED) as zf:
+            for name in sorted(members):
+                zf.writestr(zipfile.ZipInfo(name), members[name])
+            for name in sorted(files):
+                zf.write(files[name], name)
+    os.chmod(tmp_path, 0o755)
+    os.replace(tmp_path, output)
+    return {"id": bundle_id, "modules": len(members) - 1, "code_bytes": code_bytes,
+            "data_bytes": sum(path.stat().st_size for path in files.values()),
+            "size": output.stat().st_size}
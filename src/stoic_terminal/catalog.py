@@ -0,0 +1,140 @@
+"""
+Compiled art catalog
+
+`metadata.yaml` is slow to parse at startup and pyfiglet has to load a
+font file before it can render anything. The compiled catalog is a single
+JSON file, built ahead of time, that holds:
+
+- the parsed art metadata and the text of every art variant
+- pre-rendered figlet headers for every author and tradition in the quote
+  database, per supported font and width bucket
+
+Next to it, when quote embeddings exist, the semantic quote → art table is
+written (see art_matching).
+
+With a current catalog the display path reads one file and never imports
+pyfiglet or yaml.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .art_matching import DEFAULT_TOP_K, build_matches
+from .config import ART_CATALOG_PATH, ART_DIR, ART_MATCHES_PATH
+from .database import QuoteDatabase
+from .display import HEADER_FONTS, HEADER_WIDTH_BUCKETS
+from .profiling import span
+
+
+CATALOG_VERSION = 1
+
+
+def _source_stamp(path: Path) -> str:
+    """Content hash of a source file (survives copies and checkouts, unlike mtime)"""
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def render_headers(texts: Iterable[str], fonts: Iterable[str] = HEADER_FONTS) -> Dict:
+    """
+    Pre-render figlet headers for each text, font and width bucket.
+
+    Returns {font: {text: rendering}} where rendering is a string when it is
+    the same for every bucket (short text), else {bucket: string}.
+    """
+    from pyfiglet import Figlet
+
+    texts = sorted(set(texts))
+    headers = {}
+    for font in fonts:
+        figlet = Figlet(font=font)  # Parse the .flf font file once per font
+        rendered = {}
+        for text in texts:
+            by_bucket = {}
+            for bucket in HEADER_WIDTH_BUCKETS:
+                figlet.width = bucket
+                by_bucket[str(bucket)] = figlet.renderText(text).rstrip("\n")
+
+            if len(set(by_bucket.values())) == 1:
+                rendered[text] = by_bucket[str(HEADER_WIDTH_BUCKETS[0])]
+            else:
+                rendered[text] = by_bucket
+        headers[font] = rendered
+    return headers
+
+
+def compile_catalog(db: QuoteDatabase,
+                    art_dir: Path = ART_DIR,
+                    output: Path = ART_CATALOG_PATH,
+                    fonts: Iterable[str] = HEADER_FONTS,
+                    matches_output: Optional[Path] = ART_MATCHES_PATH,
+                    top_k: int = DEFAULT_TOP_K) -> Dict:
+    """Build the compiled catalog (and quote → art table) and return summary counts"""
+    import yaml
+
+    art_dir = Path(art_dir)
+    metadata_path = art_dir / "metadata.yaml"
+    with open(metadata_path, 'r') as f:
+        metadata = yaml.safe_load(f)
+
+    art = {}
+    for pieces in metadata.values():
+        for piece in pieces or []:
+            for variant in piece['variants']:
+                art_path = art_dir / variant['file']
+                if art_path.exists():
+                    art[variant['file']] = art_path.read_text(encoding='utf-8')
+
+    cursor = db.conn.cursor()
+    cursor.execute("SELECT DISTINCT author FROM quotes")
+    header_texts = {row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT DISTINCT tradition FROM quotes WHERE tradition IS NOT NULL")
+    header_texts.update(row[0] for row in cursor.fetchall())
+
+    catalog = {
+        "version": CATALOG_VERSION,
+        "sources": {"metadata": _source_stamp(metadata_path)},
+        "metadata": metadata,
+        "art": art,
+        "headers": render_headers(header_texts, fonts),
+    }
+
+    output = Path(output)
+    tmp_path = output.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(catalog, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, output)  # Readers never see a half-written catalog
+    load_catalog.cache_clear()
+
+    matched = 0
+    if matches_output:
+        try:
+            matched = build_matches(db, metadata, matches_output, top_k=top_k)
+        except ImportError:
+            pass  # No numpy / sentence-transformers: tag-based art selection only
+
+    return {"art": len(art), "headers": len(header_texts), "fonts": len(catalog["headers"]),
+            "matches": matched}
+
+
+@lru_cache(maxsize=4)
+def load_catalog(path: str = str(ART_CATALOG_PATH),
+                 art_dir: str = str(ART_DIR)) -> Optional[Dict]:
+    """Load the compiled catalog, or None if it is missing, outdated or stale"""
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    with span("catalog.load"), open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+
+    if catalog.get("version") != CATALOG_VERSION:
+        return None
+
+    metadata_path = Path(art_dir) / "metadata.yaml"
+    if metadata_path.exists() and _source_stamp(metadata_path) != catalog["sources"]["metadata"]:
+        return None  # metadata.yaml was edited after the catalog was built
+
+    return catalog
@@ -0,0 +1,796 @@
+"""
+Command-line interface for Stoic Terminal
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import profiling  # First, so its clock covers the remaining imports
+from .art_matching import database_fingerprint
+from .ascii_art import ASCIIArtLoader, get_terminal_width
+from .catalog import compile_catalog
+from .config import (ART_CATALOG_PATH, ART_MATCHES_PATH, BUILD_TARGETS, DEFAULT_DB_PATH,
+                     GIT_SESSIONS_PATH, HISTORY_PATH, MEMORY_BUDGET_MB, MIGRATION_CHUNK_SIZE,
+                     PROMPT_CACHE_DIR, PROMPT_MIN_INTERVAL, PROMPT_SHELLS, QUERY_ENCODER,
+                     SCHEDULE_DAYS, SCHEDULE_PATH, SCHEDULE_WINDOW, STATIC_ENCODER_DIR,
+                     TRANSFER_BATCH_SIZE)
+from .database import QuoteDatabase
+from .display import render_quote
+from .history import ShownHistory
+
+
+BOLD = "\033[1m"
+RESET = "\033[0m"
+
+# Commands that can read from several databases at once (--with-db)
+FEDERATED_COMMANDS = {None, "search"}
+
+# Commands that never write, so they can share the database read-only
+READ_ONLY_COMMANDS = {None, "search", "facets", "distill", "export", "render", "serve",
+                      "build-catalog", "schedule"}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with all subcommands"""
+    parser = argparse.ArgumentParser(
+        prog="stoic-terminal",
+        description="Display philosophical quotes in your terminal"
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the quote database")
+    parser.add_argument("--width", type=int,
+                        help="Render for this many columns (default: terminal width)")
+    parser.add_argument("--no-art", action="store_true", help="Show the quote without ASCII art")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Don't skip or record recently shown quotes")
+    parser.add_argument("--with-db", action="append", default=[], metavar="PATH",
+                        help="Also read quotes from this database (repeatable); "
+                             "random picks and search then span every database")
+    parser.add_argument("--author", help="Only show quotes by this author (any spelling)")
+    parser.add_argument("--tradition", help="Only show quotes from this tradition")
+    parser.add_argument("--today", action="store_true",
+                        help="Show today's quote from the shared schedule (`schedule` builds it)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a stage-by-stage timing tree to stderr")
+    parser.add_argument("--memory-budget", type=float, default=MEMORY_BUDGET_MB, metavar="MB",
+                        help="Low-memory mode: small SQLite cache, paged vector scans, tag-only "
+                             "search when semantic search won't fit (default: "
+                             f"{MEMORY_BUDGET_MB or 'off'})")
+
+    subparsers = parser.add_subparsers(dest="command")
+
+    search_parser = subparsers.add_parser("search", help="Full-text search over quotes")
+    search_parser.add_argument("query", nargs="+", help="Keywords to search for")
+    search_parser.add_argument("-n", "--limit", type=int, default=10,
+                               help="Maximum number of results (default: 10)")
+    search_parser.add_argument("--semantic", action="store_true",
+                               help="Rank by embedding similarity, diversified with MMR")
+    search_parser.add_argument("--diversity", type=float, default=0.3,
+                               help="Semantic: 0 = pure relevance, 1 = maximal spread (default: 0.3)")
+    search_parser.add_argument("--per-author", type=int, default=2,
+                               help="Semantic: at most this many results per author (default: 2)")
+    search_parser.add_argument("--encoder", choices=["auto", "full", "static"],
+                               default=QUERY_ENCODER,
+                               help="Query encoder: full MiniLM, the torch-free static table, "
+                                    f"or auto (default: {QUERY_ENCODER})")
+
+    facets_parser = subparsers.add_parser(
+        "facets", help="Quote counts per author, tradition or length"
+    )
+    facets_parser.add_argument("facet", nargs="?", default="author",
+                               choices=["author", "tradition", "length_category"],
+                               help="Facet to list (default: author)")
+
+    embed_parser = subparsers.add_parser(
+        "embed", help="Compute embeddings for quotes that don't have one yet"
+    )
+    embed_parser.add_argument("--batch-size", type=int, default=256,
+                              help="Quotes per encode/commit batch (default: 256)")
+
+    distill_parser = subparsers.add_parser(
+        "distill", help="Build the torch-free static query encoder from the full model"
+    )
+    distill_parser.add_argument("--output", type=Path, default=STATIC_ENCODER_DIR,
+                                help=f"Table directory (default: {STATIC_ENCODER_DIR})")
+    distill_parser.add_argument("--align", action=argparse.BooleanOptionalAction, default=None,
+                                help="Fit the table to the stored quote embeddings "
+                                     "(default: when there are enough of them)")
+
+    tag_parser = subparsers.add_parser(
+        "tag", help="Assign tags automatically from embedding similarity"
+    )
+    tag_parser.add_argument("--all", action="store_true",
+                            help="Re-tag every quote, not just untagged ones")
+    tag_parser.add_argument("--threshold", type=float, default=None,
+                            help="Minimum tag similarity (default: 0.3)")
+    tag_parser.add_argument("--max-tags", type=int, default=None,
+                            help="Tags per quote at most (default: 4)")
+    tag_parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Quotes per classify/commit batch (default: 1000)")
+
+    export_parser = subparsers.add_parser(
+        "export", help="Stream the quote database to a JSONL(.gz) or columnar (.stqc) dump"
+    )
+    export_parser.add_argument("path", help="Output file (.jsonl, .jsonl.gz or .stqc)")
+    export_parser.add_argument("--format", choices=["jsonl", "columnar"],
+                               help="Dump format (default: inferred from the file name)")
+    export_parser.add_argument("--batch-size", type=int, default=TRANSFER_BATCH_SIZE,
+                               help=f"Rows per batch/row group (default: {TRANSFER_BATCH_SIZE})")
+
+    import_parser = subparsers.add_parser("import", help="Load quotes from an export dump")
+    import_parser.add_argument("path", help="Dump file produced by `export`")
+    import_parser.add_argument("--format", choices=["jsonl", "columnar"],
+                               help="Dump format (default: inferred from the file name)")
+    import_parser.add_argument("--batch-size", type=int, default=TRANSFER_BATCH_SIZE,
+                               help=f"Rows per insert transaction (default: {TRANSFER_BATCH_SIZE})")
+    import_parser.add_argument("--append", action="store_true",
+                               help="Assign new ids instead of keeping the exported ones")
+
+    migrate_parser = subparsers.add_parser("migrate", help="Upgrade the database schema")
+    migrate_parser.add_argument("--chunk-size", type=int, default=MIGRATION_CHUNK_SIZE,
+                                help="Rows per backfill transaction "
+                                     f"(default: {MIGRATION_CHUNK_SIZE})")
+    migrate_parser.add_argument("--status", action="store_true",
+                                help="Only show the current version and pending migrations")
+
+    compress_parser = subparsers.add_parser(
+        "compress", help="Store quote text zstd-compressed with a trained dictionary"
+    )
+    compress_parser.add_argument("--dict-size", type=int, default=64 * 1024,
+                                 help="Dictionary size in bytes (default: 65536)")
+    compress_parser.add_argument("--undo", action="store_true",
+                                 help="Store every quote as plain text again")
+    compress_parser.add_argument("--no-vacuum", action="store_true",
+                                 help="Skip VACUUM (the file keeps its size until the next one)")
+
+    render_parser = subparsers.add_parser(
+        "render", help="Batch-render quotes to a directory or an indexed .stqb bundle"
+    )
+    render_parser.add_argument("output", type=Path,
+                               help="Directory (one <id>.txt per quote) or bundle file (.stqb)")
+    render_parser.add_argument("-n", "--count", type=int,
+                               help="Render this many sampled quotes (default: all)")
+    render_parser.add_argument("--seed", type=int, default=0,
+                               help="Sample and art selection seed (default: 0)")
+    render_parser.add_argument("--workers", type=int,
+                               help="Worker processes (default: one per CPU)")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the local HTTP/JSON quote service")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    serve_parser.add_argument("--pool-size", type=int, default=4,
+                              help="Read-only SQLite connections (default: 4)")
+    serve_parser.add_argument("--cache-size", type=int, default=1024,
+                              help="Cached responses for repeated queries (default: 1024)")
+
+    catalog_parser = subparsers.add_parser(
+        "build-catalog", help="Pre-compile art metadata, art text and figlet headers"
+    )
+    catalog_parser.add_argument("--output", type=Path, default=ART_CATALOG_PATH,
+                                help=f"Catalog file (default: {ART_CATALOG_PATH})")
+    catalog_parser.add_argument("--matches-output", type=Path, default=ART_MATCHES_PATH,
+                                help=f"Quote → art table (default: {ART_MATCHES_PATH})")
+    catalog_parser.add_argument("--no-match", action="store_true",
+                                help="Skip semantic quote → art matching")
+
+    schedule_parser = subparsers.add_parser(
+        "schedule", help="Plan or update the shared quote-of-the-day calendar"
+    )
+    schedule_parser.add_argument("--output", type=Path, default=SCHEDULE_PATH,
+                                 help=f"Schedule file (default: {SCHEDULE_PATH})")
+    schedule_parser.add_argument("--rebuild", action="store_true",
+                                 help="Plan from scratch instead of keeping past days")
+    schedule_parser.add_argument("--start", type=date.fromisoformat,
+                                 help="First day, YYYY-MM-DD (default: January 1st; rebuilds)")
+    # None when not given, so an update can tell which settings it won't apply
+    schedule_parser.add_argument("--days", type=int,
+                                 help=f"Days to plan when rebuilding (default: {SCHEDULE_DAYS})")
+    schedule_parser.add_argument("--window", type=int,
+                                 help="Days before a quote may repeat "
+                                      f"(default: {SCHEDULE_WINDOW})")
+    schedule_parser.add_argument("--seed", type=int,
+                                 help="Planning seed; same seed, same calendar (default: 0)")
+    schedule_parser.add_argument("--show", type=int, default=0, metavar="N",
+                                 help="Print the next N scheduled quotes")
+
+    rebuild_parser = subparsers.add_parser(
+        "build", help="Rebuild derived artifacts whose inputs changed (catalog, embeddings, ...)"
+    )
+    rebuild_parser.add_argument("targets", nargs="*", choices=BUILD_TARGETS, metavar="TARGET",
+                               help=f"Only these and what they need ({', '.join(BUILD_TARGETS)}); "
+                                    "default: all, optional ones only once they exist")
+    rebuild_parser.add_argument("--watch", action="store_true",
+                               help="Keep running and rebuild whenever an input changes")
+    rebuild_parser.add_argument("--interval", type=float, default=1.0,
+                               help="Watch: seconds between checks (default: 1.0)")
+    rebuild_parser.add_argument("--jobs", "-j", type=int,
+                               help="Targets built in parallel (default: one per CPU)")
+    rebuild_parser.add_argument("--force", action="store_true",
+                               help="Rebuild even if nothing changed")
+    rebuild_parser.add_argument("--dry-run", action="store_true",
+                               help="Only list the targets that would be rebuilt")
+
+    init_parser = subparsers.add_parser(
+        "shell-init", help="Print prompt hooks that show a cached quote without blocking"
+    )
+    init_parser.add_argument("shell", choices=PROMPT_SHELLS, help="Shell to print hooks for")
+    init_parser.add_argument("--cache-dir", type=Path, default=PROMPT_CACHE_DIR,
+                             help=f"Pre-rendered quote cache (default: {PROMPT_CACHE_DIR})")
+
+    refill_parser = subparsers.add_parser(
+        "prompt-refill", help="Render the next prompt quote into the cache (used by the hooks)"
+    )
+    refill_parser.add_argument("--width", type=int, help="Render for this many columns")
+    refill_parser.add_argument("--cache-dir", type=Path, default=PROMPT_CACHE_DIR,
+                               help=f"Pre-rendered quote cache (default: {PROMPT_CACHE_DIR})")
+    refill_parser.add_argument("--min-interval", type=float, default=PROMPT_MIN_INTERVAL,
+                               help="Skip if the cache is newer than this many seconds "
+                                    f"(default: {PROMPT_MIN_INTERVAL})")
+
+    git_parser = subparsers.add_parser(
+        "git-activity", help="Record new commits and show recent coding activity and themes"
+    )
+    git_parser.add_argument("--repo", default=".",
+                            help="Repository to read new commits from (default: current dir)")
+    git_parser.add_argument("--no-update", action="store_true",
+                            help="Only show the stored activity; don't run git")
+    git_parser.add_argument("--store", type=Path, default=GIT_SESSIONS_PATH,
+                            help=f"Session store (default: {GIT_SESSIONS_PATH})")
+
+    return parser
+
+
+def print_quote(quote: Dict, text: Optional[str] = None, index: Optional[int] = None):
+    """Print a quote with its attribution"""
+    prefix = f"{index}. " if index is not None else ""
+    indent = " " * len(prefix)
+
+    print(f"{prefix}\"{text or quote['text']}\"")
+    attribution = f"{indent}— {quote['author']}"
+    if quote['source']:
+        attribution += f", {quote['source']}"
+    if quote['source_context']:
+        attribution += f" ({quote['source_context']})"
+    if quote.get('corpus'):
+        attribution += f" [{quote['corpus']}]"
+    print(attribution)
+
+
+def cmd_search(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Run a full-text search and print ranked results"""
+    if args.semantic:
+        return cmd_semantic_search(db, args)
+
+    highlight = (BOLD, RESET) if sys.stdout.isatty() else ("[", "]")
+    results = db.search_text(" ".join(args.query), limit=args.limit, highlight=highlight)
+
+    if not results:
+        print("No matching quotes found.")
+        return 1
+
+    for i, quote in enumerate(results, 1):
+        print_quote(quote, text=quote['snippet'], index=i)
+        print()
+    return 0
+
+
+def cmd_semantic_search(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Embed the query and print diverse nearest quotes"""
+    # numpy and the model are only loaded for semantic queries
+    if args.memory_budget:
+        return cmd_budgeted_search(db, args)
+
+    from .embeddings import EmbeddingMatrix, query_encoder
+    from .ranking import diverse_top_k
+
+    matrix = EmbeddingMatrix.from_database(db)
+    if not len(matrix):
+        print("No quotes have embeddings yet; run `stoic-terminal embed` first.")
+        return 1
+
+    try:
+        query = query_encoder(args.encoder)([" ".join(args.query)])[0]
+    except ImportError:
+        print("Semantic search needs sentence-transformers: pip install sentence-transformers")
+        print("(or a static table: `stoic-terminal distill` once, then --encoder static)")
+        return 1
+    except FileNotFoundError:
+        print("No static query encoder; build it with `stoic-terminal distill`.")
+        return 1
+    ids = diverse_top_k(matrix, query, args.limit, lambda_=1 - args.diversity,
+                        max_per_author=args.per_author)
+    for i, quote in enumerate(db.get_quotes_by_ids(ids), 1):
+        print_quote(quote, index=i)
+        print()
+    return 0
+
+
+def cmd_facets(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Print quote counts for each value of a facet"""
+    counts = db.facet_counts(args.facet)
+    if not counts:
+        print(f"No quotes have a {args.facet}.")
+        return 1
+
+    width = max(len(str(value)) for value, _ in counts)
+    for value, count in counts:
+        print(f"  {str(value):<{width}}  {count:>6}")
+    return 0
+
+
+def cmd_embed(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Fill in missing quote embeddings"""
+    from .embeddings import embed_missing
+
+    count = embed_missing(db, batch_size=args.batch_size)
+    print(f"Embedded {count} quotes")
+    return 0
+
+
+def cmd_distill(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Distill the static query encoder table"""
+    from .static_encoder import distill
+
+    try:
+        counts = distill(db, output=args.output, align=args.align)
+    except ImportError:
+        print("Distilling needs sentence-transformers: pip install sentence-transformers")
+        return 1
+    aligned = f", aligned to {counts['aligned']} quote embeddings" if counts['aligned'] else ""
+    print(f"Wrote {counts['tokens']} token vectors ({counts['dim']} dims{aligned}) "
+          f"to {args.output}")
+    return 0
+
+
+def cmd_tag(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Tag quotes with the embedding classifier"""
+    from .tagging import DEFAULT_MAX_TAGS, DEFAULT_THRESHOLD, TagClassifier, tag_quotes
+
+    try:
+        classifier = TagClassifier(
+            threshold=DEFAULT_THRESHOLD if args.threshold is None else args.threshold,
+            max_tags=args.max_tags or DEFAULT_MAX_TAGS,
+        )
+    except ImportError:
+        print("Tagging needs sentence-transformers: pip install sentence-transformers")
+        return 1
+
+    count = tag_quotes(db, classifier, batch_size=args.batch_size, only_untagged=not args.all)
+    print(f"Tagged {count} quotes")
+    return 0
+
+
+def cmd_export(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Export the quote database to a dump file"""
+    from .transfer import export_quotes
+
+    count = export_quotes(db, args.path, format=args.format, batch_size=args.batch_size)
+    print(f"Exported {count} quotes to {args.path}")
+    return 0
+
+
+def cmd_import(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Import quotes from a dump file"""
+    from .transfer import import_quotes
+
+    try:
+        count = import_quotes(db, args.path, format=args.format, batch_size=args.batch_size,
+                              keep_ids=not args.append)
+    except ValueError as exc:
+        print(exc)
+        return 1
+    print(f"Imported {count} quotes from {args.path}")
+    return 0
+
+
+def cmd_migrate(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Run pending schema migrations with per-chunk progress"""
+    from .migrations import SCHEMA_VERSION, migrate, pending_migrations
+
+    pending = pending_migrations(db.conn)
+    print(f"Schema version: {db.schema_version()} (latest: {SCHEMA_VERSION})")
+    for migration in pending:
+        print(f"  pending v{migration.version}: {migration.description}")
+
+    if args.status or not pending:
+        return 0
+
+    def report(migration, last_id):
+        print(f"  v{migration.version} backfilled through quote id {last_id}", end="\r")
+
+    version = migrate(db.conn, chunk_size=args.chunk_size, progress=report)
+    print(f"\nSchema upgraded to version {version}")
+    return 0
+
+
+def cmd_compress(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Compress (or decompress) stored quote text in place"""
+    from .compression import compress_database, decompress_database
+
+    size = db.db_path.stat().st_size
+
+    def report(last_id):
+        print(f"  rewritten through quote id {last_id}", end="\r")
+
+    try:
+        if args.undo:
+            rows = decompress_database(db.conn, db.codec, vacuum=not args.no_vacuum,
+                                       progress=report)
+            print(f"\nDecompressed {rows} quotes")
+        else:
+            result = compress_database(db.conn, db.codec, dict_size=args.dict_size,
+                                       vacuum=not args.no_vacuum, progress=report)
+            print(f"\nCompressed {result['rows']} quotes with a {result['dict_bytes']:,}-byte "
+                  f"dictionary")
+            print("⚠ Writes from outside stoic-terminal (e.g. the sqlite3 shell) now fail with\n"
+                  "  'no such function: quote_text'. Python code can call\n"
+                  "  stoic_terminal.compression.register(conn) first; "
+                  "--undo stores plain text again")
+    except ImportError:
+        print("Compressed storage needs zstandard: pip install zstandard")
+        return 1
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"Database size: {size / 1024:,.0f} KiB -> {db.db_path.stat().st_size / 1024:,.0f} KiB")
+    return 0
+
+
+def cmd_budgeted_search(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Semantic search within the memory budget, else quotes tagged with the query's words"""
+    from .memory import MemoryBudget, budgeted_search
+
+    result = budgeted_search(db, " ".join(args.query), args.limit,
+                             MemoryBudget(args.memory_budget), diversity=args.diversity,
+                             per_author=args.per_author)
+    if result["mode"] == "tags":
+        print(f"Tag-only results ({result['reason']})", file=sys.stderr)
+    if not result["quotes"]:
+        print("No matching quotes found.")
+        return 1
+    for i, quote in enumerate(result["quotes"], 1):
+        print_quote(quote, index=i)
+    return 0
+
+
+def cmd_schedule(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Build or update the quote-of-the-day schedule"""
+    from .schedule import build_schedule, read_schedule, update_schedule
+
+    settings = {name: getattr(args, name) for name in ("days", "window", "seed")
+                if getattr(args, name) is not None}
+    if args.rebuild or args.start or not args.output.exists():
+        result = build_schedule(db, args.output, start=args.start, **settings)
+    else:
+        if settings:
+            flags = ", ".join(f"--{name}" for name in settings)
+            print(f"⚠ {flags} ignored: updating keeps the existing calendar's settings; "
+                  f"add --rebuild to re-plan it with them", file=sys.stderr)
+        result = update_schedule(db, args.output)
+    end = date.fromordinal(result['start'].toordinal() + result['days'] - 1)
+    print(f"Schedule {args.output}: {result['start']} to {end} over {result['count']} quotes "
+          f"({result['planned']} days planned)")
+
+    if args.show:
+        schedule = read_schedule(args.output)
+        first = date.today().toordinal() - schedule['start'].toordinal()
+        ids = schedule['ids'][max(first, 0):max(first, 0) + args.show]
+        quotes = {quote['id']: quote for quote in db.get_quotes_by_ids(ids)}
+        for offset, quote_id in enumerate(ids):
+            day = date.fromordinal(schedule['start'].toordinal() + max(first, 0) + offset)
+            quote = quotes.get(quote_id)
+            if quote:
+                print(f"  {day}  #{quote_id:<6} {quote['author']}: {quote['text'][:50]}")
+    return 0
+
+
+def display_frame(db: QuoteDatabase, args: argparse.Namespace) -> Optional[str]:
+    """Pick a quote per the display options and render it (None if nothing matches)"""
+    history = None
+    federated = not isinstance(db, QuoteDatabase)
+    # History stores 32-bit ids of one database, not corpus-aware ids.
+    # Today's quote is the same all day, so it neither skips nor records.
+    if not args.no_history and not federated and not args.today:
+        # Remember up to half the corpus so small databases still have fresh picks
+        history = ShownHistory(HISTORY_PATH, window=db.max_quote_id() // 2)
+
+    quote = None
+    if args.today:
+        from .schedule import database_identity, scheduled_id
+
+        # Without a schedule for this database covering today this falls back to a random pick
+        quote_id = scheduled_id(SCHEDULE_PATH, database_identity(db))
+        if quote_id is not None:
+            quote = next(iter(db.get_quotes_by_ids([quote_id])), None)
+    if quote is None:
+        if args.author:
+            quote = db.get_random_quote_by_facet("author", args.author, exclude=history)
+        elif args.tradition:
+            quote = db.get_random_quote_by_facet("tradition", args.tradition, exclude=history)
+        else:
+            quote = db.get_random_quote(exclude=history)
+    if not quote:
+        return None
+
+    width = args.width or get_terminal_width()
+    # Federated ids don't index the match table, so those quotes get tag-chosen art
+    fingerprint = None if federated or args.no_art else database_fingerprint(db)
+    loader = ASCIIArtLoader(db_fingerprint=fingerprint)
+    art = None
+    if not args.no_art:
+        selected = loader.get_art_for_quote(quote, width)
+        art = selected[0] if selected else None
+
+    frame = render_quote(quote, art=art, width=width, headers=loader.headers)
+    if history is not None:
+        try:
+            history.record(quote['id'])
+        except OSError:
+            pass  # A read-only home directory must not break the prompt
+    return frame
+
+
+def cmd_display(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Render a random quote with matching ASCII art"""
+    if not isinstance(db, QuoteDatabase) and (args.author or args.tradition or args.today):
+        print("--author, --tradition and --today read a single database; "
+              "drop --with-db to use them.")
+        return 1
+
+    frame = display_frame(db, args)
+    if frame is None:
+        print("No matching quote." if args.author or args.tradition
+              else "The quote database is empty.")
+        return 1
+    print(frame, end="")
+    return 0
+
+
+def refill_command(args: argparse.Namespace) -> List[str]:
+    """`prompt-refill` with this run's database and display options, runnable from any cwd"""
+    executable = Path(sys.argv[0])
+    if executable.name == "stoic-terminal":
+        command = [str(executable.resolve())]
+    else:
+        command = [sys.executable, "-m", "stoic_terminal.cli"]
+
+    command += ["--db", str(Path(args.db).resolve())]
+    for flag in ("no_art", "no_history", "today"):
+        if getattr(args, flag):
+            command.append("--" + flag.replace("_", "-"))
+    for option in ("author", "tradition"):
+        if getattr(args, option):
+            command += ["--" + option, getattr(args, option)]
+    if args.memory_budget:
+        command += ["--memory-budget", f"{args.memory_budget:g}"]
+    return command + ["prompt-refill", "--cache-dir", str(args.cache_dir.resolve())]
+
+
+def cmd_shell_init(args: argparse.Namespace) -> int:
+    """Print the prompt hook snippet for a shell"""
+    from .prompt import shell_init
+
+    print(shell_init(args.shell, refill_command(args), args.cache_dir), end="")
+    return 0
+
+
+def cmd_prompt_refill(args: argparse.Namespace) -> int:
+    """Render the next prompt quote into the cache (run in the background by the hooks)"""
+    from .prompt import detach, refill
+
+    detach()
+
+    def render() -> Optional[str]:
+        # Opened only by the one process that won the lock
+        db = open_database(args.db, read_only=True, low_memory=bool(args.memory_budget))
+        try:
+            return display_frame(db, args)
+        finally:
+            db.close()
+
+    refill(render, args.cache_dir, args.min_interval)
+    return 0
+
+
+def cmd_render(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Render many quotes in one process"""
+    from .batch import BUNDLE_SUFFIX, render_frames, write_bundle, write_directory
+
+    frames = render_frames(db, width=args.width or 80, count=args.count, art=not args.no_art,
+                           seed=args.seed, workers=args.workers)
+    if args.output.suffix == BUNDLE_SUFFIX:
+        count = write_bundle(frames, args.output)
+    else:
+        count = write_directory(frames, args.output)
+    print(f"Rendered {count} quotes to {args.output}")
+    return 0
+
+
+def cmd_serve(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Serve quotes over HTTP until interrupted"""
+    from .server import serve
+
+    # `db` only made sure the schema is current; the server opens its own pool
+    db.close()
+    serve(str(db.db_path), host=args.host, port=args.port, pool_size=args.pool_size,
+          cache_size=args.cache_size)
+    return 0
+
+
+def cmd_build_catalog(db: QuoteDatabase, args: argparse.Namespace) -> int:
+    """Compile the art catalog with pre-rendered headers"""
+    counts = compile_catalog(db, output=args.output,
+                             matches_output=None if args.no_match else args.matches_output)
+    print(f"Compiled {counts['art']} art files and {counts['headers']} headers "
+          f"in {counts['fonts']} fonts to {args.output}")
+    if counts['matches']:
+        print(f"Matched art for {counts['matches']} embedded quotes in {args.matches_output}")
+    return 0
+
+
+def print_build(results: Dict[str, Dict], seconds: float):
+    """One line per target, then the total"""
+    for name, result in results.items():
+        status = result["status"]
+        if status == "built":
+            detail = f"{result['summary']} in {result['seconds']:.2f}s"
+        elif status in ("skipped", "failed"):
+            detail = result["reason"]
+        else:
+            detail = ""
+        changed = result.get("changed")
+        if changed and status in ("built", "stale"):
+            names = [name if name.startswith("db:") else Path(name).name for name in changed]
+            more = f" +{len(names) - 3} more" if len(names) > 3 else ""
+            detail += f"{'; ' if detail else ''}changed: {', '.join(names[:3])}{more}"
+        print(f"  {name:15s} {status:8s} {detail}".rstrip())
+    print(f"Done in {seconds * 1000:.1f}ms")
+
+
+def cmd_build(args: argparse.Namespace) -> int:
+    """Rebuild stale derived artifacts, once or on every change"""
+    try:
+        from .build import build, watch
+    except ImportError:
+        print("The zipapp can't rebuild its artifacts; run `build` from a source install")
+        return 1
+
+    if not Path(args.db).exists():
+        print(f"Database not found: {args.db}")
+        return 1
+    if args.watch:
+        print(f"Watching inputs every {args.interval}s (Ctrl+C to stop)")
+        try:
+            watch(args.db, args.targets, args.jobs, args.interval, report=print_build)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    start = time.perf_counter()
+    results = build(args.db, args.targets, jobs=args.jobs, force=args.force,
+                    dry_run=args.dry_run)
+    print_build(results, time.perf_counter() - start)
+    return 1 if any(result["status"] == "failed" for result in results.values()) else 0
+
+
+def cmd_git_activity(args: argparse.Namespace) -> int:
+    """Fold new commits into the session store and summarize recent activity"""
+    from .git_analyzer import GitSessionStore
+
+    with GitSessionStore(args.store) as store:
+        if not args.no_update:
+            counts = store.update(args.repo)
+            print(f"Read {counts['ingested']} new commits, closed {counts['closed']} sessions")
+        activity = store.activity()
+        stats = store.stats()
+
+    print(f"Last 24h: {activity['commits_24h']} commits; last 7 days: "
+          f"{activity['commits_week']} commits, {activity['lines_week']:,} lines "
+          f"(usual week: {activity['usual_week']:g})")
+    print(f"Intensity: {activity['intensity']}")
+    print(f"Themes: {', '.join(activity['themes']) or '-'}")
+    print(f"Store: {stats['bytes'] / 1024:.0f} KiB ({stats['git_sessions']} sessions, "
+          f"{stats['git_rollups']} rollups)")
+    return 0
+
+
+def open_database(db_path: str, read_only: bool, auto_migrate: bool = True,
+                  low_memory: bool = False) -> QuoteDatabase:
+    """Open the quote database, read-only when possible"""
+    if read_only and Path(db_path).exists():
+        try:
+            return QuoteDatabase(db_path, read_only=True, low_memory=low_memory)
+        except sqlite3.DatabaseError:
+            pass  # Outdated schema: fall through and upgrade it in place
+    return QuoteDatabase(db_path, auto_migrate=auto_migrate, low_memory=low_memory)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point"""
+    argv = sys.argv[1:] if argv is None else argv
+
+    cprofile_path = os.environ.get(profiling.CPROFILE_ENV)
+    if cprofile_path:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(run, argv)
+        finally:
+            profiler.dump_stats(cprofile_path)
+    return run(argv)
+
+
+def run(argv: List[str]) -> int:
+    """Parse arguments and dispatch to a command"""
+    if "--profile" in argv or os.environ.get(profiling.TRACE_ENV):
+        profiling.enable()
+
+    try:
+        with profiling.span("cli.parse_args"):
+            args = build_parser().parse_args(argv)
+        return dispatch(args)
+    finally:
+        profiling.finish(argv, print_tree="--profile" in argv)
+
+
+def dispatch(args: argparse.Namespace) -> int:
+    """Open the database(s) and run the selected command"""
+
+    commands = {
+        "search": cmd_search,
+        "facets": cmd_facets,
+        "export": cmd_export,
+        "import": cmd_import,
+        "migrate": cmd_migrate,
+        "compress": cmd_compress,
+        "embed": cmd_embed,
+        "distill": cmd_distill,
+        "tag": cmd_tag,
+        "render": cmd_render,
+        "serve": cmd_serve,
+        "build-catalog": cmd_build_catalog,
+        "schedule": cmd_schedule,
+    }
+    command = commands.get(args.command, cmd_display)
+
+    if args.with_db and args.command not in FEDERATED_COMMANDS:
+        print(f"--with-db is not supported by `{args.command}`")
+        return 1
+
+    # These open the database themselves, if at all
+    standalone = {
+        "build": cmd_build,
+        "shell-init": cmd_shell_init,
+        "prompt-refill": cmd_prompt_refill,
+        "git-activity": cmd_git_activity,
+    }
+    if args.command in standalone:
+        with profiling.span(f"cli.{args.command}"):
+            return standalone[args.command](args)
+
+    if args.with_db:
+        from .federation import FederatedDatabase
+
+        db = FederatedDatabase([args.db] + args.with_db,
+                               open_member=lambda path: open_database(
+                                   path, read_only=True, low_memory=bool(args.memory_budget)))
+    else:
+        db = open_database(args.db,
+                           read_only=args.command in READ_ONLY_COMMANDS,
+                           auto_migrate=args.command != "migrate",
+                           low_memory=bool(args.memory_budget))
+    try:
+        with profiling.span(f"cli.{args.command or 'display'}"):
+            return command(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Optional zstd-compressed storage for quote text
+
+Quote text, source_context and the JSON tags are short, repetitive strings
+("thou", "thy", the same tag names over and over). One zstd dictionary
+trained on the corpus lets each value compress well on its own. Rows stay
+independently readable and no block has to be inflated to show one quote.
+
+A compressed value is stored as a BLOB holding one zstd frame, whose header
+names the dictionary it needs. Plain values stay TEXT, so compressed and
+uncompressed rows can coexist and a value that wouldn't shrink is left
+alone. Values are decoded only for rows that are actually turned into
+quotes. SQL that needs plain text goes through the `quote_text()` function,
+which every QuoteDatabase connection registers:
+
+- FTS5 reads its content from the `quotes_plain` view
+- the FTS sync triggers index decoded values
+- tag filters compare decoded JSON
+
+Other writers: `quote_text()` exists only on connections that register it.
+Once a database is compressed, any INSERT, UPDATE or DELETE on `quotes`
+fires the FTS triggers. So does an FTS query that reads the view. Both fail
+with "no such function: quote_text" on any other connection, such as the
+sqlite3 shell, a plain `sqlite3.connect()` or another program. Python code
+can call `register(conn)` first. Other tools should write through
+stoic-terminal, or run `stoic-terminal compress --undo` beforehand.
+
+`zstandard` is needed only to write or read a compressed database.
+"""
+
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional
+
+from .migrations import create_fts_index, drop_fts_index
+
+
+COMPRESSED_COLUMNS = ("text", "source_context", "tags")
+SQL_FUNCTION = "quote_text"
+PLAIN_VIEW = "quotes_plain"
+
+DEFAULT_DICT_SIZE = 64 * 1024
+DEFAULT_LEVEL = 12
+TRAINING_SAMPLES = 100_000
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class TextCodec:
+    """Encode/decode column values with a database's zstd dictionaries"""
+
+    def __init__(self, level: int = DEFAULT_LEVEL):
+        self.level = level
+        self.active_id: Optional[int] = None
+        self._dictionaries: Dict[int, object] = {}
+        # zstd (de)compressor objects must not be used by two threads at once
+        self._local = threading.local()
+
+    @property
+    def compressed(self) -> bool:
+        return self.active_id is not None
+
+    def add_dictionary(self, dict_id: int, data: bytes, active: bool = True):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("This quote database stores zstd-compressed text; "
+                              "pip install zstandard to read it") from e
+
+        self._dictionaries[dict_id] = zstandard.ZstdCompressionDict(data)
+        self._local = threading.local()
+        if active:
+            self.active_id = dict_id
+
+    def clear(self):
+        self._dictionaries.clear()
+        self._local = threading.local()
+        self.active_id = None
+
+    def _decompressor(self, dict_id: int):
+        cache = self._local.__dict__.setdefault("decompressors", {})
+        if dict_id not in cache:
+            import zstandard
+
+            cache[dict_id] = zstandard.ZstdDecompressor(dict_data=self._dictionaries[dict_id])
+        return cache[dict_id]
+
+    def _compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            import zstandard
+
+            compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=self._dictionaries[self.active_id],
+                write_checksum=False, write_content_size=True, write_dict_id=True,
+            )
+            self._local.compressor = compressor
+        return compressor
+
+    def decode(self, value):
+        """Plain text for a stored value (TEXT and NULL pass through)"""
+        if not isinstance(value, bytes):
+            return value
+        import zstandard
+
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+        return self._decompressor(dict_id).decompress(value).decode("utf-8")
+
+    def encode(self, value):
+        """Stored form of a value: a zstd frame if that is smaller, else the plain text"""
+        if value is None:
+            return value
+        text = self.decode(value)
+        if not self.compressed:
+            return text
+        data = text.encode("utf-8")
+        frame = self._compressor().compress(data)
+        return frame if len(frame) < len(data) else text
+
+
+def load_dictionaries(conn: sqlite3.Connection, codec: TextCodec):
+    """Load a database's dictionaries into `codec` (nothing for uncompressed files)"""
+    codec.clear()
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                       "AND name = 'text_dictionaries'").fetchone()
+    if not row:
+        return
+    for dict_id, data, active in conn.execute(
+        "SELECT dict_id, dictionary, active FROM text_dictionaries ORDER BY rowid"
+    ):
+        codec.add_dictionary(dict_id, data, active=bool(active))
+
+
+def register(conn: sqlite3.Connection) -> TextCodec:
+    """
+    Make a plain sqlite3 connection able to use a compressed database: load
+    its dictionaries and register quote_text(), which the FTS triggers call
+    """
+    codec = TextCodec()
+    load_dictionaries(conn, codec)
+    conn.create_function(SQL_FUNCTION, 1, codec.decode, deterministic=True)
+    return codec
+
+
+def plain_sql(column: str, codec: TextCodec) -> str:
+    """SQL expression for a column's plain value"""
+    if codec.compressed and column in COMPRESSED_COLUMNS:
+        return f"{SQL_FUNCTION}({column})"
+    return column
+
+
+def train_dictionary(conn: sqlite3.Connection,
+                     dict_size: int = DEFAULT_DICT_SIZE,
+                     level: int = DEFAULT_LEVEL,
+                     samples: int = TRAINING_SAMPLES) -> bytes:
+    """Train a zstd dictionary on (a sample of) the corpus' compressible values"""
+    import zstandard
+
+    columns = ", ".join(f"{SQL_FUNCTION}({column})" for column in COMPRESSED_COLUMNS)
+    rows = conn.execute(f"""
+        SELECT {columns} FROM quotes
+        ORDER BY (id * 2654435761) % 4294967296 LIMIT ?
+    """, (samples,)).fetchall()
+    values = [value.encode("utf-8") for row in rows for value in row if value]
+    # zstd's trainer wants the samples to be many times the dictionary size
+    dict_size = min(dict_size, max(sum(map(len, values)) // 20, 1024))
+    try:
+        return zstandard.train_dictionary(dict_size, values, level=level).as_bytes()
+    except zstandard.ZstdError as e:
+        raise ValueError(f"Not enough quote text to train a dictionary ({e})") from e
+
+
+def _rewrite_rows(conn: sqlite3.Connection,
+                  codec: TextCodec,
+                  chunk_size: int,
+                  progress: Optional[Callable[[int], None]]) -> int:
+    """Re-encode every compressible value with `codec`, one transaction per chunk"""
+    columns = ", ".join(COMPRESSED_COLUMNS)
+    assignments = ", ".join(f"{column} = ?" for column in COMPRESSED_COLUMNS)
+    last_id, changed = 0, 0
+    while True:
+        rows = conn.execute(f"SELECT id, {columns} FROM quotes WHERE id > ? ORDER BY id LIMIT ?",
+                            (last_id, chunk_size)).fetchall()
+        if not rows:
+            return changed
+
+        updates = []
+        for quote_id, *values in rows:
+            encoded = [codec.encode(value) for value in values]
+            if encoded != values:
+                updates.append((*encoded, quote_id))
+        with conn:
+            conn.executemany(f"UPDATE quotes SET {assignments} WHERE id = ?", updates)
+        changed += len(updates)
+        last_id = rows[-1][0]
+        if progress:
+            progress(last_id)
+
+
+def compress_database(conn: sqlite3.Connection,
+                      codec: TextCodec,
+                      dict_size: int = DEFAULT_DICT_SIZE,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      vacuum: bool = True,
+                      progress: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+    """
+    Train a dictionary, switch FTS to the decoding view and compress every row.
+
+    Re-running it retrains and re-compresses (older dictionaries are kept
+    for rows that still use them). An interrupted run leaves a mix of
+    compressed and plain rows, which reads correctly; running it again
+    finishes the job.
+    """
+    import zstandard
+
+    data = train_dictionary(conn, dict_size, codec.level)
+    dict_id = zstandard.ZstdCompressionDict(data).dict_id()
+
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS text_dictionaries (
+                dict_id INTEGER PRIMARY KEY,
+                dictionary BLOB NOT NULL,
+                active INTEGER NOT NULL DEFAULT 0,
+                created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("UPDATE text_dictionaries SET active = 0")
+        conn.execute("INSERT OR REPLACE INTO text_dictionaries (dict_id, dictionary, active) "
+                     "VALUES (?, ?, 1)", (dict_id, data))
+
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            CREATE VIEW IF NOT EXISTS {PLAIN_VIEW} AS
+            SELECT id, {SQL_FUNCTION}(text) AS text, author, source,
+                   {SQL_FUNCTION}(source_context) AS source_context
+            FROM quotes
+        """)
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'quotes_fts'")
+        row = cursor.fetchone()
+        if row is None or PLAIN_VIEW not in row[0]:
+            drop_fts_index(cursor)
+            create_fts_index(cursor, content=PLAIN_VIEW, decode=SQL_FUNCTION)
+    load_dictionaries(conn, codec)
+
+    changed = _rewrite_rows(conn, codec, chunk_size, progress)
+    if vacuum:
+        conn.execute("VACUUM")
+    return {"dict_id": dict_id, "dict_bytes": len(data), "rows": changed}
+
+
+def decompress_database(conn: sqlite3.Connection,
+                        codec: TextCodec,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        vacuum: bool = True,
+                        progress: Optional[Callable[[int], None]] = None) -> int:
+    """Store every value as plain text again and restore the plain FTS setup"""
+    active_id = codec.active_id
+    codec.active_id = None  # encode() now returns decoded text
+    try:
+        changed = _rewrite_rows(conn, codec, chunk_size, progress)
+    except BaseException:
+        codec.active_id = active_id
+        raise
+
+    with conn:
+        conn.execute("BEGIN")
+        cursor = conn.cursor()
+        drop_fts_index(cursor)
+        create_fts_index(cursor)
+        cursor.execute(f"DROP VIEW IF EXISTS {PLAIN_VIEW}")
+        cursor.execute("DROP TABLE IF EXISTS text_dictionaries")
+    codec.clear()
+
+    if vacuum:
+        conn.execute("VACUUM")
+    return changed
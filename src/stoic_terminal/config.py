@@ -0,0 +1,87 @@
+"""
+Configuration defaults for Stoic Terminal
+"""
+
+import os
+from pathlib import Path
+
+
+# Bundled data lives next to the package in a source checkout
+DATA_DIR = Path(os.environ.get(
+    "STOIC_TERMINAL_DATA", Path(__file__).resolve().parents[2] / "data"
+))
+
+# Database location; override with STOIC_TERMINAL_DB
+DEFAULT_DB_PATH = os.environ.get("STOIC_TERMINAL_DB", "quotes_v1.db")
+
+# A database file nothing writes to, opened without locks (the zipapp's extracted copy)
+STATIC_DB_PATH = os.environ.get("STOIC_TERMINAL_STATIC_DB")
+
+# Curated ASCII art and its metadata.yaml catalog
+ART_DIR = DATA_DIR / "ascii_art"
+
+# Pre-built art metadata, art text and figlet headers (`stoic-terminal build-catalog`)
+ART_CATALOG_PATH = DATA_DIR / "art_catalog.json"
+
+# Precomputed best art pieces per quote id, built alongside the catalog
+ART_MATCHES_PATH = DATA_DIR / "art_matches.bin"
+
+# Quote-of-the-day calendar shared by every terminal (`stoic-terminal schedule`)
+SCHEDULE_PATH = DATA_DIR / "schedule.bin"
+
+# Input hashes and per-artifact input digests of the last `stoic-terminal build`
+BUILD_STATE_PATH = DATA_DIR / "build_state.json"
+
+# Single-file zipapp with bytecode and data embedded (`stoic-terminal build zipapp`)
+BUNDLE_PATH = DATA_DIR.parent / "dist" / "stoic-terminal.pyz"
+
+# Project Gutenberg texts the bundled quotes were taken from
+GUTENBERG_DIR = DATA_DIR / "gutenberg_sources"
+
+# Quote embeddings as one flat file, scanned block by block in low-memory mode
+# (`stoic-terminal build vectors`)
+VECTORS_PATH = DATA_DIR / "vectors.bin"
+
+# Torch-free static token table for query encoding (`stoic-terminal distill`)
+STATIC_ENCODER_DIR = DATA_DIR / "static_encoder"
+
+# Query encoder for semantic search: "full" (MiniLM via sentence-transformers),
+# "static" (the table above) or "auto" (full when installed, else static)
+QUERY_ENCODER = os.environ.get("STOIC_TERMINAL_ENCODER", "auto")
+
+# Low-memory mode: resident memory budget in MiB, 0 for none; override with
+# STOIC_TERMINAL_MEMORY_MB or --memory-budget
+MEMORY_BUDGET_MB = int(os.environ.get("STOIC_TERMINAL_MEMORY_MB") or 0)
+
+# Per-user state (display history); override with STOIC_TERMINAL_STATE
+STATE_DIR = Path(os.environ.get(
+    "STOIC_TERMINAL_STATE",
+    Path(os.environ.get("XDG_STATE_HOME", Path.home() / ".local" / "state")) / "stoic-terminal"
+))
+
+# Append-only log of recently shown quote ids
+HISTORY_PATH = STATE_DIR / "history.bin"
+
+# Pre-rendered quote for the shell-prompt hooks (`stoic-terminal shell-init`)
+PROMPT_CACHE_DIR = STATE_DIR / "prompt"
+
+# Git sessions and their hourly/daily rollups (`stoic-terminal git-activity`)
+GIT_SESSIONS_PATH = STATE_DIR / "git_sessions.db"
+
+# Command defaults the CLI parser shows, kept here so building it imports no
+# command modules. `build` target names, in build.TARGETS order:
+BUILD_TARGETS = ("embeddings", "tags", "catalog", "art-matches", "schedule", "static-encoder",
+                 "vectors", "line-indexes", "zipapp")
+
+# Shells `stoic-terminal shell-init` has hooks for; a prompt refill within
+# this many seconds of the last one is skipped
+PROMPT_SHELLS = ("bash", "zsh", "fish")
+PROMPT_MIN_INTERVAL = 2.0
+
+# Quote-of-the-day calendar length and no-repeat window, in days
+SCHEDULE_DAYS = 366
+SCHEDULE_WINDOW = 365
+
+# Rows per export/import batch, and per migration backfill transaction
+TRANSFER_BATCH_SIZE = 5000
+MIGRATION_CHUNK_SIZE = 1000
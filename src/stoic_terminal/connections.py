@@ -0,0 +1,104 @@
+"""
+Connection management for multi-threaded use of one quote database
+
+sqlite3 connections must not be shared between threads mid-use, so a
+threaded QuoteDatabase gives every thread its own connection (opened on
+first use, closed when the database is closed or the thread has exited).
+Under WAL those readers never block each other or the writer.
+
+Writes all go through one SerializedWriter: a single thread owning the
+only write connection, running submitted operations in order. Writers
+therefore never race for the lock (the source of "database is locked"
+when several connections try to upgrade read transactions at once).
+"""
+
+import queue
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    # Imported where futures are made: concurrent.futures pulls in logging, and
+    # every launch imports this module while only threaded databases write here
+    from concurrent.futures import Future
+
+
+T = TypeVar("T")
+
+
+class ThreadConnections:
+    """One connection per thread, all closable from any thread"""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection]):
+        self._connect = connect
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+
+    def get(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._prune()
+                self._open[id(threading.current_thread())] = (threading.current_thread(), conn)
+        return conn
+
+    def _prune(self):
+        """Close connections of threads that have exited (thread-per-request servers)"""
+        for key, (thread, conn) in list(self._open.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._open[key]
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def close_all(self):
+        with self._lock:
+            for _, conn in self._open.values():
+                conn.close()
+            self._open.clear()
+        self._local = threading.local()
+
+
+class SerializedWriter:
+    """A single writer thread; operations run one at a time in submission order"""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], name: str = "quote-db-writer"):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, args=(connect,), name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self, connect: Callable[[], sqlite3.Connection]):
+        conn = connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                operation, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(operation(conn))
+                except BaseException as e:  # Delivered to the submitting thread
+                    conn.rollback()
+                    future.set_exception(e)
+        finally:
+            conn.close()
+
+    def submit(self, operation: Callable[[sqlite3.Connection], T]) -> "Future[T]":
+        """Queue `operation(conn)`; the future resolves once it has committed"""
+        from concurrent.futures import Future
+
+        future: "Future[T]" = Future()
+        self._queue.put((operation, future))
+        return future
+
+    def close(self):
+        """Finish queued writes, then stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join()
@@ -0,0 +1,594 @@
+"""
+SQLite abstraction layer for the philosophical quote database
+"""
+
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Container, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from .authors import lookup_keys, resolve_author_id
+from .compression import COMPRESSED_COLUMNS, SQL_FUNCTION, TextCodec, load_dictionaries, plain_sql
+from .config import STATIC_DB_PATH
+from .connections import SerializedWriter, ThreadConnections
+from .migrations import FACET_COLUMNS, SCHEMA_VERSION, content_hash, get_schema_version, migrate
+from .profiling import span
+
+
+# Read-only tuning: map the whole bundled corpus, keep a modest page cache
+READ_ONLY_MMAP_SIZE = 256 * 1024 * 1024
+READ_ONLY_CACHE_KIB = 8 * 1024
+
+# Low-memory mode: a small page cache and no mmap, whose pages would count as resident
+LOW_MEMORY_CACHE_KIB = 1024
+
+# Rows fetched per round trip by the streaming (iter_*) queries
+STREAM_BATCH_SIZE = 256
+
+# How long a read-write connection waits for a lock before "database is locked"
+BUSY_TIMEOUT_S = 10.0
+
+# Random picks drawn per query when some quotes should be skipped
+RANDOM_CANDIDATES = 8
+
+T = TypeVar("T")
+
+
+class QuoteDatabase:
+    """SQLite database abstraction for philosophical quotes"""
+
+    def __init__(self,
+                 db_path: str = "quotes_v1.db",
+                 read_only: bool = False,
+                 auto_migrate: bool = True,
+                 check_same_thread: bool = True,
+                 threaded: bool = False,
+                 low_memory: bool = False):
+        """
+        `threaded=True` makes one instance safe to share between threads:
+        every thread reads through its own connection (WAL mode for
+        read-write files) and all writes are queued to a single writer
+        thread. Otherwise there is one connection, as before.
+
+        `low_memory=True` caps SQLite's page cache at LOW_MEMORY_CACHE_KIB
+        and turns mmap off (see `memory`).
+        """
+        self.db_path = Path(db_path)
+        self.read_only = read_only
+        # False lets a pool hand the connection to other threads, one at a time
+        self.check_same_thread = check_same_thread and not threaded
+        self.threaded = threaded
+        self.low_memory = low_memory
+        self._conn = None
+        self._connections = ThreadConnections(self._connect) if threaded else None
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        # Dictionaries for compressed text, shared by every connection's quote_text()
+        self.codec = TextCodec()
+        with span("db.open"):
+            if read_only:
+                self._open_read_only()
+            else:
+                self._init_database(auto_migrate)
+            load_dictionaries(self.conn, self.codec)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The calling thread's connection"""
+        if self._connections is not None:
+            return self._connections.get()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure one connection for this database"""
+        if self.read_only:
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            if self._is_static():
+                uri += "&immutable=1"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=self.check_same_thread)
+            conn.execute("PRAGMA query_only = ON")
+            if not self.low_memory:
+                conn.execute(f"PRAGMA mmap_size = {READ_ONLY_MMAP_SIZE}")
+                conn.execute(f"PRAGMA cache_size = -{READ_ONLY_CACHE_KIB}")
+        else:
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=self.check_same_thread,
+                                   timeout=BUSY_TIMEOUT_S)
+            if self.threaded:
+                # Readers and the writer never block each other under WAL
+                conn.execute("PRAGMA journal_mode = WAL")
+        if self.low_memory:
+            conn.execute("PRAGMA mmap_size = 0")
+            conn.execute(f"PRAGMA cache_size = -{LOW_MEMORY_CACHE_KIB}")
+        conn.create_function(SQL_FUNCTION, 1, self.codec.decode, deterministic=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _is_static(self) -> bool:
+        """
+        Whether nothing can write the file while it is open: we may not write
+        it ourselves (a read-only install), or it is the zipapp's extracted
+        copy. Only then is it opened immutable; SQLite would otherwise miss
+        writes still in another process's WAL.
+        """
+        path = self.db_path.resolve()
+        if STATIC_DB_PATH and path == Path(STATIC_DB_PATH).resolve():
+            return True
+        return not os.access(path, os.W_OK)
+
+    def _open_read_only(self):
+        """
+        Open the database as a query-only file.
+
+        No schema DDL runs. Static files (see `_is_static`) are opened
+        immutable, so SQLite takes no locks and any number of shells share
+        one bundled corpus. Any other file gets a plain read-only connection,
+        which honours locks and the WAL of a concurrent writer.
+        """
+        if self._connections is None:
+            self._conn = self._connect()
+
+        version = self.schema_version()
+        if version < SCHEMA_VERSION:
+            self.close()
+            raise sqlite3.DatabaseError(
+                f"{self.db_path} has schema version {version}, expected {SCHEMA_VERSION}; "
+                "open it read-write once to upgrade it"
+            )
+
+    def schema_version(self) -> int:
+        """Return the schema version recorded in PRAGMA user_version"""
+        return get_schema_version(self.conn)
+
+    def _init_database(self, auto_migrate: bool = True):
+        """Open the database and bring its schema up to date"""
+        if self._connections is None:
+            self._conn = self._connect()
+
+        # Schema is already current: skip the DDL and the write lock it takes
+        if not auto_migrate or self.schema_version() >= SCHEMA_VERSION:
+            return
+
+        with span("db.migrate"):
+            migrate(self.conn)
+
+    def _write(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        """Run a write; in threaded mode it is queued to the single writer thread"""
+        if not self.threaded:
+            return operation(self.conn)
+
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = SerializedWriter(self._connect)
+        return self._writer.submit(operation).result()
+
+    def __enter__(self) -> "QuoteDatabase":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def compressed(self) -> bool:
+        """Whether new text is stored zstd-compressed (see `compression`)"""
+        return self.codec.compressed
+
+    def _row_to_quote(self, row: sqlite3.Row) -> Dict:
+        """Convert a database row to a quote dict with plain text and decoded tags"""
+        quote = dict(row)
+        for column in COMPRESSED_COLUMNS:
+            if column in quote:
+                quote[column] = self.codec.decode(quote[column])
+        quote['tags'] = json.loads(quote['tags']) if quote['tags'] else []
+        return quote
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Turn free-form keywords into an FTS5 query of quoted terms (implicit AND)"""
+        terms = re.findall(r"\w+", query)
+        return " ".join(f'"{term}"' for term in terms)
+
+    def add_quote(self,
+                  text: str,
+                  author: str,
+                  source: Optional[str] = None,
+                  source_context: Optional[str] = None,
+                  source_year: Optional[int] = None,
+                  translator: Optional[str] = None,
+                  tradition: Optional[str] = None,
+                  tags: Optional[List[str]] = None,
+                  copyright_status: str = 'public_domain') -> int:
+        """Add a quote to the database"""
+
+        # Determine length category
+        length = len(text)
+        if length <= 150:
+            length_category = 'bite-sized'
+        elif length <= 400:
+            length_category = 'medium'
+        else:
+            length_category = 'extended'
+
+        # Convert tags to JSON
+        tags_json = json.dumps(tags) if tags else json.dumps([])
+
+        def insert(conn: sqlite3.Connection) -> int:
+            cursor = conn.cursor()
+            author_id = resolve_author_id(cursor, author)
+            cursor.execute("""
+                INSERT INTO quotes (
+                    text, author, source, source_context, source_year,
+                    translator, length_category, tradition, tags, copyright_status,
+                    content_hash, author_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (self.codec.encode(text), author, source, self.codec.encode(source_context),
+                  source_year, translator, length_category, tradition,
+                  self.codec.encode(tags_json), copyright_status,
+                  content_hash(text, author), author_id))
+
+            conn.commit()
+            return cursor.lastrowid
+
+        return self._write(insert)
+
+    def insert_quote_rows(self, rows: Iterable[Dict]) -> int:
+        """
+        Bulk-insert raw quote rows (tags already JSON-encoded) in one transaction.
+
+        Keys that aren't columns of the quotes table are ignored. Returns the
+        number of rows inserted.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        for row in rows:
+            if not row.get("content_hash"):
+                row["content_hash"] = content_hash(row["text"], row["author"])
+
+        def insert(conn: sqlite3.Connection) -> int:
+            cursor = conn.cursor()
+            # Ids from another database (e.g. an export) don't apply here
+            authors = {}
+            for row in rows:
+                row["author_id"] = resolve_author_id(cursor, row["author"], authors)
+                for column in COMPRESSED_COLUMNS:
+                    if column in row:
+                        row[column] = self.codec.encode(row[column])
+
+            cursor.execute("PRAGMA table_info(quotes)")
+            table_columns = [info[1] for info in cursor.fetchall()]
+            present = set().union(*(row.keys() for row in rows))
+            columns = [column for column in table_columns if column in present]
+
+            placeholders = ", ".join("?" for _ in columns)
+            cursor.executemany(
+                f"INSERT INTO quotes ({', '.join(columns)}) VALUES ({placeholders})",
+                ([row.get(column) for column in columns] for row in rows)
+            )
+            conn.commit()
+            return len(rows)
+
+        return self._write(insert)
+
+    def iter_quote_batches(self, batch_size: int = 1000) -> Iterator[List[sqlite3.Row]]:
+        """Stream raw quote rows (plain text) in id order, `batch_size` rows at a time"""
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT {self._plain_columns()} FROM quotes ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+    def _plain_columns(self) -> str:
+        """Select list of every quotes column, compressed ones decoded in SQL"""
+        if not self.compressed:
+            return "*"
+        cursor = self.conn.execute("PRAGMA table_info(quotes)")
+        return ", ".join(
+            f"{plain_sql(info[1], self.codec)} AS {info[1]}" for info in cursor.fetchall()
+        )
+
+    def iter_quotes(self, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """Stream quote dicts in id order, `batch_size` at a time"""
+        for rows in self.iter_quote_batches(batch_size):
+            yield [self._row_to_quote(row) for row in rows]
+
+    def sample_quote_ids(self, count: int, seed: int = 0) -> List[int]:
+        """`count` quote ids in a pseudo-random order that is stable for a seed"""
+        cursor = self.conn.cursor()
+        # Multiplicative hash of the id; SQLite keeps only the top `count` while sorting
+        cursor.execute("""
+            SELECT id FROM quotes
+            ORDER BY ((id + ?) * 2654435761) % 4294967296
+            LIMIT ?
+        """, (seed, count))
+        return [row[0] for row in cursor.fetchall()]
+
+    def iter_embeddings(self, batch_size: int = 5000) -> Iterator[List[sqlite3.Row]]:
+        """Stream (id, author, source, embedding) for every embedded quote"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT id, author, source, embedding FROM quotes
+            WHERE embedding IS NOT NULL ORDER BY id
+        """)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+    def get_unembedded_quotes(self, limit: int = 256) -> List[Tuple[int, str]]:
+        """(id, text) of quotes still missing an embedding"""
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT id, {plain_sql('text', self.codec)} FROM quotes "
+                       "WHERE embedding IS NULL ORDER BY id LIMIT ?", (limit,))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def update_embeddings(self, pairs: Iterable[Tuple[bytes, int]]) -> None:
+        """Store (embedding_blob, quote_id) pairs in one transaction"""
+        pairs = list(pairs)
+
+        def update(conn: sqlite3.Connection):
+            with conn:
+                conn.executemany("UPDATE quotes SET embedding = ? WHERE id = ?", pairs)
+
+        self._write(update)
+
+    def get_quotes_for_tagging(self,
+                               after_id: int = 0,
+                               limit: int = 1000,
+                               only_untagged: bool = True) -> List[Tuple[int, str, Optional[bytes]]]:
+        """(id, text, embedding) of quotes after `after_id`, optionally only untagged ones"""
+        tags = plain_sql('tags', self.codec)
+        untagged = f"AND (tags IS NULL OR {tags} = '[]')" if only_untagged else ""
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT id, {plain_sql('text', self.codec)}, embedding FROM quotes
+            WHERE id > ? {untagged}
+            ORDER BY id LIMIT ?
+        """, (after_id, limit))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def update_tags(self, pairs: Iterable[Tuple[List[str], int]]) -> None:
+        """Store (tags, quote_id) pairs in one transaction"""
+        encoded = [(self.codec.encode(json.dumps(tags)), quote_id) for tags, quote_id in pairs]
+
+        def update(conn: sqlite3.Connection):
+            with conn:
+                conn.executemany("UPDATE quotes SET tags = ? WHERE id = ?", encoded)
+
+        self._write(update)
+
+    def get_quotes_by_ids(self, ids: List[int]) -> List[Dict]:
+        """Fetch quotes by id, in the order given"""
+        if not ids:
+            return []
+        cursor = self.conn.cursor()
+        placeholders = ", ".join("?" for _ in ids)
+        cursor.execute(f"SELECT * FROM quotes WHERE id IN ({placeholders})", ids)
+        by_id = {row['id']: self._row_to_quote(row) for row in cursor.fetchall()}
+        return [by_id[quote_id] for quote_id in ids if quote_id in by_id]
+
+    def _stream(self, cursor: sqlite3.Cursor) -> Iterator[Dict]:
+        """Quote dicts from an executed query, one at a time"""
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_to_quote(row)
+
+    def iter_all_quotes(self) -> Iterator[Dict]:
+        """Stream every quote, newest first, without holding them all"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT * FROM quotes ORDER BY date_added DESC")
+        return self._stream(cursor)
+
+    def get_all_quotes(self) -> List[Dict]:
+        """Retrieve all quotes"""
+        return list(self.iter_all_quotes())
+
+    def _tag_condition(self, tags: List[str], match_mode: str) -> Tuple[str, List[str]]:
+        """WHERE clause and parameters matching any or all of `tags`"""
+        column = plain_sql('tags', self.codec)
+        joiner = " OR " if match_mode == 'any' else " AND "
+        conditions = joiner.join([f"{column} LIKE ?" for _ in tags])
+        return conditions, [f'%"{tag}"%' for tag in tags]
+
+    def iter_search_by_tags(self, tags: List[str], match_mode: str = 'any') -> Iterator[Dict]:
+        """Stream quotes with any (or all) of `tags`"""
+        conditions, params = self._tag_condition(tags, match_mode)
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT * FROM quotes WHERE {conditions}", params)
+        return self._stream(cursor)
+
+    def search_by_tags(self, tags: List[str], match_mode: str = 'any') -> List[Dict]:
+        """Search quotes by tags"""
+        with span("db.search_by_tags"):
+            return list(self.iter_search_by_tags(tags, match_mode))
+
+    def count_by_tags(self, tags: List[str], match_mode: str = 'any') -> int:
+        """Number of quotes with any (or all) of `tags`, without decoding them"""
+        conditions, params = self._tag_condition(tags, match_mode)
+        cursor = self.conn.cursor()
+        with span("db.count_by_tags"):
+            cursor.execute(f"SELECT COUNT(*) FROM quotes WHERE {conditions}", params)
+            return cursor.fetchone()[0]
+
+    def get_random_quote_by_tags(self,
+                                 tags: List[str],
+                                 match_mode: str = 'any',
+                                 exclude: Optional[Container[int]] = None) -> Optional[Dict]:
+        """Random quote with the tags; SQLite keeps only a few candidates while it scans"""
+        conditions, params = self._tag_condition(tags, match_mode)
+        cursor = self.conn.cursor()
+        with span("db.get_random_quote_by_tags"):
+            limit = RANDOM_CANDIDATES if exclude else 1
+            cursor.execute(f"SELECT * FROM quotes WHERE {conditions} ORDER BY RANDOM() LIMIT ?",
+                           params + [limit])
+            rows = cursor.fetchall()
+
+        if not rows:
+            return None
+        if exclude:
+            rows = [row for row in rows if row['id'] not in exclude] or rows
+        return self._row_to_quote(rows[0])
+
+    def search_text(self,
+                    query: str,
+                    limit: int = 10,
+                    highlight: Tuple[str, str] = ('[', ']')) -> List[Dict]:
+        """
+        Full-text search over quote text, author, source and source context.
+
+        Results are ordered by BM25 relevance (best first). Each quote dict gets
+        a `rank` score and a `snippet` of its best-matching column (text,
+        author, source or context) with the matched terms wrapped in the
+        `highlight` markers.
+        """
+        match = self._fts_query(query)
+        if not match:
+            return []
+
+        open_mark, close_mark = highlight
+        cursor = self.conn.cursor()
+        # Rank and limit inside the FTS table first so only `limit` quote rows are fetched
+        with span("db.search_text"):
+            cursor.execute("""
+                SELECT q.*, hits.rank AS rank, hits.snippet AS snippet
+                FROM (
+                    SELECT rowid, rank, snippet(quotes_fts, -1, ?, ?, '…', 24) AS snippet
+                    FROM quotes_fts
+                    WHERE quotes_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ) AS hits
+                JOIN quotes q ON q.id = hits.rowid
+                ORDER BY hits.rank
+            """, (open_mark, close_mark, match, limit))
+            return [self._row_to_quote(row) for row in cursor.fetchall()]
+
+    def get_random_quote(self, exclude: Optional[Container[int]] = None) -> Optional[Dict]:
+        """Get a random quote, avoiding ids in `exclude` (e.g. recently shown) if possible"""
+        cursor = self.conn.cursor()
+        with span("db.get_random_quote"):
+            # The same single scan yields a few candidates instead of one
+            limit = RANDOM_CANDIDATES if exclude else 1
+            cursor.execute("SELECT * FROM quotes ORDER BY RANDOM() LIMIT ?", (limit,))
+            rows = cursor.fetchall()
+
+        if not rows:
+            return None
+        if exclude:
+            # Repeat a quote only when every candidate was excluded
+            rows = [row for row in rows if row['id'] not in exclude] or rows
+        return self._row_to_quote(rows[0])
+
+    def get_author(self, name: str) -> Optional[Dict]:
+        """Canonical author (id, name) for any known spelling"""
+        cursor = self.conn.cursor()
+        for key in lookup_keys(name):
+            cursor.execute("""
+                SELECT authors.id, authors.name FROM author_aliases
+                JOIN authors ON authors.id = author_aliases.author_id
+                WHERE alias_key = ?
+            """, (key,))
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+        return None
+
+    def facet_counts(self, facet: str) -> List[Tuple[str, int]]:
+        """(value, quote count) for a facet, largest first, from the maintained counts"""
+        if facet not in FACET_COLUMNS:
+            raise ValueError(f"Unknown facet {facet!r}; expected one of {sorted(FACET_COLUMNS)}")
+
+        cursor = self.conn.cursor()
+        if facet == "author":
+            cursor.execute("""
+                SELECT authors.name, facet_counts.count FROM facet_counts
+                JOIN authors ON authors.id = facet_counts.value
+                WHERE facet = 'author' ORDER BY count DESC, authors.name
+            """)
+        else:
+            cursor.execute("SELECT value, count FROM facet_counts WHERE facet = ? "
+                           "ORDER BY count DESC, value", (facet,))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def get_random_quote_by_facet(self,
+                                  facet: str,
+                                  value: str,
+                                  exclude: Optional[Container[int]] = None) -> Optional[Dict]:
+        """
+        Random quote with one facet value (author by any spelling, tradition or
+        length category), avoiding ids in `exclude` if possible.
+
+        The facet count is a primary-key lookup. Each quote holds a dense
+        position 0..count-1 within its facet value (`facet_positions`, kept
+        up to date by triggers), so a pick is one more primary-key lookup
+        however many quotes share the value.
+        """
+        if facet not in FACET_COLUMNS:
+            raise ValueError(f"Unknown facet {facet!r}; expected one of {sorted(FACET_COLUMNS)}")
+
+        if facet == "author":
+            author = self.get_author(value)
+            if not author:
+                return None
+            value = author["id"]
+
+        cursor = self.conn.cursor()
+        with span("db.get_random_quote_by_facet"):
+            cursor.execute("SELECT count FROM facet_counts WHERE facet = ? AND value = ?",
+                           (facet, value))
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            count = row[0]
+            positions = random.sample(range(count), min(RANDOM_CANDIDATES if exclude else 1, count))
+            cursor.execute(f"""
+                SELECT quotes.* FROM facet_positions
+                JOIN quotes ON quotes.id = facet_positions.quote_id
+                WHERE facet = ? AND value = ? AND position IN ({",".join("?" * len(positions))})
+            """, [facet, value] + positions)
+            rows = cursor.fetchall()
+
+        if not rows:
+            return None
+        if exclude:
+            random.shuffle(rows)  # They come back in position order
+            # Repeat a quote only when every candidate was excluded
+            rows = [row for row in rows if row['id'] not in exclude] or rows
+        return self._row_to_quote(rows[0])
+
+    def max_quote_id(self) -> int:
+        """Largest quote id (an O(1) rowid lookup, unlike COUNT(*))"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT MAX(id) FROM quotes")
+        return cursor.fetchone()[0] or 0
+
+    def count_quotes(self) -> int:
+        """
+        Count total quotes in database. Every quote has an author, so the
+        trigger-maintained author counts add up to the total without a scan.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT TOTAL(count) FROM facet_counts WHERE facet = 'author'")
+        return int(cursor.fetchone()[0])
+
+    def close(self):
+        """Close database connection(s), after any queued writes finish"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._connections is not None:
+            self._connections.close_all()
+        elif self._conn:
+            self._conn.close()
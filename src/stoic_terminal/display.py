@@ -0,0 +1,101 @@
+"""
+Display orchestration: art + figlet header + wrapped quote text
+"""
+
+import textwrap
+from typing import Dict, Optional
+
+from .profiling import span
+
+
+# Responsive breakpoints (terminal columns)
+TEXT_ONLY_BELOW = 40
+HEADER_FROM = 80
+
+# Keep quote text to a comfortable reading measure on wide terminals
+MAX_TEXT_WIDTH = 76
+
+HEADER_FONT = "small"
+
+# Fonts headers may use, and the widths they are pre-rendered for in the
+# compiled catalog (a header is laid out for the widest bucket that fits)
+HEADER_FONTS = ("small", "slant")
+HEADER_WIDTH_BUCKETS = (80, 100, 120)
+
+
+def header_bucket(width: int) -> int:
+    """Widest header layout width that fits in a terminal of `width` columns"""
+    fitting = [bucket for bucket in HEADER_WIDTH_BUCKETS if bucket <= width]
+    return fitting[-1] if fitting else HEADER_WIDTH_BUCKETS[0]
+
+
+def lookup_header(headers: Optional[Dict], text: str, width: int, font: str) -> Optional[str]:
+    """Find a pre-rendered header in the catalog's header table"""
+    if not headers:
+        return None
+
+    rendered = headers.get(font, {}).get(text)
+    if isinstance(rendered, dict):
+        return rendered.get(str(header_bucket(width)))
+    return rendered
+
+
+def render_header(text: str,
+                  width: int,
+                  font: str = HEADER_FONT,
+                  headers: Optional[Dict] = None) -> str:
+    """Return a figlet banner, from the pre-rendered table when possible"""
+    cached = lookup_header(headers, text, width, font)
+    if cached is not None:
+        return cached
+
+    # Cache miss: pyfiglet is imported lazily; loading it and a font is slow
+    with span("display.figlet"):
+        from pyfiglet import Figlet
+
+        return Figlet(font=font, width=header_bucket(width)).renderText(text).rstrip("\n")
+
+
+def format_attribution(quote: Dict) -> str:
+    """Build the '— Author, Source (context)' line"""
+    attribution = f"— {quote['author']}"
+    if quote.get('source'):
+        attribution += f", {quote['source']}"
+    if quote.get('source_context'):
+        attribution += f" ({quote['source_context']})"
+    return attribution
+
+
+def render_quote(quote: Dict,
+                 art: Optional[str] = None,
+                 width: int = 80,
+                 headers: Optional[Dict] = None) -> str:
+    """
+    Render a quote for a terminal of the given width.
+
+    - 80+ columns: art, figlet author header, quote
+    - 40-79: art and quote
+    - <40: text only
+
+    `headers` is the compiled catalog's pre-rendered header table.
+    """
+    with span("display.render"):
+        return _render_sections(quote, art, width, headers)
+
+
+def _render_sections(quote: Dict, art: Optional[str], width: int, headers: Optional[Dict]) -> str:
+    """Lay out the art, header and text sections"""
+    text_width = max(20, min(width - 4, MAX_TEXT_WIDTH))
+    sections = []
+
+    if width >= TEXT_ONLY_BELOW and art:
+        sections.append(art.rstrip("\n"))
+    if width >= HEADER_FROM:
+        sections.append(render_header(quote['author'], width, headers=headers))
+
+    body = textwrap.fill(f"\"{quote['text']}\"", width=text_width)
+    attribution = textwrap.fill(format_attribution(quote), width=text_width,
+                                subsequent_indent="  ")
+    sections.append(f"{body}\n{attribution}")
+
+    return "\n\n".join(sections) + "\n"
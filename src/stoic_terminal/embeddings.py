@@ -0,0 +1,311 @@
+"""
+Quote embeddings: encoding, storage format and the in-memory matrix
+
+Vectors live in the `embedding` BLOB column as raw float32 bytes (384 floats,
+1536 bytes, for all-MiniLM-L6-v2) and are L2-normalized, so a dot product is
+cosine similarity. sentence-transformers (and torch behind it) is imported
+only when text actually has to be encoded.
+
+Queries can instead go through the static token table in `static_encoder`
+(numpy only, same vector space); `query_encoder` picks the path.
+
+For low-memory mode the vectors are also exported to one flat file
+(`VectorFile`), laid out as
+
+    header    magic, version, dim, count (24 bytes)
+    vectors   count x dim float32, in id order
+    ids       count int64
+
+which is scanned through mmap one block of rows at a time.
+"""
+
+import importlib.util
+import mmap
+import os
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import QUERY_ENCODER, VECTORS_PATH
+from .database import QuoteDatabase
+from .profiling import span
+
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+EMBEDDING_DTYPE = np.float32
+
+VECTOR_FILE_MAGIC = b"STQV"
+VECTOR_FILE_VERSION = 1
+VECTOR_FILE_HEADER = struct.Struct("<4sIIQ4x")  # magic, version, dim, count
+
+# Rows scored per block when no memory budget sizes the blocks (24 MiB at 384 dims)
+DEFAULT_BLOCK_ROWS = 16384
+
+
+@lru_cache(maxsize=2)
+def load_model(name: str = MODEL_NAME):
+    """Load (once per process) a sentence-transformers model"""
+    with span("embeddings.load_model"):
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(name)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=EMBEDDING_DTYPE)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def encode(texts: Iterable[str], model_name: str = MODEL_NAME, batch_size: int = 64) -> np.ndarray:
+    """Embed texts as a normalized (n, dim) float32 matrix"""
+    model = load_model(model_name)
+    with span("embeddings.encode"):
+        vectors = model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True,
+                               normalize_embeddings=True)
+    return vectors.astype(EMBEDDING_DTYPE, copy=False)
+
+
+def query_encoder(kind: str = QUERY_ENCODER) -> Callable[[List[str]], np.ndarray]:
+    """
+    Encoder for search queries: "full", "static", or "auto" (the full model
+    when sentence-transformers is installed, otherwise the static table)
+    """
+    if kind == "auto":
+        kind = "full" if importlib.util.find_spec("sentence_transformers") else "static"
+    if kind == "full":
+        return encode
+    if kind == "static":
+        from . import static_encoder
+
+        return static_encoder.encode
+    raise ValueError(f"Unknown query encoder {kind!r}; expected auto, full or static")
+
+
+def vector_to_blob(vector: np.ndarray) -> bytes:
+    """Serialize one vector for the embedding column"""
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def blob_to_vector(blob: bytes) -> np.ndarray:
+    """Deserialize an embedding column value (zero-copy, read-only)"""
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+class EmbeddingMatrix:
+    """Embedded quotes as one (n, dim) matrix, with ids and authors/sources per row"""
+
+    def __init__(self, ids: np.ndarray, vectors: np.ndarray,
+                 authors: List[str], sources: List[Optional[str]]):
+        self.ids = ids
+        self.vectors = vectors
+        self.authors = authors
+        self.sources = sources
+
+    @classmethod
+    def from_database(cls, db: QuoteDatabase, batch_size: int = 5000) -> "EmbeddingMatrix":
+        """Load every stored embedding in one pass"""
+        ids, authors, sources, blobs = [], [], [], []
+        with span("embeddings.load_matrix"):
+            for rows in db.iter_embeddings(batch_size):
+                for quote_id, author, source, blob in rows:
+                    ids.append(quote_id)
+                    authors.append(author)
+                    sources.append(source)
+                    blobs.append(blob)
+
+            if not blobs:
+                return cls(np.empty(0, dtype=np.int64), np.empty((0, 0), EMBEDDING_DTYPE), [], [])
+
+            # One contiguous buffer instead of n small arrays
+            vectors = np.frombuffer(b"".join(blobs), dtype=EMBEDDING_DTYPE)
+            vectors = vectors.reshape(len(blobs), -1)
+        return cls(np.array(ids, dtype=np.int64), vectors, authors, sources)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def top_n(self, query: np.ndarray, n: int) -> np.ndarray:
+        """Row indices of the n most similar quotes, best first"""
+        return _top(self.vectors @ query, n)
+
+    def rows(self, indices: np.ndarray) -> np.ndarray:
+        """Vectors of the given rows"""
+        return self.vectors[indices]
+
+    def labels(self, indices: Sequence[int]) -> Tuple[List[str], List[Optional[str]]]:
+        """Authors and sources of the given rows"""
+        return [self.authors[i] for i in indices], [self.sources[i] for i in indices]
+
+
+def _top(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n highest scores, best first"""
+    n = min(n, len(scores))
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, n - 1)[:n]  # O(n) selection, then sort only the top
+    return top[np.argsort(-scores[top])]
+
+
+def write_vector_file(path: Path, batches: Iterable[Tuple[np.ndarray, np.ndarray]]) -> int:
+    """
+    Write (ids, vectors) batches, in id order, as a vector file. Only one
+    batch is held at a time. Returns the number of rows.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    ids_path = path.with_name(f"{path.name}.{os.getpid()}.ids")
+    count, dim = 0, 0
+    try:
+        with open(tmp_path, "wb") as f, open(ids_path, "w+b") as ids_file:
+            f.write(VECTOR_FILE_HEADER.pack(VECTOR_FILE_MAGIC, VECTOR_FILE_VERSION, 0, 0))
+            for ids, vectors in batches:
+                vectors = np.ascontiguousarray(vectors, dtype=EMBEDDING_DTYPE)
+                if not len(vectors):
+                    continue
+                if dim and vectors.shape[1] != dim:
+                    raise ValueError(f"Mixed embedding sizes: {dim} and {vectors.shape[1]}")
+                dim = vectors.shape[1]
+                f.write(vectors.tobytes())
+                ids_file.write(np.asarray(ids, dtype="<i8").tobytes())
+                count += len(vectors)
+            ids_file.seek(0)
+            for block in iter(lambda: ids_file.read(1 << 20), b""):
+                f.write(block)
+            f.seek(0)
+            f.write(VECTOR_FILE_HEADER.pack(VECTOR_FILE_MAGIC, VECTOR_FILE_VERSION, dim, count))
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+        ids_path.unlink(missing_ok=True)
+    return count
+
+
+def database_vector_batches(db: QuoteDatabase,
+                            batch_size: int = 5000) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(ids, vectors) of every embedded quote, one batch at a time"""
+    for rows in db.iter_embeddings(batch_size):
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        vectors = np.frombuffer(b"".join(row[3] for row in rows), dtype=EMBEDDING_DTYPE)
+        yield ids, vectors.reshape(len(rows), -1)
+
+
+class VectorFile:
+    """
+    Embeddings read straight from a vector file. `top_n` scores one block of
+    rows at a time and then drops its pages, so resident memory stays near
+    one block however large the file is.
+    """
+
+    def __init__(self, path: Path = VECTORS_PATH, db: Optional[QuoteDatabase] = None,
+                 block_rows: int = DEFAULT_BLOCK_ROWS):
+        """`db` supplies authors and sources for diversity re-ranking"""
+        self.path = Path(path)
+        self.db = db
+        self.block_rows = block_rows
+        self._file = open(self.path, "rb")
+        header = self._file.read(VECTOR_FILE_HEADER.size)
+        magic, version, self.dim, count = (VECTOR_FILE_HEADER.unpack(header)
+                                           if len(header) == VECTOR_FILE_HEADER.size
+                                           else (b"", 0, 0, 0))
+        if magic != VECTOR_FILE_MAGIC or version != VECTOR_FILE_VERSION:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a version {VECTOR_FILE_VERSION} vector file")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if count else None
+
+        self._row_bytes = self.dim * np.dtype(EMBEDDING_DTYPE).itemsize
+        if self._mmap is None:
+            self.vectors = np.empty((0, self.dim), EMBEDDING_DTYPE)
+            self.ids = np.empty(0, dtype=np.int64)
+            return
+        start = VECTOR_FILE_HEADER.size
+        self.vectors = np.frombuffer(self._mmap, dtype=EMBEDDING_DTYPE, count=count * self.dim,
+                                     offset=start).reshape(count, self.dim)
+        self.ids = np.frombuffer(self._mmap, dtype="<i8", count=count,
+                                 offset=start + count * self._row_bytes)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _release(self, first: int, last: int):
+        """Drop the pages of rows [first, last) from this process's resident set"""
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return  # The OS still reclaims clean file pages under pressure
+        start = VECTOR_FILE_HEADER.size + first * self._row_bytes
+        stop = VECTOR_FILE_HEADER.size + last * self._row_bytes
+        start -= start % mmap.PAGESIZE
+        self._mmap.madvise(mmap.MADV_DONTNEED, start, stop - start)
+
+    def top_n(self, query: np.ndarray, n: int) -> np.ndarray:
+        """Row indices of the n most similar quotes, best first, scanned block by block"""
+        block_rows = max(1, self.block_rows)
+        best = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=EMBEDDING_DTYPE)
+        query = np.asarray(query, dtype=EMBEDDING_DTYPE)
+        for first in range(0, len(self), block_rows):
+            last = min(first + block_rows, len(self))
+            scores = self.vectors[first:last] @ query
+            self._release(first, last)
+            top = _top(scores, n)
+            rows = np.concatenate([best, top + first])
+            merged = np.concatenate([best_scores, scores[top]])
+            keep = _top(merged, n)
+            best, best_scores = rows[keep], merged[keep]
+        return best
+
+    def rows(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Vectors of the given rows, read with pread: a fault in the mapping
+        can map a whole large folio (up to 2 MiB) for one scattered row
+        """
+        out = np.empty((len(indices), self.dim), dtype=EMBEDDING_DTYPE)
+        for i, row in enumerate(indices):
+            offset = VECTOR_FILE_HEADER.size + int(row) * self._row_bytes
+            out[i] = np.frombuffer(os.pread(self._file.fileno(), self._row_bytes, offset),
+                                   dtype=EMBEDDING_DTYPE)
+        return out
+
+    def labels(self, indices: Sequence[int]) -> Tuple[List[str], List[Optional[str]]]:
+        """Authors and sources of the given rows, looked up in the database"""
+        ids = [int(self.ids[i]) for i in indices]
+        if self.db is None:
+            return [f"#{i}" for i in ids], [None] * len(ids)  # No grouping without names
+        quotes = {quote["id"]: quote for quote in self.db.get_quotes_by_ids(ids)}
+        authors = [quotes[i]["author"] if i in quotes else "" for i in ids]
+        return authors, [quotes[i]["source"] if i in quotes else None for i in ids]
+
+    def close(self):
+        if self._mmap is not None:
+            del self.vectors, self.ids  # Views must go before the map can close
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "VectorFile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def embed_missing(db: QuoteDatabase, model_name: str = MODEL_NAME, batch_size: int = 256) -> int:
+    """Compute and store embeddings for quotes that have none; returns the count"""
+    total = 0
+    while True:
+        rows = db.get_unembedded_quotes(batch_size)
+        if not rows:
+            return total
+        vectors = encode([text for _, text in rows], model_name, batch_size=64)
+        db.update_embeddings((vector_to_blob(vector), quote_id)
+                             for (quote_id, _), vector in zip(rows, vectors))
+        total += len(rows)
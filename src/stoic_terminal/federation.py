@@ -0,0 +1,185 @@
+"""
+Federated reads across several quote databases
+
+The bundled corpus, team databases and a personal database are searched as
+one view without copying rows between files. Each member is opened
+read-only on its own and keeps its own FTS and embedding data. A new
+personal database therefore never forces the large bundled indexes to be
+rebuilt. Queries run against every member and the results are merged.
+
+Quotes from a federation carry corpus-aware ids:
+
+    id = corpus index << 32 | id within that corpus
+
+The first database is corpus 0, so its ids are unchanged. Each quote also
+gets `corpus` (the member's name) and `local_id`.
+
+Member readers are opened in parallel rather than ATTACHed to one
+connection. This keeps every member's read-only tuning and avoids SQLite's
+limit on attached databases. The cost is that BM25 scores come from
+separate FTS indexes, so text ranks are comparable only approximately
+across corpora.
+"""
+
+import random
+from pathlib import Path
+from typing import Callable, Container, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .database import QuoteDatabase
+from .profiling import span
+
+
+CORPUS_SHIFT = 32
+LOCAL_ID_MASK = (1 << CORPUS_SHIFT) - 1
+
+
+def make_key(corpus: int, quote_id: int) -> int:
+    """Corpus-aware id for a quote in member `corpus`"""
+    return (corpus << CORPUS_SHIFT) | quote_id
+
+
+def split_key(key: int) -> Tuple[int, int]:
+    """(corpus index, id within that corpus) of a corpus-aware id"""
+    return key >> CORPUS_SHIFT, key & LOCAL_ID_MASK
+
+
+def corpus_names(paths: Sequence[Path]) -> List[str]:
+    """Member names from file stems, made unique with a numeric suffix"""
+    names = []
+    for path in paths:
+        name = base = Path(path).stem
+        suffix = 2
+        while name in names:
+            name = f"{base}-{suffix}"
+            suffix += 1
+        names.append(name)
+    return names
+
+
+class _MemberIds:
+    """A member's local view of a container of corpus-aware ids"""
+
+    def __init__(self, keys: Container[int], corpus: int):
+        self.keys = keys
+        self.corpus = corpus
+
+    def __contains__(self, quote_id: int) -> bool:
+        return make_key(self.corpus, quote_id) in self.keys
+
+
+class FederatedDatabase:
+    """Read-only view over several quote databases, with the QuoteDatabase read API"""
+
+    def __init__(self,
+                 db_paths: Sequence[str],
+                 names: Optional[Sequence[str]] = None,
+                 open_member: Optional[Callable[[str], QuoteDatabase]] = None):
+        """`open_member` opens one path (default: read-only QuoteDatabase)"""
+        if not db_paths:
+            raise ValueError("A federation needs at least one database")
+        self.db_paths = [Path(path) for path in db_paths]
+        self.names = list(names) if names else corpus_names(self.db_paths)
+        self.members: List[QuoteDatabase] = []
+        self._counts: Optional[List[int]] = None
+        open_member = open_member or (lambda path: QuoteDatabase(path, read_only=True))
+        try:
+            with span("federation.open"):
+                for path in self.db_paths:
+                    self.members.append(open_member(str(path)))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self) -> "FederatedDatabase":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _tag(self, corpus: int, quote: Dict) -> Dict:
+        quote['local_id'] = quote['id']
+        quote['id'] = make_key(corpus, quote['id'])
+        quote['corpus'] = self.names[corpus]
+        return quote
+
+    def counts(self) -> List[int]:
+        """Quotes per member (maintained counts, no scan), read once per federation"""
+        if self._counts is None:
+            self._counts = [member.count_quotes() for member in self.members]
+        return self._counts
+
+    def count_quotes(self) -> int:
+        return sum(self.counts())
+
+    def get_random_quote(self, exclude: Optional[Container[int]] = None) -> Optional[Dict]:
+        """A random quote, every quote in the federation equally likely"""
+        counts = self.counts()
+        if not any(counts):
+            return None
+        corpus = random.choices(range(len(self.members)), weights=counts)[0]
+        member_exclude = _MemberIds(exclude, corpus) if exclude else None
+        quote = self.members[corpus].get_random_quote(exclude=member_exclude)
+        return self._tag(corpus, quote) if quote else None
+
+    def get_quotes_by_ids(self, ids: List[int]) -> List[Dict]:
+        """Fetch quotes by corpus-aware id, in the order given (one query per member)"""
+        by_corpus: Dict[int, List[int]] = {}
+        for key in ids:
+            corpus, quote_id = split_key(key)
+            if corpus < len(self.members):
+                by_corpus.setdefault(corpus, []).append(quote_id)
+
+        by_key = {}
+        for corpus, quote_ids in by_corpus.items():
+            for quote in self.members[corpus].get_quotes_by_ids(quote_ids):
+                quote = self._tag(corpus, quote)
+                by_key[quote['id']] = quote
+        return [by_key[key] for key in ids if key in by_key]
+
+    def iter_search_by_tags(self, tags: List[str], match_mode: str = 'any') -> Iterator[Dict]:
+        """Stream quotes with the tags from every member, bundled corpus first"""
+        for corpus, member in enumerate(self.members):
+            for quote in member.iter_search_by_tags(tags, match_mode):
+                yield self._tag(corpus, quote)
+
+    def search_by_tags(self, tags: List[str], match_mode: str = 'any') -> List[Dict]:
+        """Quotes with the tags from every member, bundled corpus first"""
+        with span("federation.search_by_tags"):
+            return list(self.iter_search_by_tags(tags, match_mode))
+
+    def search_text(self,
+                    query: str,
+                    limit: int = 10,
+                    highlight: Tuple[str, str] = ('[', ']')) -> List[Dict]:
+        """Full-text search in every member, merged by BM25 rank (best first)"""
+        with span("federation.search_text"):
+            results = [self._tag(corpus, quote)
+                       for corpus, member in enumerate(self.members)
+                       for quote in member.search_text(query, limit, highlight)]
+        results.sort(key=lambda quote: quote['rank'])
+        return results[:limit]
+
+    def iter_embeddings(self, batch_size: int = 5000) -> Iterator[List[Tuple]]:
+        """
+        (id, author, source, embedding) for every embedded quote, with
+        corpus-aware ids, so `EmbeddingMatrix.from_database` builds one
+        merged matrix from each member's stored vectors
+        """
+        size = None
+        for corpus, member in enumerate(self.members):
+            for rows in member.iter_embeddings(batch_size):
+                if size is None:
+                    size = len(rows[0]['embedding'])
+                batch = []
+                for quote_id, author, source, blob in rows:
+                    if len(blob) != size:
+                        raise ValueError(f"{self.names[corpus]} was embedded with a different "
+                                         "model; re-run `stoic-terminal embed` on it")
+                    batch.append((make_key(corpus, quote_id), author, source, blob))
+                yield batch
+
+    def close(self):
+        for member in self.members:
+            member.close()
+        self.members = []
@@ -0,0 +1,501 @@
+"""
+Git activity: coding sessions and rolled-up aggregates
+
+Commits are read with `git log --numstat` and grouped into sessions: a
+commit more than `SESSION_GAP` seconds after the previous one in the same
+repository starts a new session. Each update reads `last..HEAD`, where
+`last` is the HEAD it saw before, so a commit is found however old its
+committer date is. Each commit is tagged with themes when it
+is read (debugging, progress, learning), so no commit message is parsed
+twice.
+
+The store (STATE_DIR/git_sessions.db) keeps four kinds of rows:
+
+    git_seen           64 bits of every commit id ingested, so a commit
+                       read again (after a branch switch, say) is never
+                       counted twice
+    git_commits        commits of sessions that are still open
+    git_sessions       one row per session (messages, totals, themes)
+    git_rollups        commits, lines changed and sessions per hour and per
+    git_rollup_themes  day, and theme counts for the same buckets
+
+When a session closes, its commits are added to the rollups and then
+deleted. So `activity()` reads a few rollup rows plus the open sessions,
+however long the history is. The store stays small because rows age out:
+
+- hourly rollups after `HOURLY_RETENTION_DAYS`
+- closed sessions (with their messages) after `SESSION_RETENTION_DAYS`
+- daily rollups are kept, at most one row per day with commits (plus one
+  per theme), and so are seen commit ids, about 10 bytes each
+
+Freed pages go back to the filesystem (incremental auto-vacuum).
+"""
+
+import json
+import re
+import sqlite3
+import subprocess
+import time
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .config import GIT_SESSIONS_PATH
+
+
+SCHEMA_VERSION = 2
+
+# A pause longer than this ends a session
+SESSION_GAP = 2 * 3600
+
+# A session at least this long reads as perseverance
+PERSEVERANCE_SECONDS = 3 * 3600
+
+HOURLY_RETENTION_DAYS = 14
+SESSION_RETENTION_DAYS = 90
+
+# How far back the first read of a repository goes (a week plus the baseline)
+INITIAL_DAYS = 35
+
+# Weeks of daily rollups a normal week is averaged over
+BASELINE_WEEKS = 4
+
+THEME_PATTERNS = {
+    "debugging": re.compile(
+        r"\b(fix(es|ed)?|bug|hotfix|debug|crash|error|regression|revert|broken|workaround)\b", re.I
+    ),
+    "progress": re.compile(
+        r"\b(adds?|added|implement(s|ed)?|feat|feature|introduce[sd]?|support|release|ship)\b",
+        re.I
+    ),
+    "learning": re.compile(
+        r"\b(docs?|readme|refactor(s|ed)?|clean ?up|rename[sd]?|tests?|spike|experiment|try)\b",
+        re.I
+    ),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS git_repos (
+    repo TEXT PRIMARY KEY,
+    last_commit_at INTEGER NOT NULL,
+    last_sha TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS git_seen (
+    sha_key INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS git_sessions (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    session_start INTEGER NOT NULL,
+    session_end INTEGER NOT NULL,
+    total_commits INTEGER NOT NULL DEFAULT 0,
+    total_lines_changed INTEGER NOT NULL DEFAULT 0,
+    commit_messages TEXT NOT NULL DEFAULT '[]',
+    detected_themes TEXT,
+    closed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_git_sessions_open ON git_sessions(closed, repo);
+CREATE INDEX IF NOT EXISTS idx_git_sessions_end ON git_sessions(session_end);
+
+CREATE TABLE IF NOT EXISTS git_commits (
+    sha TEXT PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES git_sessions(id),
+    committed_at INTEGER NOT NULL,
+    lines_changed INTEGER NOT NULL,
+    themes TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_git_commits_session ON git_commits(session_id);
+
+CREATE TABLE IF NOT EXISTS git_rollups (
+    granularity TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    commits INTEGER NOT NULL DEFAULT 0,
+    lines_changed INTEGER NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS git_rollup_themes (
+    granularity TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    theme TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (granularity, bucket, theme)
+) WITHOUT ROWID;
+"""
+
+
+def hour_bucket(timestamp: float) -> int:
+    """Hours since the epoch"""
+    return int(timestamp) // 3600
+
+
+def day_bucket(timestamp: float) -> int:
+    """Ordinal of the local date"""
+    return date.fromtimestamp(timestamp).toordinal()
+
+
+BUCKETS = {"hour": hour_bucket, "day": day_bucket}
+
+
+def commit_themes(message: str) -> List[str]:
+    """Themes a commit message matches"""
+    return [theme for theme, pattern in THEME_PATTERNS.items() if pattern.search(message)]
+
+
+def seen_key(sha: str) -> int:
+    """64 bits of a commit id, as a signed SQLite integer"""
+    return int.from_bytes(bytes.fromhex(sha[-16:]), "big", signed=True)
+
+
+def read_commits(repo: str, since: Optional[int] = None,
+                 revisions: Optional[str] = None) -> Optional[List[Dict]]:
+    """
+    Commits of `repo` in `revisions` (default HEAD) after the epoch second
+    `since`, oldest first. None if git fails, e.g. on an unknown revision.
+    """
+    command = ["git", "-C", repo, "log", "--reverse", "--no-merges",
+               "--format=%x1e%H%x1f%ct%x1f%s", "--numstat"]
+    if since is not None:
+        command.append(f"--since=@{since}")
+    if revisions:
+        command += [revisions, "--"]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, check=True,
+                                encoding="utf-8", errors="replace").stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    commits = []
+    for record in output.split("\x1e")[1:]:
+        header, _, numstat = record.partition("\n")
+        sha, timestamp, message = header.split("\x1f", 2)
+        lines = 0
+        for line in numstat.splitlines():
+            added, _, rest = line.partition("\t")
+            deleted = rest.partition("\t")[0]
+            if added.isdigit() and deleted.isdigit():  # "-" for binary files
+                lines += int(added) + int(deleted)
+        commits.append({"sha": sha, "time": int(timestamp), "message": message,
+                        "lines": lines})
+    return commits
+
+
+def head_sha(repo: str) -> Optional[str]:
+    """Commit id of the repository's HEAD (None before its first commit)"""
+    try:
+        result = subprocess.run(["git", "-C", repo, "rev-parse", "--verify", "-q", "HEAD"],
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def repo_root(path: str = ".") -> Optional[str]:
+    """Top-level directory of the git work tree containing `path`"""
+    try:
+        result = subprocess.run(["git", "-C", path, "rev-parse", "--show-toplevel"],
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class GitSessionStore:
+    """Git sessions and their hourly/daily rollups in a small SQLite file"""
+
+    def __init__(self, path: Path = GIT_SESSIONS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self._create_schema(version)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+
+    def _create_schema(self, version: int):
+        # Only takes effect while the file is still empty
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._transaction()
+        try:
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement)
+            if version == 1:
+                # Version 1 only knew the commits of open sessions
+                self.conn.execute("ALTER TABLE git_repos ADD COLUMN last_sha TEXT")
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO git_seen VALUES (?)",
+                    [(seen_key(sha),) for (sha,) in self.conn.execute(
+                        "SELECT sha FROM git_commits").fetchall()]
+                )
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _transaction(self):
+        # Two shells may update at once; the second waits instead of interleaving
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    # -- Writing ------------------------------------------------------------
+
+    def update(self, path: str = ".", now: Optional[float] = None) -> Dict[str, int]:
+        """Read new commits of the repository at `path`, then close and compact"""
+        now = time.time() if now is None else now
+        repo = repo_root(path)
+        ingested = 0
+        head = repo and head_sha(repo)
+        if head:
+            row = self.conn.execute("SELECT last_sha FROM git_repos WHERE repo = ?",
+                                    (repo,)).fetchone()
+            commits = None
+            if row and row[0]:
+                commits = read_commits(repo, revisions=f"{row[0]}..{head}")
+            if commits is None:
+                # First read, or the last HEAD is gone (rewritten history); seen ids dedupe
+                commits = read_commits(repo, int(now) - INITIAL_DAYS * 86400, head) or []
+            ingested = self.ingest(repo, commits, head)
+        closed = self.close_idle(now)
+        self.compact(now)
+        return {"ingested": ingested, "closed": closed}
+
+    def ingest(self, repo: str, commits: Iterable[Dict], head: Optional[str] = None) -> int:
+        """
+        Add commits (oldest first) to their sessions, and remember `head` as
+        where the next read starts. Returns how many commits were new.
+        """
+        self._transaction()
+        try:
+            added = self._ingest(repo, commits, head)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def _ingest(self, repo: str, commits: Iterable[Dict], head: Optional[str]) -> int:
+        cur = self.conn.cursor()
+        row = cur.execute(
+            "SELECT id, session_end FROM git_sessions WHERE closed = 0 AND repo = ?", (repo,)
+        ).fetchone()
+        # The open session's new totals and messages, written once it closes or at the end
+        session = {"id": row[0], "end": row[1], "commits": 0, "lines": 0,
+                   "messages": []} if row else None
+        last_commit_at = 0
+        added = 0
+        for commit in commits:
+            cur.execute("INSERT OR IGNORE INTO git_seen VALUES (?)", (seen_key(commit["sha"]),))
+            if cur.rowcount == 0:
+                continue
+            if session and commit["time"] - session["end"] > SESSION_GAP:
+                self._flush_session(cur, session)
+                self._close_session(cur, session["id"])
+                session = None
+            if session is None:
+                cur.execute("INSERT INTO git_sessions (repo, session_start, session_end) "
+                            "VALUES (?, ?, ?)", (repo, commit["time"], commit["time"]))
+                session = {"id": cur.lastrowid, "end": commit["time"], "commits": 0,
+                           "lines": 0, "messages": []}
+
+            session["end"] = max(session["end"], commit["time"])
+            session["commits"] += 1
+            session["lines"] += commit["lines"]
+            session["messages"].append(commit["message"])
+            cur.execute("INSERT INTO git_commits VALUES (?, ?, ?, ?, ?)",
+                        (commit["sha"], session["id"], commit["time"], commit["lines"],
+                         " ".join(commit_themes(commit["message"]))))
+            last_commit_at = max(last_commit_at, commit["time"])
+            added += 1
+        if session:
+            self._flush_session(cur, session)
+
+        if added or head:
+            cur.execute("INSERT INTO git_repos VALUES (?, ?, ?) ON CONFLICT(repo) DO UPDATE "
+                        "SET last_commit_at = MAX(last_commit_at, excluded.last_commit_at), "
+                        "last_sha = COALESCE(excluded.last_sha, last_sha)",
+                        (repo, last_commit_at, head))
+        return added
+
+    def _flush_session(self, cur: sqlite3.Cursor, session: Dict):
+        """Write a session's new totals and messages in one update"""
+        if not session["commits"]:
+            return
+        messages = json.loads(cur.execute("SELECT commit_messages FROM git_sessions "
+                                          "WHERE id = ?", (session["id"],)).fetchone()[0])
+        cur.execute(
+            "UPDATE git_sessions SET session_end = MAX(session_end, ?), "
+            "total_commits = total_commits + ?, total_lines_changed = total_lines_changed + ?, "
+            "commit_messages = ? WHERE id = ?",
+            (session["end"], session["commits"], session["lines"],
+             json.dumps(messages + session["messages"]), session["id"])
+        )
+
+    def _close_session(self, cur: sqlite3.Cursor, session_id: int):
+        """Fold the session's commits into the rollups, then drop them"""
+        start, end = cur.execute("SELECT session_start, session_end FROM git_sessions "
+                                 "WHERE id = ?", (session_id,)).fetchone()
+        commits = cur.execute("SELECT committed_at, lines_changed, themes FROM git_commits "
+                              "WHERE session_id = ?", (session_id,)).fetchall()
+
+        for granularity, bucket_of in BUCKETS.items():
+            totals: Dict[int, List[int]] = {}
+            themes: Counter = Counter()
+            for committed_at, lines, commit_theme_list in commits:
+                bucket = bucket_of(committed_at)
+                total = totals.setdefault(bucket, [0, 0, 0])
+                total[0] += 1
+                total[1] += lines
+                themes.update((bucket, theme) for theme in commit_theme_list.split())
+            totals.setdefault(bucket_of(start), [0, 0, 0])[2] += 1
+            cur.executemany(
+                "INSERT INTO git_rollups VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(granularity, bucket) DO UPDATE SET "
+                "commits = commits + excluded.commits, "
+                "lines_changed = lines_changed + excluded.lines_changed, "
+                "sessions = sessions + excluded.sessions",
+                [(granularity, bucket, *total) for bucket, total in totals.items()]
+            )
+            cur.executemany(
+                "INSERT INTO git_rollup_themes VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(granularity, bucket, theme) DO UPDATE SET "
+                "count = count + excluded.count",
+                [(granularity, bucket, theme, count)
+                 for (bucket, theme), count in themes.items()]
+            )
+
+        session_themes = session_themes_of((row[2] for row in commits), end - start)
+        cur.execute("UPDATE git_sessions SET closed = 1, detected_themes = ? WHERE id = ?",
+                    (json.dumps(session_themes), session_id))
+        cur.execute("DELETE FROM git_commits WHERE session_id = ?", (session_id,))
+
+    def close_idle(self, now: Optional[float] = None) -> int:
+        """Close sessions with no commit in the last `SESSION_GAP` seconds"""
+        now = time.time() if now is None else now
+        self._transaction()
+        try:
+            cur = self.conn.cursor()
+            idle = [row[0] for row in cur.execute(
+                "SELECT id FROM git_sessions WHERE closed = 0 AND session_end < ?",
+                (now - SESSION_GAP,)
+            ).fetchall()]
+            for session_id in idle:
+                self._close_session(cur, session_id)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(idle)
+
+    def compact(self, now: Optional[float] = None):
+        """Drop hourly rollups and closed sessions past their retention"""
+        now = time.time() if now is None else now
+        oldest_hour = hour_bucket(now - HOURLY_RETENTION_DAYS * 86400)
+        self._transaction()
+        try:
+            for table in ("git_rollups", "git_rollup_themes"):
+                self.conn.execute(f"DELETE FROM {table} WHERE granularity = 'hour' "
+                                  "AND bucket < ?", (oldest_hour,))
+            self.conn.execute("DELETE FROM git_sessions WHERE closed = 1 AND session_end < ?",
+                              (now - SESSION_RETENTION_DAYS * 86400,))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("PRAGMA incremental_vacuum")
+
+    # -- Reading ------------------------------------------------------------
+
+    def _totals(self, granularity: str, first: int, last: int) -> Dict:
+        commits, lines, sessions = self.conn.execute(
+            "SELECT TOTAL(commits), TOTAL(lines_changed), TOTAL(sessions) FROM git_rollups "
+            "WHERE granularity = ? AND bucket BETWEEN ? AND ?", (granularity, first, last)
+        ).fetchone()
+        themes = dict(self.conn.execute(
+            "SELECT theme, SUM(count) FROM git_rollup_themes "
+            "WHERE granularity = ? AND bucket BETWEEN ? AND ? GROUP BY theme",
+            (granularity, first, last)
+        ).fetchall())
+        return {"commits": int(commits), "lines": int(lines), "sessions": int(sessions),
+                "themes": Counter(themes)}
+
+    def activity(self, now: Optional[float] = None) -> Dict:
+        """
+        Recent activity for theme detection: commits in the last 24 hours
+        and 7 days, a normal week for comparison, intensity and themes.
+        Reads rollup rows and open sessions only.
+        """
+        now = time.time() if now is None else now
+        today = day_bucket(now)
+        this_hour = hour_bucket(now)
+        day = self._totals("hour", this_hour - 23, this_hour)
+        week = self._totals("day", today - 6, today)
+        baseline = self._totals("day", today - 7 * (BASELINE_WEEKS + 1) + 1, today - 7)
+
+        # Open sessions aren't rolled up yet; there is at most one per repository
+        longest_open = 0
+        for session_id, start, end in self.conn.execute(
+            "SELECT id, session_start, session_end FROM git_sessions WHERE closed = 0"
+        ).fetchall():
+            longest_open = max(longest_open, end - start)
+            for committed_at, commit_lines, themes in self.conn.execute(
+                "SELECT committed_at, lines_changed, themes FROM git_commits "
+                "WHERE session_id = ?", (session_id,)
+            ):
+                for totals, recent in ((day, committed_at > now - 86400),
+                                       (week, day_bucket(committed_at) > today - 7)):
+                    if recent:
+                        totals["commits"] += 1
+                        totals["lines"] += commit_lines
+                        totals["themes"].update(themes.split())
+
+        usual_week = baseline["commits"] / BASELINE_WEEKS
+        if week["commits"] == 0:
+            intensity = "idle"
+        elif week["commits"] < 0.5 * usual_week:
+            intensity = "quiet"
+        elif week["commits"] > 1.5 * max(usual_week, 1):
+            intensity = "intense"
+        else:
+            intensity = "steady"
+
+        themes = [theme for theme, _ in week["themes"].most_common()]
+        if intensity == "intense" or longest_open >= PERSEVERANCE_SECONDS:
+            themes.append("perseverance")
+        return {"commits_24h": day["commits"], "commits_week": week["commits"],
+                "lines_week": week["lines"], "usual_week": round(usual_week, 1),
+                "intensity": intensity, "themes": themes}
+
+    def stats(self) -> Dict[str, int]:
+        """Row counts per table and the file size"""
+        counts = {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("git_sessions", "git_commits", "git_seen", "git_rollups",
+                                "git_rollup_themes")}
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        counts["bytes"] = page_size * pages
+        return counts
+
+
+def session_themes_of(commit_theme_lists: Iterable[str], duration: float) -> List[str]:
+    """Session themes: its commits' themes, most frequent first, and a long session's"""
+    counts: Counter = Counter()
+    for themes in commit_theme_lists:
+        counts.update(themes.split())
+    themes = [theme for theme, _ in counts.most_common()]
+    if duration >= PERSEVERANCE_SECONDS:
+        themes.append("perseverance")
+    return themes
@@ -0,0 +1,152 @@
+"""
+Recently-shown quote history
+
+The history file is an append-only log of 8-byte records, one per launch:
+the little-endian uint32 quote id followed by a check word (the id XOR a
+constant). Appends are a single small O_APPEND write. A record torn by a
+crash is skipped on load, wherever it sits in the file: the reader steps
+forward a byte at a time until a record's check word matches again. Once
+the log holds twice the window it is compacted (atomically, via a temp
+file and rename) down to the newest `capacity` ids, so it never grows past
+2 * capacity * 8 bytes. Appends and compaction take the same lock on a
+sibling `.lock` file, so no append can land in a log that is being
+replaced.
+
+Loading builds a bitset over the ids in the window, so "was this shown
+recently?" is an O(1) bit test however large the corpus is.
+"""
+
+import os
+import struct
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .profiling import span
+
+
+# Launches remembered; the log file tops out at 16 KiB
+DEFAULT_CAPACITY = 1024
+
+RECORD = struct.Struct("<II")  # quote id, id ^ CHECK
+RECORD_SIZE = RECORD.size
+CHECK = 0x5A17C0DE
+
+
+def _encode(ids: Iterable[int]) -> bytes:
+    """Quote ids as checked little-endian records"""
+    return b"".join(RECORD.pack(quote_id, quote_id ^ CHECK) for quote_id in ids)
+
+
+def _decode(data: bytes) -> array:
+    """Ids of every intact record, skipping torn ones anywhere in the log"""
+    if len(data) % RECORD_SIZE == 0:
+        ids = array("I", [quote_id for quote_id, check in RECORD.iter_unpack(data)
+                          if check == quote_id ^ CHECK])
+        if len(ids) * RECORD_SIZE == len(data):
+            return ids  # Every record intact, the usual case
+
+    ids = array("I")
+    offset, last = 0, len(data) - RECORD_SIZE
+    while offset <= last:
+        quote_id, check = RECORD.unpack_from(data, offset)
+        if check == quote_id ^ CHECK:
+            ids.append(quote_id)
+            offset += RECORD_SIZE
+        else:
+            offset += 1  # Inside a torn record: resynchronise on the next intact one
+    return ids
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Exclusive lock shared by appends, compaction and clearing of one log"""
+    try:
+        import fcntl
+    except ImportError:
+        yield  # No flock on this platform; a lost append only costs a repeat
+        return
+
+    fd = os.open(path.with_name(path.name + ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # Closing releases the lock
+
+
+class ShownHistory:
+    """Ring of recently displayed quote ids with O(1) membership"""
+
+    def __init__(self, path: Path, capacity: int = DEFAULT_CAPACITY, window: Optional[int] = None):
+        self.path = Path(path)
+        self.capacity = capacity
+        # Smaller corpora get a smaller window, so selection never runs dry
+        self.window = capacity if window is None else max(0, min(window, capacity))
+
+        with span("history.load"):
+            self.ids = self._read_log()
+            self.bits = self._build_bitset(self.ids[-self.window:] if self.window else [])
+
+    def _read_log(self) -> array:
+        """Read the newest `capacity` intact records"""
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return array("I")
+        return _decode(data)[-self.capacity:]
+
+    @staticmethod
+    def _build_bitset(ids: Iterable[int]) -> bytearray:
+        """One bit per quote id, sized to the largest id present"""
+        ids = list(ids)
+        bits = bytearray((max(ids) >> 3) + 1 if ids else 0)
+        for quote_id in ids:
+            bits[quote_id >> 3] |= 1 << (quote_id & 7)
+        return bits
+
+    def __contains__(self, quote_id: int) -> bool:
+        byte = quote_id >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (quote_id & 7)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def record(self, quote_id: int):
+        """Append one shown quote id, compacting the log when it is full"""
+        record = _encode([quote_id])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with _locked(self.path):
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, record)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+
+            self.ids.append(quote_id)
+            if self.window:
+                byte = quote_id >> 3
+                if byte >= len(self.bits):
+                    self.bits.extend(bytes(byte + 1 - len(self.bits)))
+                self.bits[byte] |= 1 << (quote_id & 7)
+
+            if size >= 2 * self.capacity * RECORD_SIZE:
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the log with only the newest `capacity` ids (caller holds the lock)"""
+        ids = self._read_log()
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(_encode(ids))
+        os.replace(tmp_path, self.path)  # Readers see the old or new log, never half
+        self.ids = ids
+
+    def clear(self):
+        """Forget every shown quote"""
+        with _locked(self.path):
+            self.path.unlink(missing_ok=True)
+        self.ids = array("I")
+        self.bits = bytearray()
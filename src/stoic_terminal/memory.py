@@ -0,0 +1,142 @@
+"""
+Low-memory mode: a resident-memory budget and the paths that keep to it
+
+On small VMs and containers, `--memory-budget MB` (or
+STOIC_TERMINAL_MEMORY_MB) turns it on:
+
+- the database gets a small page cache and no mmap
+  (`QuoteDatabase(low_memory=True)`), and tag queries stream rows instead
+  of building lists
+- semantic search scans the flat vector file (`stoic-terminal build
+  vectors`) one block at a time instead of loading the embedding matrix.
+  Blocks are sized to a share of what is left of the budget, and each
+  block's pages are dropped once it is scored. Queries are encoded with
+  the static table, never the full model.
+- when the vector file or static table is missing, or numpy plus one block
+  would not fit, search falls back to tag-only selection: quotes tagged
+  with the query's words, streamed from SQLite
+
+The budget is compared with the process's resident set size before each
+step; nothing is enforced by the OS.
+"""
+
+import os
+import re
+import sys
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import MEMORY_BUDGET_MB, STATIC_ENCODER_DIR, VECTORS_PATH
+from .database import QuoteDatabase
+
+
+MIB = 1024 * 1024
+
+# Resident cost of the semantic path's fixed parts (measured on CPython 3.12, Linux)
+NUMPY_IMPORT_BYTES = 16 * MIB
+STATIC_ENCODER_BYTES = 8 * MIB
+
+# One block of vectors may take this share of what is left of the budget
+BLOCK_SHARE = 0.25
+MIN_BLOCK_ROWS = 256
+ROW_BYTES = 384 * 4  # all-MiniLM-L6-v2, float32
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # The peak, not the current size, which errs on the safe side
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudget:
+    """A resident-memory limit, checked before each step of the low-memory paths"""
+
+    def __init__(self, limit_mb: Optional[float] = MEMORY_BUDGET_MB):
+        self.limit = int(limit_mb * MIB) if limit_mb else None
+
+    @property
+    def limited(self) -> bool:
+        return self.limit is not None
+
+    def remaining(self) -> Optional[int]:
+        """Bytes left under the limit (None without one)"""
+        if self.limit is None:
+            return None
+        return max(0, self.limit - current_rss())
+
+    def allows(self, extra: int) -> bool:
+        """Whether `extra` more resident bytes still fit"""
+        remaining = self.remaining()
+        return remaining is None or extra <= remaining
+
+    def block_rows(self, row_bytes: int, default: int) -> int:
+        """Rows per block for a paged scan, at most `default`"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return max(MIN_BLOCK_ROWS, min(default, int(remaining * BLOCK_SHARE) // row_bytes))
+
+
+def semantic_blocker(db, budget: MemoryBudget, vectors_path: Path = VECTORS_PATH,
+                     encoder_dir: Path = STATIC_ENCODER_DIR) -> Optional[str]:
+    """Why budgeted semantic search can't run (None if it can)"""
+    if not isinstance(db, QuoteDatabase):
+        return "the vector file covers only the main database"
+    if not Path(vectors_path).exists():
+        return "no vector file; build it with `stoic-terminal build vectors`"
+    if not (Path(encoder_dir) / "vectors.npy").exists():
+        return "no static query encoder; build it with `stoic-terminal distill`"
+
+    needed = STATIC_ENCODER_BYTES + MIN_BLOCK_ROWS * ROW_BYTES
+    if "numpy" not in sys.modules:
+        needed += NUMPY_IMPORT_BYTES
+    if not budget.allows(needed):
+        return (f"{budget.remaining() / MIB:.0f} MiB left of the {budget.limit / MIB:.0f} MiB "
+                f"budget; semantic search needs about {needed / MIB:.0f} MiB")
+    return None
+
+
+def query_tags(query: str) -> List[str]:
+    """The query's words, as tag names"""
+    return list(dict.fromkeys(re.findall(r"[a-z_]+", query.lower())))
+
+
+def budgeted_search(db,
+                    query: str,
+                    limit: int,
+                    budget: MemoryBudget,
+                    diversity: float = 0.3,
+                    per_author: Optional[int] = None,
+                    vectors_path: Path = VECTORS_PATH,
+                    encoder_dir: Path = STATIC_ENCODER_DIR) -> Dict:
+    """
+    Semantic search that keeps to the budget, else tag-only selection.
+    Returns {"mode": "semantic" or "tags", "reason": why tags, "quotes": [...]}.
+    """
+    reason = semantic_blocker(db, budget, vectors_path, encoder_dir)
+    if reason is None:
+        from .embeddings import DEFAULT_BLOCK_ROWS, VectorFile
+        from .ranking import diverse_top_k
+        from .static_encoder import StaticEncoder
+
+        vector = StaticEncoder.load(encoder_dir).encode([query])[0]
+        with VectorFile(vectors_path, db) as vectors:
+            vectors.block_rows = budget.block_rows(vectors.dim * 4, DEFAULT_BLOCK_ROWS)
+            ids = diverse_top_k(vectors, vector, limit, lambda_=1 - diversity,
+                                max_per_author=per_author)
+        return {"mode": "semantic", "reason": None, "quotes": db.get_quotes_by_ids(ids)}
+
+    tags = query_tags(query)
+    quotes = list(islice(db.iter_search_by_tags(tags), limit)) if tags else []
+    return {"mode": "tags", "reason": reason, "quotes": quotes}
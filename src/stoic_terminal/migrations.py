@@ -0,0 +1,474 @@
+"""
+Versioned schema migrations for the quote database
+
+The schema version lives in `PRAGMA user_version`. Each migration has a
+schema step (idempotent DDL, run in one short transaction) and an optional
+backfill that rewrites existing rows in small chunks. Backfill progress is
+checkpointed in the `migration_progress` table after every chunk, so an
+interrupted upgrade resumes where it stopped and other connections only
+ever wait for a single chunk. `user_version` is bumped once a migration's
+backfill has finished.
+"""
+
+import hashlib
+import sqlite3
+from typing import Callable, Dict, List, Optional, Union
+
+from .authors import author_key, resolve_author_id
+from .config import MIGRATION_CHUNK_SIZE
+
+
+# Column weights for BM25 ranking: text, author, source, source_context
+FTS_COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+FTS_TOKENIZER = "porter unicode61 remove_diacritics 2"
+
+DEFAULT_CHUNK_SIZE = MIGRATION_CHUNK_SIZE
+
+# Facets with precomputed counts: facet name -> quotes column
+FACET_COLUMNS = {
+    "author": "author_id",
+    "tradition": "tradition",
+    "length_category": "length_category",
+}
+
+
+def content_hash(text: str, author: str) -> str:
+    """Stable hash of a quote's whitespace- and case-normalized text and author"""
+    normalized = " ".join(text.lower().split()) + "\x1f" + " ".join(author.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
+    """Check whether a table already has a column"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(info[1] == column for info in cursor.fetchall())
+
+
+def _add_column(cursor: sqlite3.Cursor, table: str, column: str, declaration: str):
+    """ALTER TABLE ... ADD COLUMN, skipped when a previous run already added it"""
+    if not _column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def create_fts_index(cursor: sqlite3.Cursor,
+                     content: str = "quotes",
+                     decode: Optional[str] = None):
+    """
+    FTS5 index over `content` (a table or view with the quotes columns), kept
+    in sync with `quotes` by triggers. `decode` names an SQL function that
+    turns stored text/source_context values into plain text (compressed mode).
+    """
+    def plain(expr: str) -> str:
+        return f"{decode}({expr})" if decode else expr
+
+    def values(row: str) -> str:
+        return (f"{row}.id, {plain(row + '.text')}, {row}.author, {row}.source, "
+                f"{plain(row + '.source_context')}")
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'quotes_fts'")
+    fts_exists = cursor.fetchone() is not None
+
+    # External-content table: the index stores only tokens, rows live in `content`
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5(
+            text, author, source, source_context,
+            content='{content}',
+            content_rowid='id',
+            tokenize='{FTS_TOKENIZER}'
+        )
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_fts_insert AFTER INSERT ON quotes BEGIN
+            INSERT INTO quotes_fts(rowid, text, author, source, source_context)
+            VALUES ({values("new")});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_fts_delete AFTER DELETE ON quotes BEGIN
+            INSERT INTO quotes_fts(quotes_fts, rowid, text, author, source, source_context)
+            VALUES ('delete', {values("old")});
+        END
+    """)
+    # Compressing or re-compressing a row changes its bytes but not its tokens
+    unchanged = "" if not decode else f"""
+        WHEN {plain("old.text")} IS NOT {plain("new.text")}
+          OR old.author IS NOT new.author OR old.source IS NOT new.source
+          OR {plain("old.source_context")} IS NOT {plain("new.source_context")}"""
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_fts_update
+        AFTER UPDATE OF text, author, source, source_context ON quotes{unchanged} BEGIN
+            INSERT INTO quotes_fts(quotes_fts, rowid, text, author, source, source_context)
+            VALUES ('delete', {values("old")});
+            INSERT INTO quotes_fts(rowid, text, author, source, source_context)
+            VALUES ({values("new")});
+        END
+    """)
+
+    if not fts_exists:
+        # Persist the BM25 weights so `ORDER BY rank` uses FTS5's fast top-k path
+        weights = ", ".join(str(w) for w in FTS_COLUMN_WEIGHTS)
+        cursor.execute(
+            "INSERT INTO quotes_fts(quotes_fts, rank) VALUES ('rank', ?)",
+            (f"bm25({weights})",)
+        )
+        # Index quotes added before the FTS table existed
+        cursor.execute("INSERT INTO quotes_fts(quotes_fts) VALUES ('rebuild')")
+
+
+def drop_fts_index(cursor: sqlite3.Cursor):
+    """Remove the FTS table and its sync triggers (before re-creating them)"""
+    for trigger in ("quotes_fts_insert", "quotes_fts_delete", "quotes_fts_update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("DROP TABLE IF EXISTS quotes_fts")
+
+
+# ---------------------------------------------------------------------------
+# Migration steps
+# ---------------------------------------------------------------------------
+
+def _schema_v1(cursor: sqlite3.Cursor):
+    """Quotes table, lookup indexes and the FTS5 index kept in sync by triggers"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS quotes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            author TEXT NOT NULL,
+            source TEXT,
+            source_context TEXT,
+            source_year INTEGER,
+            translator TEXT,
+            length_category TEXT CHECK(length_category IN ('bite-sized', 'medium', 'extended')),
+            tradition TEXT,
+            tags TEXT,
+            embedding BLOB,
+            copyright_status TEXT DEFAULT 'public_domain',
+            date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Indexes for faster queries
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_author ON quotes(author)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tradition ON quotes(tradition)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_copyright ON quotes(copyright_status)")
+
+    create_fts_index(cursor)
+
+
+def _schema_v2(cursor: sqlite3.Cursor):
+    """Content hash column for duplicate detection and change tracking"""
+    _add_column(cursor, "quotes", "content_hash", "TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON quotes(content_hash)")
+
+
+def _backfill_v2(rows: List[sqlite3.Row]) -> List[tuple]:
+    """Compute content hashes for a chunk of existing quotes"""
+    return [(content_hash(row["text"], row["author"]), row["id"]) for row in rows]
+
+
+def _facet_delta_sql(row: str, sign: str) -> str:
+    """Trigger statements adding `sign`1 to every facet value of OLD/NEW `row`"""
+    statements = []
+    for facet, column in FACET_COLUMNS.items():
+        statements.append(f"""
+            INSERT INTO facet_counts (facet, value, count)
+            SELECT '{facet}', {row}.{column}, {sign}1 WHERE {row}.{column} IS NOT NULL
+            ON CONFLICT (facet, value) DO UPDATE SET count = count {sign} 1;""")
+    if sign == "-":
+        statements.append("DELETE FROM facet_counts WHERE count <= 0;")
+    return "".join(statements)
+
+
+def _schema_v3(cursor: sqlite3.Cursor):
+    """Canonical authors with aliases, and facet counts maintained by triggers"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS authors (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            key TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS author_aliases (
+            alias_key TEXT PRIMARY KEY,
+            author_id INTEGER NOT NULL REFERENCES authors(id)
+        ) WITHOUT ROWID
+    """)
+    _add_column(cursor, "quotes", "author_id", "INTEGER REFERENCES authors(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_author_id ON quotes(author_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_length_category ON quotes(length_category)")
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'facet_counts'")
+    counts_exist = cursor.fetchone() is not None
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS facet_counts (
+            facet TEXT NOT NULL,
+            value NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (facet, value)
+        ) WITHOUT ROWID
+    """)
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_facets_insert AFTER INSERT ON quotes BEGIN
+            {_facet_delta_sql("new", "+")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_facets_delete AFTER DELETE ON quotes BEGIN
+            {_facet_delta_sql("old", "-")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_facets_update
+        AFTER UPDATE OF {", ".join(FACET_COLUMNS.values())} ON quotes BEGIN
+            {_facet_delta_sql("old", "-")}
+            {_facet_delta_sql("new", "+")}
+        END
+    """)
+
+    if not counts_exist:
+        # author_id is filled in by the backfill, whose updates fire the trigger
+        for facet in ("tradition", "length_category"):
+            column = FACET_COLUMNS[facet]
+            cursor.execute(f"""
+                INSERT INTO facet_counts (facet, value, count)
+                SELECT '{facet}', {column}, COUNT(*) FROM quotes
+                WHERE {column} IS NOT NULL GROUP BY {column}
+            """)
+
+    # Distinct spellings come off idx_author; there are far fewer than quotes
+    cursor.execute("SELECT DISTINCT author FROM quotes")
+    cache = {}
+    for (name,) in cursor.fetchall():
+        resolve_author_id(cursor, name, cache)
+
+
+def _backfill_v3(rows: List[sqlite3.Row]) -> List[tuple]:
+    """Look up the author id of a chunk of existing quotes by normalized name"""
+    return [(author_key(row["author"]), row["id"]) for row in rows]
+
+
+def _facet_position_sql(row: str, action: str, guard: str = "") -> str:
+    """
+    Trigger statements giving OLD/NEW `row` a slot in each facet's positions
+    (`action` "add"), or taking it away (`action` "remove"). `guard` limits
+    them to facets whose column changed, with `{column}` in its place.
+
+    Positions stay dense, 0..count-1 per facet value: a new quote takes the
+    next slot, and a removed quote's slot goes to the value's last quote.
+    """
+    statements = []
+    for facet, column in FACET_COLUMNS.items():
+        condition = guard.format(column=column)
+        value = f"{row}.{column}"
+        slot = (f"(SELECT position FROM facet_positions "
+                f"WHERE facet = '{facet}' AND quote_id = {row}.id)")
+        last = (f"(SELECT MAX(position) FROM facet_positions "
+                f"WHERE facet = '{facet}' AND value = {value})")
+        if action == "add":
+            statements.append(f"""
+                INSERT INTO facet_positions (facet, value, position, quote_id)
+                SELECT '{facet}', {value}, COALESCE({last}, -1) + 1, {row}.id
+                WHERE {value} IS NOT NULL {condition};""")
+        else:
+            # Park the slot at -1 - position so the last quote can take it without a conflict
+            statements.append(f"""
+                UPDATE facet_positions SET position = -1 - position
+                WHERE facet = '{facet}' AND quote_id = {row}.id {condition};
+                UPDATE facet_positions SET position = -1 - {slot}
+                WHERE facet = '{facet}' AND value = {value} AND position = {last}
+                  AND position > -1 - {slot} {condition};
+                DELETE FROM facet_positions
+                WHERE facet = '{facet}' AND quote_id = {row}.id {condition};""")
+    return "".join(statements)
+
+
+def _schema_v4(cursor: sqlite3.Cursor):
+    """Dense per-facet quote positions, so a random facet pick is one index seek"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS facet_positions (
+            facet TEXT NOT NULL,
+            value NOT NULL,
+            position INTEGER NOT NULL,
+            quote_id INTEGER NOT NULL,
+            PRIMARY KEY (facet, value, position)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_facet_positions_quote "
+                   "ON facet_positions(facet, quote_id)")
+
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_positions_insert AFTER INSERT ON quotes BEGIN
+            {_facet_position_sql("new", "add")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_positions_delete AFTER DELETE ON quotes BEGIN
+            {_facet_position_sql("old", "remove")}
+        END
+    """)
+    changed = "AND old.{column} IS NOT new.{column}"
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS quotes_positions_update
+        AFTER UPDATE OF {", ".join(FACET_COLUMNS.values())} ON quotes BEGIN
+            {_facet_position_sql("old", "remove", changed)}
+            {_facet_position_sql("new", "add", changed)}
+        END
+    """)
+
+
+def _backfill_v4(rows: List[sqlite3.Row]) -> List[Dict]:
+    """Facet, value and quote id for every facet value of a chunk of existing quotes"""
+    return [{"facet": facet, "value": row[column], "quote_id": row["id"]}
+            for row in rows for facet, column in FACET_COLUMNS.items()]
+
+
+class Migration:
+    """One schema version step with an optional chunked backfill"""
+
+    def __init__(self,
+                 version: int,
+                 description: str,
+                 schema: Callable[[sqlite3.Cursor], None],
+                 backfill_select: Optional[str] = None,
+                 backfill_update: Optional[str] = None,
+                 backfill: Optional[Callable[[List[sqlite3.Row]],
+                                             List[Union[tuple, Dict]]]] = None):
+        self.version = version
+        self.description = description
+        self.schema = schema
+        # SELECT must filter on `id > ?` and end with `ORDER BY id LIMIT ?`
+        self.backfill_select = backfill_select
+        self.backfill_update = backfill_update
+        self.backfill = backfill
+
+
+MIGRATIONS = [
+    Migration(1, "quotes table, indexes and full-text search", _schema_v1),
+    Migration(
+        2, "content_hash column",
+        _schema_v2,
+        backfill_select="SELECT id, text, author FROM quotes WHERE id > ? ORDER BY id LIMIT ?",
+        backfill_update="UPDATE quotes SET content_hash = ? WHERE id = ?",
+        backfill=_backfill_v2,
+    ),
+    Migration(
+        3, "authors table and facet counts",
+        _schema_v3,
+        backfill_select="""
+            SELECT id, author FROM quotes
+            WHERE id > ? AND author_id IS NULL ORDER BY id LIMIT ?
+        """,
+        backfill_update="""
+            UPDATE quotes
+            SET author_id = (SELECT author_id FROM author_aliases WHERE alias_key = ?)
+            WHERE id = ?
+        """,
+        backfill=_backfill_v3,
+    ),
+    Migration(
+        4, "facet positions",
+        _schema_v4,
+        backfill_select="SELECT id, author_id, tradition, length_category FROM quotes "
+                        "WHERE id > ? ORDER BY id LIMIT ?",
+        # Quotes the triggers already placed (written during the upgrade) are skipped
+        backfill_update="""
+            INSERT INTO facet_positions (facet, value, position, quote_id)
+            SELECT :facet, :value,
+                   COALESCE((SELECT MAX(position) FROM facet_positions
+                             WHERE facet = :facet AND value = :value), -1) + 1,
+                   :quote_id
+            WHERE :value IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM facet_positions WHERE facet = :facet AND quote_id = :quote_id
+            )
+        """,
+        backfill=_backfill_v4,
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version recorded in PRAGMA user_version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn: sqlite3.Connection) -> List[Migration]:
+    """Migrations newer than the database's current schema version"""
+    version = get_schema_version(conn)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def _run_backfill(conn: sqlite3.Connection,
+                  migration: Migration,
+                  chunk_size: int,
+                  progress: Optional[Callable[[Migration, int], None]]):
+    """Apply a migration's backfill chunk by chunk, checkpointing after each one"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS migration_progress (
+            version INTEGER PRIMARY KEY,
+            last_id INTEGER NOT NULL
+        )
+    """)
+    row = conn.execute(
+        "SELECT last_id FROM migration_progress WHERE version = ?", (migration.version,)
+    ).fetchone()
+    last_id = row[0] if row else 0
+
+    while True:
+        rows = conn.execute(migration.backfill_select, (last_id, chunk_size)).fetchall()
+        if not rows:
+            break
+
+        last_id = rows[-1]["id"]
+        # Updates and checkpoint commit together, so a crash never redoes or skips a chunk
+        with conn:
+            conn.executemany(migration.backfill_update, migration.backfill(rows))
+            conn.execute(
+                "INSERT OR REPLACE INTO migration_progress (version, last_id) VALUES (?, ?)",
+                (migration.version, last_id)
+            )
+        if progress:
+            progress(migration, last_id)
+
+
+def migrate(conn: sqlite3.Connection,
+            target: Optional[int] = None,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            progress: Optional[Callable[[Migration, int], None]] = None) -> int:
+    """
+    Bring the database up to `target` (default: latest) and return the new version.
+
+    `progress` is called as progress(migration, last_id) after every backfill chunk.
+    """
+    target = SCHEMA_VERSION if target is None else target
+    row_factory = conn.row_factory
+    conn.row_factory = sqlite3.Row
+
+    try:
+        for migration in pending_migrations(conn):
+            if migration.version > target:
+                break
+
+            with conn:
+                conn.execute("BEGIN")
+                migration.schema(conn.cursor())
+
+            if migration.backfill:
+                _run_backfill(conn, migration, chunk_size, progress)
+
+            with conn:
+                if migration.backfill:
+                    conn.execute("DELETE FROM migration_progress WHERE version = ?",
+                                 (migration.version,))
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+    finally:
+        conn.row_factory = row_factory
+
+    return get_schema_version(conn)
@@ -0,0 +1,223 @@
+"""
+Lightweight startup instrumentation
+
+Code marks its stages with `with span("db.open"):`. When tracing is off
+(the default) `span` hands back one shared no-op context manager, so the
+instrumented hot paths pay a single global lookup and nothing else.
+
+Ways to turn it on:
+
+- `stoic-terminal --profile` prints a stage-by-stage timing tree to stderr
+- STOIC_TERMINAL_TRACE=/path/trace.jsonl appends one JSON record per launch,
+  for aggregating many launches (see `summarize_traces`)
+- STOIC_TERMINAL_CPROFILE=/path/out.pstats dumps full cProfile stats
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+TRACE_ENV = "STOIC_TERMINAL_TRACE"
+CPROFILE_ENV = "STOIC_TERMINAL_CPROFILE"
+
+# Taken when the CLI first imports this module; the gap until tracing starts
+# is reported as the `imports` stage
+MODULE_LOADED_NS = time.perf_counter_ns()
+
+
+class _NullSpan:
+    """Shared do-nothing context manager used while tracing is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """One timed stage; nesting is tracked through its thread's open stack"""
+
+    __slots__ = ("tracer", "name", "thread", "parent", "depth", "start_ns", "end_ns")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+        self.thread = None
+        self.parent = None
+        self.depth = 0
+        self.start_ns = 0
+        self.end_ns = 0
+
+    def __enter__(self):
+        stack = self.tracer.stack
+        self.thread = threading.current_thread().name
+        self.parent = stack[-1] if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        self.tracer.spans.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        self.tracer.stack.pop()
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Tracer:
+    """Collects spans for a single process run"""
+
+    def __init__(self):
+        self.start_ns = time.perf_counter_ns()
+        self.spans: List[_Span] = []
+        # Open spans per thread, so the server's and the writer's threads nest apart
+        self._local = threading.local()
+
+        # Everything between importing the CLI and enabling the tracer
+        imports = _Span(self, "imports")
+        imports.start_ns, imports.end_ns = MODULE_LOADED_NS, self.start_ns
+        self.spans.append(imports)
+
+    @property
+    def stack(self) -> List[_Span]:
+        """The calling thread's open spans, innermost last"""
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def total_ms(self) -> float:
+        return (time.perf_counter_ns() - MODULE_LOADED_NS) / 1e6
+
+    def format_tree(self) -> str:
+        """Render the spans as an indented timing tree"""
+        lines = ["stoic-terminal timing", f"  {'total':40s} {self.total_ms():9.2f} ms"]
+        main = threading.main_thread().name
+        for span in self.spans:
+            label = "  " * span.depth + ("└─ " if span.depth else "") + span.name
+            if span.thread not in (None, main):
+                label += f" [{span.thread}]"
+            lines.append(f"  {label:40s} {span.duration_ms:9.2f} ms")
+        return "\n".join(lines)
+
+    def to_record(self, argv: List[str]) -> Dict:
+        """Serialize this run as one JSONL trace record"""
+        index = {id(span): i for i, span in enumerate(self.spans)}
+        return {
+            "timestamp": time.time(),
+            "pid": os.getpid(),
+            "argv": argv,
+            "total_ms": round(self.total_ms(), 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "parent": index.get(id(span.parent)) if span.parent else None,
+                    "thread": span.thread,
+                    "start_ms": round((span.start_ns - MODULE_LOADED_NS) / 1e6, 3),
+                    "duration_ms": round(span.duration_ms, 3),
+                }
+                for span in self.spans
+            ],
+        }
+
+
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str):
+    """Time a stage when tracing is enabled; free no-op otherwise"""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name)
+
+
+def enable() -> Tracer:
+    """Start collecting spans for this process"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def disable():
+    """Stop tracing and drop collected spans"""
+    global _tracer
+    _tracer = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def finish(argv: List[str], print_tree: bool = False):
+    """Emit the timing tree and/or JSONL record for this run"""
+    if _tracer is None:
+        return
+
+    if print_tree:
+        print(_tracer.format_tree(), file=sys.stderr)
+
+    trace_path = os.environ.get(TRACE_ENV)
+    if trace_path:
+        # One short append per launch; O_APPEND keeps concurrent shells' lines whole
+        with open(trace_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(_tracer.to_record(argv)) + "\n")
+
+
+def summarize_traces(path: str) -> Dict[str, Dict[str, float]]:
+    """Aggregate a JSONL trace file into per-stage p50/p95/max (ms)"""
+    durations: Dict[str, List[float]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            durations.setdefault("total", []).append(record["total_ms"])
+            for span in record["spans"]:
+                durations.setdefault(span["name"], []).append(span["duration_ms"])
+
+    summary = {}
+    for name, samples in durations.items():
+        samples.sort()
+        summary[name] = {
+            "count": len(samples),
+            "p50": samples[len(samples) // 2],
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "max": samples[-1],
+        }
+    return summary
+
+
+def main():
+    """Print per-stage latency percentiles for a JSONL trace file"""
+    if len(sys.argv) != 2:
+        print("Usage: python -m stoic_terminal.profiling TRACE.jsonl")
+        sys.exit(1)
+
+    summary = summarize_traces(sys.argv[1])
+    print(f"  {'stage':28s} {'runs':>6s} {'p50':>10s} {'p95':>10s} {'max':>10s}")
+    for name, stats in summary.items():
+        print(f"  {name:28s} {stats['count']:6d} {stats['p50']:8.2f}ms "
+              f"{stats['p95']:8.2f}ms {stats['max']:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
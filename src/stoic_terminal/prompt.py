@@ -0,0 +1,186 @@
+"""
+Shell-prompt integration that never blocks the prompt
+
+`stoic-terminal shell-init bash` prints hooks to save once and source from
+.bashrc (zsh and fish likewise). They do two cheap things at shell startup:
+
+1. `cat` a quote that was rendered earlier, from the prompt cache
+2. once the first prompt is drawn, start `stoic-terminal prompt-refill` as a
+   detached background job that renders the next quote into the cache
+
+Starting a shell therefore costs one `cat`: no Python, no SQLite, no art
+loading.
+
+Refills are kept from stampeding at two levels:
+
+- The hook starts a refill only if the epoch second in `refill.due` has
+  passed, and first pushes it `LEASE_SECONDS` ahead. This uses shell
+  builtins only, so shells that find a refill under way start no Python
+  at all.
+- The refill takes an exclusive non-blocking lock and gives up at once if
+  another process holds it. It also skips rendering if the cache was
+  refreshed in the last `min_interval` seconds. This guards against
+  shells racing past the lease, or shells without $EPOCHSECONDS.
+
+So when tmux restores thirty panes at once, all thirty show a quote
+immediately and one process touches the database. The frame is replaced
+atomically (temp file and rename), so a shell never `cat`s half a frame.
+
+The very first shell has nothing cached and shows no quote; every shell
+after it does.
+"""
+
+import os
+import shlex
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from .config import PROMPT_CACHE_DIR, PROMPT_MIN_INTERVAL, PROMPT_SHELLS
+from .profiling import span
+
+
+FRAME_FILE = "next.txt"
+LOCK_FILE = "refill.lock"
+DUE_FILE = "refill.due"  # Epoch second before which shells don't start a refill
+SHELLS = PROMPT_SHELLS
+
+# A refill within this many seconds of the last one is skipped
+DEFAULT_MIN_INTERVAL = PROMPT_MIN_INTERVAL
+
+# How long a shell that starts a refill holds off the others (a crashed
+# refill costs at most this long without new quotes)
+LEASE_SECONDS = 30
+
+# The hooks read and write the lease with shell builtins only, so a shell
+# that finds a refill already under way forks nothing
+BASH_INIT = """\
+# stoic-terminal: show the pre-rendered quote, render the next one in the background
+__stoic_terminal_dir={directory}
+[ -r "$__stoic_terminal_dir/{frame}" ] && cat -- "$__stoic_terminal_dir/{frame}"
+__stoic_terminal_refill() {{
+    PROMPT_COMMAND="${{PROMPT_COMMAND#__stoic_terminal_refill;}}"
+    local due=0
+    read -r due 2>/dev/null < "$__stoic_terminal_dir/{due}"
+    if [ -n "$EPOCHSECONDS" ]; then
+        [ "$EPOCHSECONDS" -lt "$due" ] 2>/dev/null && return
+        printf '%s\\n' "$((EPOCHSECONDS + {lease}))" 2>/dev/null > "$__stoic_terminal_dir/{due}"
+    fi
+    ( {command} --width "${{COLUMNS:-80}}" </dev/null >/dev/null 2>&1 & )
+}}
+PROMPT_COMMAND="__stoic_terminal_refill;${{PROMPT_COMMAND}}"
+"""
+
+ZSH_INIT = """\
+# stoic-terminal: show the pre-rendered quote, render the next one in the background
+__stoic_terminal_dir={directory}
+[[ -r $__stoic_terminal_dir/{frame} ]] && cat -- "$__stoic_terminal_dir/{frame}"
+__stoic_terminal_refill() {{
+    precmd_functions=(${{precmd_functions:#__stoic_terminal_refill}})
+    zmodload -F zsh/datetime p:EPOCHSECONDS 2>/dev/null
+    local due=0
+    read -r due 2>/dev/null < $__stoic_terminal_dir/{due}
+    (( EPOCHSECONDS < due )) 2>/dev/null && return
+    print -r -- $(( EPOCHSECONDS + {lease} )) 2>/dev/null > $__stoic_terminal_dir/{due}
+    ( {command} --width "${{COLUMNS:-80}}" </dev/null >/dev/null 2>&1 & )
+}}
+precmd_functions+=(__stoic_terminal_refill)
+"""
+
+FISH_INIT = """\
+# stoic-terminal: show the pre-rendered quote, render the next one in the background
+set -g __stoic_terminal_dir {directory}
+test -r $__stoic_terminal_dir/{frame}; and cat -- $__stoic_terminal_dir/{frame}
+function __stoic_terminal_refill --on-event fish_prompt
+    functions -e __stoic_terminal_refill
+    set -l now (date +%s)
+    set -l due 0
+    test -r $__stoic_terminal_dir/{due}; and read due < $__stoic_terminal_dir/{due}
+    test "$now" -lt "$due" 2>/dev/null; and return
+    math $now + {lease} > $__stoic_terminal_dir/{due} 2>/dev/null
+    {command} --width $COLUMNS </dev/null >/dev/null 2>&1 &
+    disown 2>/dev/null
+end
+"""
+
+
+def frame_path(directory: Path = PROMPT_CACHE_DIR) -> Path:
+    return Path(directory) / FRAME_FILE
+
+
+def shell_init(shell: str, refill_command: List[str], directory: Path = PROMPT_CACHE_DIR) -> str:
+    """The snippet a shell evals at startup; `refill_command` runs `prompt-refill`"""
+    templates = {"bash": BASH_INIT, "zsh": ZSH_INIT, "fish": FISH_INIT}
+    if shell not in templates:
+        raise ValueError(f"Unsupported shell {shell!r}; choose one of {', '.join(SHELLS)}")
+    return templates[shell].format(directory=shlex.quote(str(directory)), frame=FRAME_FILE,
+                                   due=DUE_FILE, lease=LEASE_SECONDS,
+                                   command=shlex.join(refill_command))
+
+
+@contextmanager
+def exclusive_lock(path: Path) -> Iterator[bool]:
+    """Non-blocking exclusive lock; yields False at once if another process holds it"""
+    try:
+        import fcntl
+    except ImportError:
+        yield True  # No flock on this platform: shells there don't run the hooks anyway
+        return
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        yield True
+    finally:
+        os.close(fd)  # Closing releases the lock
+
+
+def detach():
+    """Leave the shell's session and step aside for interactive work"""
+    try:
+        os.setsid()  # No SIGHUP when the terminal that spawned us closes
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def refill(render: Callable[[], Optional[str]],
+           directory: Path = PROMPT_CACHE_DIR,
+           min_interval: float = DEFAULT_MIN_INTERVAL) -> bool:
+    """
+    Render the next prompt quote into the cache unless another process is
+    already doing it or just did. Returns whether a new frame was written.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = frame_path(directory)
+    with exclusive_lock(directory / LOCK_FILE) as locked:
+        if not locked:
+            return False
+        try:
+            try:
+                if time.time() - path.stat().st_mtime < min_interval:
+                    return False
+            except FileNotFoundError:
+                pass
+
+            with span("prompt.render"):
+                frame = render()
+            if frame is None:
+                return False
+            tmp_path = path.with_name(f"{FRAME_FILE}.{os.getpid()}.tmp")
+            tmp_path.write_text(frame, encoding="utf-8")
+            os.replace(tmp_path, path)
+        finally:
+            # Shells may start the next refill once the interval has passed
+            due = int(time.time() + min_interval) + 1
+            (directory / DUE_FILE).write_text(f"{due}\n", encoding="utf-8")
+    return True
@@ -0,0 +1,296 @@
+"""
+Provenance checks for quotes taken from the bundled Gutenberg texts
+
+Each source text gets a line-offset index stored next to it as
+`<file>.lineidx`:
+
+    header    magic + byte order, source size, source mtime_ns, entry count
+    offsets   uint64 byte offset of the start of every line, then the file size
+
+Both the text and its index are memory-mapped. Reading lines 910-913
+therefore slices four lines straight out of the page cache instead of
+re-reading and splitting the whole book. An index whose header no longer
+matches its source's size or mtime is rebuilt. When the directory is not
+writable the index is kept in memory for the run.
+
+Matching compares normalized words: case, accents, punctuation, curly
+quotes and line breaks are ignored. This lets a quote that drops a section
+numeral or re-punctuates a clause still match its lines. A quote that
+isn't in its claimed range (or has none) is looked up across the whole
+book by voting over hashed word shingles (runs of four words): the start
+position most shingles agree on is an exact match when the words line up
+and a fuzzy one otherwise, which tolerates small edits in either text.
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import GUTENBERG_DIR
+from .profiling import span
+
+
+INDEX_SUFFIX = ".lineidx"
+INDEX_MAGIC = b"STLIDX1" + (b"L" if sys.byteorder == "little" else b"B")
+INDEX_HEADER = struct.Struct("=8sQQQ")  # magic, source size, source mtime_ns, entries
+
+# Quoted source name -> bundled Gutenberg text
+SOURCE_FILES = {
+    "Meditations": GUTENBERG_DIR / "meditations.txt",
+    "The Art of War": GUTENBERG_DIR / "data" / "gutenberg_sources" / "art_of_war.txt",
+    "On Benefits": GUTENBERG_DIR / "data" / "gutenberg_sources" / "seneca_letters.txt",
+}
+
+RANGE_SLACK = 3       # Lines of tolerance around a claimed range
+SHINGLE_WORDS = 4     # Words per shingle in the fuzzy search
+FUZZY_THRESHOLD = 0.5  # Share of a quote's shingles that must line up
+
+_QUOTES = re.compile("[‘’ʼ`]")
+_COMBINING = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+_SHINGLE_MULTIPLIER = np.uint64(1_000_003)
+_WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+
+
+def _normalize(text: str) -> str:
+    """Lowercased text without accents or curly quotes; line breaks are kept"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return _COMBINING.sub("", unicodedata.normalize("NFKD", _QUOTES.sub("'", text)))
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercase words without accents or punctuation ("Man’s" -> "man's")"""
+    return _WORD.findall(_normalize(text))
+
+
+def parse_line_range(claim: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(first, last) from "910-913" or "1085"; None for missing or unparseable claims"""
+    if not claim:
+        return None
+    match = re.fullmatch(r"\s*(\d+)\s*(?:-\s*(\d+))?\s*", str(claim))
+    if not match:
+        return None
+    first = int(match.group(1))
+    last = int(match.group(2) or first)
+    return (first, last) if first <= last else (last, first)
+
+
+def _shingle_keys(words: List[str], size: int) -> np.ndarray:
+    """64-bit key of every run of `size` consecutive words (collisions are negligible)"""
+    hashes = np.fromiter(map(hash, words), dtype=np.int64, count=len(words)).view(np.uint64)
+    count = max(len(words) - size + 1, 0)
+    keys = np.zeros(count, dtype=np.uint64)
+    for i in range(size):
+        keys = keys * _SHINGLE_MULTIPLIER + hashes[i:i + count]  # Wraps mod 2**64
+    return keys
+
+
+def _scan_offsets(data) -> array:
+    """Start offset of every line, followed by the total size"""
+    offsets = array("Q", [0])
+    position = data.find(b"\n")
+    while position != -1:
+        offsets.append(position + 1)
+        position = data.find(b"\n", position + 1)
+    if offsets[-1] != len(data):
+        offsets.append(len(data))  # Last line has no newline
+    return offsets
+
+
+class SourceText:
+    """A memory-mapped source text with its persistent line-offset index"""
+
+    def __init__(self, path: Path, index_path: Optional[Path] = None):
+        self.path = Path(path)
+        self.index_path = Path(index_path) if index_path else self.path.with_name(
+            self.path.name + INDEX_SUFFIX
+        )
+        self._file = open(self.path, "rb")
+        self._index_file = None
+        self._index_map = None
+        self._words: Optional[List[str]] = None
+        self._word_lines: Optional[array] = None
+        self._shingles: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self.data = b""
+        self.offsets = None
+        try:
+            stat = os.fstat(self._file.fileno())
+            if stat.st_size:
+                self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            with span("provenance.index"):
+                self.offsets = self._load_index(stat) or self._build_index(stat)
+        except BaseException:
+            self.close()
+            raise
+
+    def _load_index(self, stat: os.stat_result):
+        """Offsets from a current index file, or None when it is missing or stale"""
+        try:
+            index_file = open(self.index_path, "rb")
+        except OSError:
+            return None
+        try:
+            header = index_file.read(INDEX_HEADER.size)
+            if len(header) < INDEX_HEADER.size:
+                return None
+            magic, size, mtime_ns, entries = INDEX_HEADER.unpack(header)
+            expected = INDEX_HEADER.size + entries * 8
+            if (magic, size, mtime_ns) != (INDEX_MAGIC, stat.st_size, stat.st_mtime_ns) or \
+                    os.fstat(index_file.fileno()).st_size != expected:
+                return None
+            self._index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            if self._index_map is None:
+                index_file.close()
+        self._index_file = index_file
+        return memoryview(self._index_map)[INDEX_HEADER.size:].cast("Q")
+
+    def _build_index(self, stat: os.stat_result) -> array:
+        """Scan the text for line starts and save them (best effort) for the next run"""
+        offsets = _scan_offsets(self.data)
+        header = INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets))
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(offsets.tobytes())
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)  # Read-only checkout: keep it in memory
+        return offsets
+
+    def __enter__(self) -> "SourceText":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def lines(self, first: int, last: int) -> str:
+        """Text of lines first..last (1-based, inclusive, clamped to the file)"""
+        first = max(first, 1)
+        last = min(last, self.line_count)
+        if first > last:
+            return ""
+        return self.data[self.offsets[first - 1]:self.offsets[last]].decode("utf-8", "replace")
+
+    def _load_words(self):
+        """Normalized words of the whole book and the line each one is on"""
+        with span("provenance.words"):
+            text = _normalize(self.data[:].decode("utf-8", "replace"))
+            words: List[str] = []
+            word_lines = array("I")
+            for line, line_text in enumerate(text.split("\n"), 1):
+                line_words = _WORD.findall(line_text)
+                words += line_words
+                word_lines.extend([line] * len(line_words))
+        self._words, self._word_lines = words, word_lines
+
+    def _shingle_index(self, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted shingle keys of the book and the word position of each, built once per size"""
+        if size not in self._shingles:
+            with span("provenance.shingles"):
+                keys = _shingle_keys(self._words, size)
+                order = np.argsort(keys, kind="stable")
+            self._shingles[size] = (keys[order], order)
+        return self._shingles[size]
+
+    def _line_span(self, start: int, length: int) -> Tuple[int, int]:
+        return self._word_lines[start], self._word_lines[start + length - 1]
+
+    def find(self, quote: str) -> Optional[Dict]:
+        """
+        Best place for `quote` in the whole book:
+        {"first", "last", "score"}, score 1.0 for an exact word match
+        """
+        wanted = normalize_words(quote)
+        if not wanted:
+            return None
+        if self._words is None:
+            self._load_words()
+
+        size = min(SHINGLE_WORDS, len(wanted))
+        book_keys, positions = self._shingle_index(size)
+        shingles = _shingle_keys(wanted, size)
+        lo = np.searchsorted(book_keys, shingles, side="left")
+        hi = np.searchsorted(book_keys, shingles, side="right")
+        votes: Counter = Counter()
+        for offset in np.flatnonzero(hi > lo):
+            for position in positions[lo[offset]:hi[offset]]:
+                votes[int(position) - int(offset)] += 1
+        if not votes:
+            return None
+
+        start, count = votes.most_common(1)[0]
+        start = min(max(start, 0), len(self._words) - 1)
+        length = min(len(wanted), len(self._words) - start)
+        if self._words[start:start + length] == wanted:
+            first, last = self._line_span(start, length)
+            return {"first": first, "last": last, "score": 1.0}
+        score = count / len(shingles)
+        if score < FUZZY_THRESHOLD:
+            return None
+        first, last = self._line_span(start, length)
+        return {"first": first, "last": last, "score": score}
+
+    def verify(self, quote: str, claim: Optional[str] = None) -> Dict:
+        """
+        Check a quote against its claimed line range, then the whole book.
+
+        Returns {"status", "claimed", "found", "score"} where status is
+        "verified" (in the claimed lines), "moved" (verbatim elsewhere),
+        "unclaimed" (verbatim, no range given), "fuzzy" (close match only)
+        or "missing".
+        """
+        claimed = parse_line_range(claim)
+        wanted = " ".join(normalize_words(quote))
+        if claimed and wanted:
+            window = self.lines(claimed[0] - RANGE_SLACK, claimed[1] + RANGE_SLACK)
+            if wanted in " ".join(normalize_words(window)):
+                return {"status": "verified", "claimed": claimed, "found": claimed, "score": 1.0}
+
+        match = self.find(quote)
+        if match is None:
+            return {"status": "missing", "claimed": claimed, "found": None, "score": 0.0}
+        found = (match["first"], match["last"])
+        if match["score"] < 1.0:
+            status = "fuzzy"
+        else:
+            status = "moved" if claimed else "unclaimed"
+        return {"status": status, "claimed": claimed, "found": found, "score": match["score"]}
+
+    def close(self):
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()  # The index map can't close while a view is exported
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_map = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+
+def open_sources(sources: Optional[Dict[str, Path]] = None) -> Dict[str, SourceText]:
+    """SourceText for every bundled source file that exists"""
+    texts = {}
+    for name, path in (sources or SOURCE_FILES).items():
+        if Path(path).exists():
+            texts[name] = SourceText(path)
+    return texts
@@ -0,0 +1,105 @@
+"""
+Diversity-aware re-ranking
+
+Semantically clustered quotes (Marcus Aurelius alone has dozens on
+mortality and time) crowd out everything else in a plain top-k. Maximal
+marginal relevance picks each next result by
+
+    lambda * sim(query, d) - (1 - lambda) * max(sim(d, s) for s in selected)
+
+and keeps the max-similarity term as a vector that is updated with one
+matrix-vector product per pick, so k picks from n candidates cost O(k·n·dim)
+in numpy rather than O(k²·n) Python-level comparisons.
+"""
+
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from .embeddings import EmbeddingMatrix, VectorFile
+
+
+DEFAULT_LAMBDA = 0.7
+DEFAULT_CANDIDATES = 100
+
+
+def _codes(labels: Sequence) -> np.ndarray:
+    """Integer code per label, so constraints become vectorized masks"""
+    return np.unique(np.array([label or "" for label in labels], dtype=object),
+                     return_inverse=True)[1]
+
+
+def mmr(query: np.ndarray,
+        vectors: np.ndarray,
+        k: int,
+        lambda_: float = DEFAULT_LAMBDA,
+        authors: Optional[Sequence[str]] = None,
+        sources: Optional[Sequence[Optional[str]]] = None,
+        max_per_author: Optional[int] = None,
+        max_per_source: Optional[int] = None) -> List[int]:
+    """
+    Select up to k diverse rows of `vectors` (normalized) for `query`.
+
+    `max_per_author` / `max_per_source` cap how many picks may share an
+    author or source; fewer than k rows come back if the caps exhaust the
+    candidates. Returns row indices in selection order.
+    """
+    n = len(vectors)
+    relevance = vectors @ query
+    redundancy = None  # max similarity of each candidate to anything selected
+    available = np.ones(n, dtype=bool)
+
+    author_codes = _codes(authors) if authors is not None and max_per_author else None
+    source_codes = _codes(sources) if sources is not None and max_per_source else None
+    author_counts = np.zeros(n, dtype=np.int64)
+    source_counts = np.zeros(n, dtype=np.int64)
+
+    selected = []
+    while len(selected) < k and available.any():
+        if redundancy is None:
+            scores = lambda_ * relevance
+        else:
+            scores = lambda_ * relevance - (1 - lambda_) * redundancy
+        best = int(np.argmax(np.where(available, scores, -np.inf)))
+
+        selected.append(best)
+        available[best] = False
+
+        similarity = vectors @ vectors[best]
+        redundancy = similarity if redundancy is None else np.maximum(redundancy, similarity)
+
+        if author_codes is not None:
+            code = author_codes[best]
+            author_counts[code] += 1
+            if author_counts[code] >= max_per_author:
+                available &= author_codes != code
+        if source_codes is not None and sources[best]:
+            code = source_codes[best]
+            source_counts[code] += 1
+            if source_counts[code] >= max_per_source:
+                available &= source_codes != code
+
+    return selected
+
+
+def diverse_top_k(matrix: Union[EmbeddingMatrix, VectorFile],
+                  query: np.ndarray,
+                  k: int,
+                  candidates: int = DEFAULT_CANDIDATES,
+                  lambda_: float = DEFAULT_LAMBDA,
+                  max_per_author: Optional[int] = None,
+                  max_per_source: Optional[int] = None) -> List[int]:
+    """Quote ids of k diverse results, re-ranked from the top `candidates` by similarity"""
+    pool = matrix.top_n(query, max(k, candidates))
+    authors, sources = matrix.labels(pool)
+    picks = mmr(
+        query,
+        matrix.rows(pool),
+        k,
+        lambda_=lambda_,
+        authors=authors,
+        sources=sources,
+        max_per_author=max_per_author,
+        max_per_source=max_per_source,
+    )
+    return [int(matrix.ids[pool[i]]) for i in picks]
@@ -0,0 +1,294 @@
+"""
+Precomputed quote-of-the-day schedule
+
+Every terminal that reads the same schedule file shows the same quote all
+day, with no shared service and no `ORDER BY RANDOM()` per shell. The
+calendar is planned once from the `quotes` table and stored as a flat
+binary array indexed by day number:
+
+    header:  magic (8 bytes) | start day <I (date ordinal) | days <I | window <I
+             | seed <I | quote count <I | max quote id <I | database identity <I
+    days:    little-endian uint32 quote id per day, day i at header + i * 4
+             (0 = nothing scheduled)
+
+Today's quote is one seek and one 4-byte read (`scheduled_id`). The
+identity (`database_identity`) ties the ids to the database they were
+planned from. A schedule is only read for that database, so `--db other.db
+--today` never shows whatever quote happens to have the same id.
+
+Planning is deterministic for a given database, seed and start day. Quotes
+are picked hierarchically, first tradition, then author within the
+tradition, then length_category. At each level the value furthest behind
+its share of the whole corpus is picked next, so every stretch of the
+calendar mirrors the corpus mix of all three instead of clustering.
+Within a bucket quotes come in a seeded shuffled order. A quote is never
+repeated within `window` days; the window is clamped below the corpus
+size.
+
+When quotes are added, `update_schedule` keeps every day up to today as
+it was and re-plans only the days after it. It also extends a rolling
+calendar that is running out.
+"""
+
+import random
+import struct
+import zlib
+from collections import Counter, deque
+from datetime import date
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from .config import SCHEDULE_DAYS, SCHEDULE_WINDOW
+from .profiling import span
+
+
+SCHEDULE_MAGIC = b"STQDAY2\n"
+HEADER = struct.Struct("<8sIIIIIII")
+DAY_ENTRY = struct.Struct("<I")
+NO_QUOTE = 0
+
+DEFAULT_DAYS = SCHEDULE_DAYS
+DEFAULT_WINDOW = SCHEDULE_WINDOW
+DEFAULT_HORIZON = 90  # `update_schedule` keeps at least this many days planned ahead
+IDENTITY_QUOTES = 16  # Oldest quotes whose content hashes identify a database
+
+
+class _Node:
+    """One value at one level of the tradition → author → length tree"""
+
+    def __init__(self, parent: Optional["_Node"], level: int, value: str, key: str, seed: int):
+        self.parent = parent
+        self.level = level
+        self.value = value
+        self.key = key
+        # Seeded tie-break, so equal deficits don't resolve alphabetically
+        self.rank = random.Random(f"{seed}:{key}").random()
+        self.children: Dict[str, "_Node"] = {}
+        self.ids: List[int] = []                 # A leaf's quotes, in id order
+        self.queue: Optional[Deque[int]] = None  # ...shuffled on first use
+
+
+class _Planner:
+    """Greedy balanced picker with a no-repeat window"""
+
+    def __init__(self, rows: Sequence[Tuple[int, str, str, str]], window: int, seed: int,
+                 keep: Sequence[int] = ()):
+        self.seed = seed
+        self.root = _Node(None, -1, "", "", seed)
+        self.last_day: Dict[int, int] = {}
+        self.window = max(0, min(window, len(rows) - 1))
+        self.total = len(rows)
+        self.days = 0
+        # Corpus count and days served per value, per level
+        self.weight: List[Counter] = [Counter() for _ in range(3)]
+        self.served: List[Counter] = [Counter() for _ in range(3)]
+
+        # One pass over the corpus into buckets; only kept quotes need their bucket by id
+        buckets: Dict[Tuple[str, str, str], List[int]] = {}
+        kept = set(keep)
+        kept_buckets: Dict[int, Tuple[str, str, str]] = {}
+        for quote_id, *values in rows:
+            values = tuple(value or "" for value in values)
+            buckets.setdefault(values, []).append(quote_id)
+            if quote_id in kept:
+                kept_buckets[quote_id] = values
+
+        leaves: Dict[Tuple[str, str, str], _Node] = {}
+        for values, ids in buckets.items():
+            node = self.root
+            for level, value in enumerate(values):
+                if value not in node.children:
+                    node.children[value] = _Node(node, level, value,
+                                                   f"{node.key}/{value}", seed)
+                node = node.children[value]
+                self.weight[level][value] += len(ids)
+            node.ids = ids
+            leaves[values] = node
+        self.leaf_of = {quote_id: leaves[values] for quote_id, values in kept_buckets.items()}
+
+    def _queue(self, leaf: _Node) -> Deque[int]:
+        if leaf.queue is None:
+            ids = list(leaf.ids)
+            random.Random(f"{self.seed}:{leaf.key}").shuffle(ids)
+            leaf.queue = deque(ids)
+        return leaf.queue
+
+    def _eligible(self, quote_id: int, day: int) -> bool:
+        last = self.last_day.get(quote_id)
+        return last is None or day - last > self.window
+
+    def take(self, quote_id: int, day: int, leaf: Optional[_Node] = None):
+        """Record a quote as shown on `day` (a pick, or a kept day of an older plan)"""
+        leaf = leaf or self.leaf_of.get(quote_id)
+        if leaf is None:
+            return  # Deleted since the kept days were planned
+        node = leaf
+        for level in range(leaf.level, -1, -1):
+            self.served[level][node.value] += 1
+            node = node.parent
+        self.days += 1
+        queue = self._queue(leaf)
+        queue.remove(quote_id)
+        queue.append(quote_id)  # Back of its bucket's queue
+        self.last_day[quote_id] = day
+
+    def _pick_from(self, node: _Node, day: int) -> Optional[Tuple[int, _Node]]:
+        if not node.children:
+            for quote_id in self._queue(node):
+                if self._eligible(quote_id, day):
+                    return quote_id, node
+            return None
+
+        # Furthest behind its corpus share (at its level) first
+        def deficit(child: _Node) -> Tuple[float, float]:
+            share = self.weight[child.level][child.value] / self.total
+            return (share * (self.days + 1) - self.served[child.level][child.value], child.rank)
+
+        for child in sorted(node.children.values(), key=deficit, reverse=True):
+            picked = self._pick_from(child, day)
+            if picked is not None:
+                return picked
+        return None
+
+    def pick(self, day: int) -> int:
+        picked = self._pick_from(self.root, day)
+        if picked is None:
+            return NO_QUOTE
+        self.take(picked[0], day, picked[1])
+        return picked[0]
+
+
+def database_identity(db) -> int:
+    """
+    crc32 of the oldest quotes' content hashes: unchanged as quotes are
+    added, different for another corpus (a few rows off the primary key)
+    """
+    rows = db.conn.execute("SELECT content_hash FROM quotes ORDER BY id LIMIT ?",
+                           (IDENTITY_QUOTES,)).fetchall()
+    return zlib.crc32("\n".join(row[0] or "" for row in rows).encode())
+
+
+def schedule_rows(db) -> List[Tuple[int, str, str, str]]:
+    """(id, tradition, author, length_category) for every quote, in id order"""
+    return db.conn.execute("""
+        SELECT id, tradition, COALESCE(CAST(author_id AS TEXT), author), length_category
+        FROM quotes ORDER BY id
+    """).fetchall()
+
+
+def plan(rows: Sequence[Tuple[int, str, str, str]],
+         days: int,
+         window: int = DEFAULT_WINDOW,
+         seed: int = 0,
+         keep: Sequence[int] = ()) -> List[int]:
+    """
+    Quote ids for `days` consecutive days. The first len(keep) days are
+    `keep` unchanged, and planning continues as if they had been picked.
+    """
+    planner = _Planner(rows, window, seed, keep)
+    ids = []
+    for day in range(days):
+        if day < len(keep):
+            planner.take(keep[day], day)
+            ids.append(keep[day])
+        else:
+            ids.append(planner.pick(day))
+    return ids
+
+
+def read_schedule(path: Path) -> Optional[Dict]:
+    """Header fields and the quote ids of a schedule file, or None if missing or invalid"""
+    try:
+        data = Path(path).read_bytes()
+        magic, start, days, window, seed, count, max_id, identity = HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    body = data[HEADER.size:HEADER.size + days * DAY_ENTRY.size]
+    if magic != SCHEDULE_MAGIC or len(body) != days * DAY_ENTRY.size:
+        return None
+    ids = list(struct.unpack(f"<{days}I", body))
+    return {"start": date.fromordinal(start), "days": days, "window": window, "seed": seed,
+            "count": count, "max_id": max_id, "identity": identity, "ids": ids}
+
+
+def write_schedule(path: Path, start: date, ids: List[int], window: int, seed: int,
+                   count: int, max_id: int, identity: int):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(SCHEDULE_MAGIC, start.toordinal(), len(ids), window, seed,
+                            count, max_id, identity))
+        f.write(struct.pack(f"<{len(ids)}I", *ids))
+    tmp_path.replace(path)
+
+
+def build_schedule(db, path: Path,
+                   start: Optional[date] = None,
+                   days: int = DEFAULT_DAYS,
+                   window: int = DEFAULT_WINDOW,
+                   seed: int = 0) -> Dict:
+    """Plan a fresh calendar (default: a year from January 1st) and write it"""
+    start = start or date.today().replace(month=1, day=1)
+    with span("schedule.build"):
+        rows = schedule_rows(db)
+        ids = plan(rows, days, window, seed)
+    max_id = rows[-1][0] if rows else 0
+    write_schedule(path, start, ids, window, seed, len(rows), max_id, database_identity(db))
+    return {"start": start, "days": days, "planned": days, "count": len(rows)}
+
+
+def update_schedule(db, path: Path,
+                    today: Optional[date] = None,
+                    horizon: int = DEFAULT_HORIZON) -> Dict:
+    """
+    Bring an existing schedule up to date (builds one if there is none, or
+    if it was planned from another database).
+
+    Days up to and including today never change. Later days are re-planned
+    only if quotes were added or removed. The calendar is extended when
+    fewer than `horizon` days are left.
+    """
+    current = read_schedule(path)
+    identity = database_identity(db)
+    if current is None or current["identity"] != identity:
+        return build_schedule(db, path)
+
+    today = today or date.today()
+    rows = schedule_rows(db)
+    max_id = rows[-1][0] if rows else 0
+    changed = (len(rows), max_id) != (current["count"], current["max_id"])
+    ahead = current["days"] - (today - current["start"]).days - 1
+    days = current["days"] + max(0, horizon - ahead)
+    if not changed and days == current["days"]:
+        return {"start": current["start"], "days": days, "planned": 0, "count": len(rows)}
+
+    kept = current["ids"]
+    if changed:
+        kept = kept[:max(0, (today - current["start"]).days + 1)]
+    with span("schedule.update"):
+        ids = plan(rows, days, current["window"], current["seed"], keep=kept)
+    write_schedule(path, current["start"], ids, current["window"], current["seed"],
+                   len(rows), max_id, identity)
+    return {"start": current["start"], "days": days, "planned": days - len(kept),
+            "count": len(rows)}
+
+
+def scheduled_id(path: Path, identity: int, day: Optional[date] = None) -> Optional[int]:
+    """
+    Quote id scheduled for `day` (default today), or None if the schedule
+    doesn't cover it or was planned from another database than `identity`
+    """
+    day = day or date.today()
+    try:
+        with open(path, "rb") as f:
+            magic, start, days, *_, built_for = HEADER.unpack(f.read(HEADER.size))
+            index = day.toordinal() - start
+            if magic != SCHEDULE_MAGIC or built_for != identity or not 0 <= index < days:
+                return None
+            f.seek(HEADER.size + index * DAY_ENTRY.size)
+            (quote_id,) = DAY_ENTRY.unpack(f.read(DAY_ENTRY.size))
+    except (OSError, struct.error):
+        return None
+    return quote_id if quote_id != NO_QUOTE else None
+
@@ -0,0 +1,263 @@
+"""
+Local HTTP/JSON quote service
+
+One long-lived process serves every local consumer (chat bot, dashboards,
+terminal splash), instead of each opening the database and paying schema
+checks and lock contention. Requests are handled on threads; each borrows
+one of a fixed pool of read-only SQLite connections. Semantic search uses
+an embedding matrix loaded once on first use. Deterministic responses are
+kept in an LRU cache, so hot queries never reach SQLite.
+
+Endpoints (GET, JSON):
+
+    /random?tags=a,b&mode=all&exclude=1,2
+                               random quote, optionally with the tags (mode: any |
+                               all), avoiding the excluded ids while others remain
+    /tags?tags=a,b&mode=all    quotes by tag (mode: any | all)
+    /search?q=...&limit=10     full-text search (BM25)
+    /semantic?q=...&limit=10&diversity=0.3
+                               embedding search, MMR-diversified
+    /health                    pool and cache statistics
+"""
+
+import json
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .database import QuoteDatabase
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CACHE_SIZE = 1024
+MAX_LIMIT = 100
+
+
+class ReadPool:
+    """Fixed set of read-only connections, borrowed one per request"""
+
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE):
+        self.size = size
+        self._idle: "queue.Queue[QuoteDatabase]" = queue.Queue()
+        for _ in range(size):
+            self._idle.put(QuoteDatabase(db_path, read_only=True, check_same_thread=False))
+
+    @contextmanager
+    def connection(self) -> Iterator[QuoteDatabase]:
+        db = self._idle.get()  # Blocks while every connection is busy
+        try:
+            yield db
+        finally:
+            self._idle.put(db)
+
+    @property
+    def idle(self) -> int:
+        return self._idle.qsize()
+
+    def close(self):
+        for _ in range(self.size):
+            self._idle.get().close()
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded responses"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: str, body: bytes):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _public(quote: Dict) -> Dict:
+    """Quote fields safe to serialize (the embedding BLOB is not)"""
+    return {key: value for key, value in quote.items() if key != 'embedding'}
+
+
+class QuoteService:
+    """Endpoint logic, independent of the HTTP plumbing"""
+
+    def __init__(self, db_path: str, pool_size: int = DEFAULT_POOL_SIZE,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.pool = ReadPool(db_path, pool_size)
+        self.cache = ResponseCache(cache_size)
+        self._matrix = None
+        self._matrix_lock = threading.Lock()
+
+    def embedding_matrix(self):
+        """Load the embedding matrix once, on first semantic query"""
+        with self._matrix_lock:
+            if self._matrix is None:
+                from .embeddings import EmbeddingMatrix
+
+                with self.pool.connection() as db:
+                    self._matrix = EmbeddingMatrix.from_database(db)
+            return self._matrix
+
+    def handle(self, path: str, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """Return (status, payload) for one request"""
+        limit = max(1, min(int(params.get("limit", 10)), MAX_LIMIT))
+        tags = [tag for tag in params.get("tags", "").split(",") if tag]
+
+        if path == "/random":
+            exclude = {int(quote_id) for quote_id in params.get("exclude", "").split(",")
+                       if quote_id}
+            with self.pool.connection() as db:
+                if tags:
+                    # SQLite keeps a few candidates while it scans, never the whole match list
+                    quote = db.get_random_quote_by_tags(tags, params.get("mode", "any"),
+                                                        exclude=exclude)
+                else:
+                    quote = db.get_random_quote(exclude=exclude)
+            if not quote:
+                return 404, {"error": "no matching quote"}
+            return 200, {"quote": _public(quote)}
+
+        if path == "/tags":
+            if not tags:
+                return 400, {"error": "tags parameter is required"}
+            mode = params.get("mode", "any")
+            with self.pool.connection() as db:
+                # One page of decoded rows; the total is counted without building the rest
+                quotes = list(islice(db.iter_search_by_tags(tags, mode), limit))
+                count = db.count_by_tags(tags, mode)
+            return 200, {"count": count, "quotes": [_public(q) for q in quotes]}
+
+        if path == "/search":
+            if not params.get("q"):
+                return 400, {"error": "q parameter is required"}
+            with self.pool.connection() as db:
+                quotes = db.search_text(params["q"], limit=limit)
+            return 200, {"quotes": [_public(q) for q in quotes]}
+
+        if path == "/semantic":
+            return self._semantic(params, limit)
+
+        if path == "/health":
+            return 200, {"pool_size": self.pool.size, "idle": self.pool.idle,
+                         "cache": {"entries": len(self.cache), "hits": self.cache.hits,
+                                   "misses": self.cache.misses}}
+
+        return 404, {"error": f"unknown endpoint {path}"}
+
+    def _semantic(self, params: Dict[str, str], limit: int) -> Tuple[int, Dict]:
+        if not params.get("q"):
+            return 400, {"error": "q parameter is required"}
+        try:
+            from .embeddings import query_encoder
+            from .ranking import diverse_top_k
+
+            matrix = self.embedding_matrix()
+            query = query_encoder()([params["q"]])[0]
+        except ImportError:
+            return 503, {"error": "semantic search needs numpy and sentence-transformers"}
+        except FileNotFoundError:
+            return 503, {"error": "no static query encoder; run `stoic-terminal distill`"}
+        if not len(matrix):
+            return 503, {"error": "no quote embeddings; run `stoic-terminal embed`"}
+
+        diversity = float(params.get("diversity", 0.3))
+        ids = diverse_top_k(matrix, query, limit, lambda_=1 - diversity, max_per_author=2)
+        with self.pool.connection() as db:
+            quotes = db.get_quotes_by_ids(ids)
+        return 200, {"quotes": [_public(q) for q in quotes]}
+
+    def close(self):
+        self.pool.close()
+
+
+# Endpoints whose answer depends only on the query string
+CACHEABLE = {"/tags", "/search", "/semantic"}
+
+
+class QuoteRequestHandler(BaseHTTPRequestHandler):
+    """Thin HTTP adapter around QuoteService"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive: clients reuse one socket
+    # Headers and body go out in separate writes; with Nagle on, delayed ACKs
+    # add ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+    service: QuoteService = None  # Set by make_server
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        cache_key = self.path if url.path in CACHEABLE else None
+
+        body = self.service.cache.get(cache_key) if cache_key else None
+        status = 200
+        if body is None:
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                status, payload = self.service.handle(url.path, params)
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            if cache_key and status == 200:
+                self.service.cache.put(cache_key, body)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Per-request logging would dominate the latency budget
+
+
+def make_server(db_path: str,
+                host: str = DEFAULT_HOST,
+                port: int = DEFAULT_PORT,
+                pool_size: int = DEFAULT_POOL_SIZE,
+                cache_size: int = DEFAULT_CACHE_SIZE) -> ThreadingHTTPServer:
+    """Build (but don't start) a server bound to host:port"""
+    service = QuoteService(db_path, pool_size, cache_size)
+    handler = type("Handler", (QuoteRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve(db_path: str, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          pool_size: int = DEFAULT_POOL_SIZE, cache_size: int = DEFAULT_CACHE_SIZE):
+    """Run the server until interrupted"""
+    server = make_server(db_path, host, port, pool_size, cache_size)
+    print(f"Serving quotes from {db_path} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
@@ -0,0 +1,241 @@
+"""
+Static-embedding query encoder: all-MiniLM-L6-v2 without torch
+
+A query vector is the mean of per-token vectors looked up in a table,
+L2-normalized. The table is distilled once from the full model (each
+WordPiece token run through MiniLM on its own), weighted so frequent tokens
+count less, and optionally aligned to the stored quote embeddings with a
+ridge-regression map. Both steps are linear, so they are folded into the
+table itself and encoding stays a lookup plus a mean.
+
+The table lives in a directory next to the other build artifacts:
+
+    vocab.txt      the model's WordPiece vocabulary, one token per line
+    vectors.npy    (vocab size, 384) float16, memory-mapped on load
+
+Encoding needs only numpy; building the table needs sentence-transformers.
+"""
+
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .config import STATIC_ENCODER_DIR
+from .database import QuoteDatabase
+from .embeddings import EMBEDDING_DTYPE, MODEL_NAME, EmbeddingMatrix, load_model, normalize
+from .profiling import span
+
+
+VOCAB_FILE = "vocab.txt"
+VECTORS_FILE = "vectors.npy"
+UNKNOWN_TOKEN = "[UNK]"
+MAX_WORD_CHARS = 100  # Longer "words" are [UNK] in BERT's WordPiece as well
+
+# Smooth inverse frequency weight a / (a + p(token)), as in SIF sentence embeddings
+SIF_A = 1e-3
+DEFAULT_RIDGE = 0.01  # Relative to the mean squared pooled feature
+
+
+def _is_punctuation(ch: str) -> bool:
+    """BERT's definition: ASCII symbols count, not only Unicode P* categories"""
+    code = ord(ch)
+    if 33 <= code <= 47 or 58 <= code <= 64 or 91 <= code <= 96 or 123 <= code <= 126:
+        return True
+    return unicodedata.category(ch).startswith("P")
+
+
+def basic_tokens(text: str) -> List[str]:
+    """Lowercase, strip accents and split on whitespace and punctuation (uncased BERT)"""
+    text = unicodedata.normalize("NFD", text.lower())
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    tokens = []
+    for word in text.split():
+        start = 0
+        for i, ch in enumerate(word):
+            if _is_punctuation(ch):
+                if start < i:
+                    tokens.append(word[start:i])
+                tokens.append(ch)
+                start = i + 1
+        if start < len(word):
+            tokens.append(word[start:])
+    return tokens
+
+
+class StaticEncoder:
+    """Token table plus a minimal WordPiece tokenizer"""
+
+    def __init__(self, vocab: List[str], vectors: np.ndarray):
+        if len(vocab) != len(vectors):
+            raise ValueError(f"{len(vocab)} vocab entries but {len(vectors)} vectors")
+        self.tokens = list(vocab)
+        self.vocab = {token: i for i, token in enumerate(vocab)}
+        self.vectors = vectors
+        self._word_cache: Dict[str, List[int]] = {}
+
+    @classmethod
+    def load(cls, directory: Path = STATIC_ENCODER_DIR) -> "StaticEncoder":
+        directory = Path(directory)
+        with span("static_encoder.load"):
+            vocab = (directory / VOCAB_FILE).read_text(encoding="utf-8").split("\n")
+            if vocab and vocab[-1] == "":
+                vocab.pop()
+            # Memory-mapped: only rows for tokens actually queried are paged in
+            vectors = np.load(directory / VECTORS_FILE, mmap_mode="r")
+        return cls(vocab, vectors)
+
+    def save(self, directory: Path = STATIC_ENCODER_DIR):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / VOCAB_FILE).write_text("\n".join(self.tokens) + "\n", encoding="utf-8")
+        np.save(directory / VECTORS_FILE, np.asarray(self.vectors, dtype=np.float16))
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def word_ids(self, word: str) -> List[int]:
+        """Greedy longest-match-first WordPiece split of one basic token"""
+        cached = self._word_cache.get(word)
+        if cached is not None:
+            return cached
+
+        ids = []
+        if len(word) <= MAX_WORD_CHARS:
+            start = 0
+            while start < len(word):
+                end = len(word)
+                while end > start:
+                    piece = word[start:end] if start == 0 else "##" + word[start:end]
+                    if piece in self.vocab:
+                        ids.append(self.vocab[piece])
+                        break
+                    end -= 1
+                else:
+                    ids = []  # Any unmatched remainder makes the whole word unknown
+                    break
+                start = end
+
+        if not ids and UNKNOWN_TOKEN in self.vocab:
+            ids = [self.vocab[UNKNOWN_TOKEN]]
+        if len(self._word_cache) < 100_000:
+            self._word_cache[word] = ids
+        return ids
+
+    def token_ids(self, text: str) -> List[int]:
+        return [i for word in basic_tokens(text) for i in self.word_ids(word)]
+
+    def encode(self, texts: Iterable[str]) -> np.ndarray:
+        """Embed texts as a normalized (n, dim) float32 matrix, like `embeddings.encode`"""
+        texts = list(texts)
+        out = np.zeros((len(texts), self.dim), dtype=EMBEDDING_DTYPE)
+        with span("static_encoder.encode"):
+            for row, text in enumerate(texts):
+                ids = self.token_ids(text)
+                if ids:
+                    out[row] = self.vectors[ids].astype(EMBEDDING_DTYPE).mean(axis=0)
+        return normalize(out)
+
+    def __call__(self, texts: Iterable[str]) -> np.ndarray:
+        return self.encode(texts)
+
+
+def token_vectors(model_name: str = MODEL_NAME, batch_size: int = 512) -> StaticEncoder:
+    """Run every vocabulary token through the model on its own ([CLS] token [SEP])"""
+    import torch
+
+    model = load_model(model_name)
+    tokenizer, transformer = model.tokenizer, model[0].auto_model
+    vocab = sorted(tokenizer.get_vocab(), key=tokenizer.get_vocab().get)
+    cls_id, sep_id = tokenizer.cls_token_id, tokenizer.sep_token_id
+
+    vectors = np.zeros((len(vocab), transformer.config.hidden_size), dtype=EMBEDDING_DTYPE)
+    transformer.eval()
+    with span("static_encoder.token_vectors"), torch.no_grad():
+        for start in range(0, len(vocab), batch_size):
+            ids = torch.arange(start, min(start + batch_size, len(vocab)))
+            input_ids = torch.stack([torch.full_like(ids, cls_id), ids,
+                                     torch.full_like(ids, sep_id)], dim=1)
+            hidden = transformer(input_ids=input_ids,
+                                 attention_mask=torch.ones_like(input_ids)).last_hidden_state
+            # The model's own pooling is a mean over all positions, [CLS]/[SEP] included
+            vectors[start:start + len(ids)] = hidden.mean(dim=1).cpu().numpy()
+    return StaticEncoder(vocab, vectors)
+
+
+def apply_sif_weights(encoder: StaticEncoder, texts: Iterable[str], a: float = SIF_A):
+    """Scale each token's vector by a / (a + p(token)) using corpus token frequencies"""
+    counts = np.zeros(len(encoder.vectors), dtype=np.float64)
+    for text in texts:
+        np.add.at(counts, encoder.token_ids(text), 1)
+    probabilities = counts / max(counts.sum(), 1)
+    encoder.vectors = encoder.vectors * (a / (a + probabilities))[:, None].astype(EMBEDDING_DTYPE)
+
+
+def fit_alignment(encoder: StaticEncoder, texts: List[str], targets: np.ndarray,
+                  ridge: float = DEFAULT_RIDGE) -> np.ndarray:
+    """
+    Ridge map W minimizing |pooled(texts) W - targets|^2 + ridge |W|^2, folded
+    into the table (mean pooling is linear, so pooled(t) W == pooled over rows of table W)
+    """
+    pooled = np.zeros((len(texts), encoder.dim), dtype=np.float64)
+    for row, text in enumerate(texts):
+        ids = encoder.token_ids(text)
+        if ids:
+            pooled[row] = np.asarray(encoder.vectors[ids], dtype=np.float64).mean(axis=0)
+
+    gram = pooled.T @ pooled
+    gram += ridge * np.trace(gram) / encoder.dim * np.eye(encoder.dim)
+    weights = np.linalg.solve(gram, pooled.T @ np.asarray(targets, dtype=np.float64))
+    encoder.vectors = (np.asarray(encoder.vectors, dtype=np.float64) @ weights).astype(
+        EMBEDDING_DTYPE
+    )
+    return weights
+
+
+def distill(db: QuoteDatabase,
+            output: Path = STATIC_ENCODER_DIR,
+            model_name: str = MODEL_NAME,
+            align: Optional[bool] = None,
+            ridge: float = DEFAULT_RIDGE) -> Dict[str, int]:
+    """
+    Build and save the static table for `model_name`.
+
+    Token weights come from the corpus text. Alignment to stored embeddings
+    needs at least two quotes per dimension to be better than the raw table,
+    so by default it runs only on corpora that large.
+    """
+    encoder = token_vectors(model_name)
+    # One streamed pass over the texts; looking the embedded ones up again by id
+    # would bind a parameter per quote, past SQLite's variable limit on big corpora
+    ids, texts = [], []
+    for rows in db.iter_quote_batches():
+        for row in rows:
+            ids.append(row['id'])
+            texts.append(row['text'])
+    apply_sif_weights(encoder, texts)
+
+    matrix = EmbeddingMatrix.from_database(db)
+    if align is None:
+        align = len(matrix) >= 2 * encoder.dim
+    if align and len(matrix):
+        text_by_id = dict(zip(ids, texts))
+        fit_alignment(encoder, [text_by_id[int(i)] for i in matrix.ids], matrix.vectors, ridge)
+
+    encoder.save(output)
+    return {"tokens": len(encoder.tokens), "dim": encoder.dim,
+            "aligned": len(matrix) if align else 0}
+
+
+@lru_cache(maxsize=1)
+def default_encoder() -> StaticEncoder:
+    """The table in STATIC_ENCODER_DIR, loaded once per process"""
+    return StaticEncoder.load()
+
+
+def encode(texts: Iterable[str]) -> np.ndarray:
+    """Embed texts with the default static table"""
+    return default_encoder().encode(texts)
@@ -0,0 +1,153 @@
+"""
+Automatic tagging of ingested quotes
+
+Each tag's description is embedded once; a batch of quote embeddings is
+then scored against every tag with a single (n, dim) @ (dim, tags) matrix
+multiply, and each quote keeps its best few tags above a threshold.
+Quotes that already have a stored embedding are not re-encoded.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .database import QuoteDatabase
+from .embeddings import EMBEDDING_DTYPE, encode, vector_to_blob
+from .profiling import span
+
+
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_MAX_TAGS = 4
+
+# The recurring tags of the hand-curated quotes (add_gutenberg_quotes.py)
+# and the ASCII art themes, described for the embedding model
+TAG_DESCRIPTIONS: Dict[str, str] = {
+    "stoicism": "Stoic philosophy: virtue, reason, accepting what we cannot control",
+    "wisdom": "practical wisdom and insight about how to live well",
+    "strategy": "strategy, long-term plans and outmaneuvering opponents",
+    "virtue": "moral excellence, goodness and right conduct",
+    "life": "the nature and conduct of a human life",
+    "victory": "winning, triumph and defeating an enemy",
+    "planning": "careful planning and calculation before acting",
+    "time": "the passing of time and how we spend it",
+    "action": "taking action and doing the work rather than talking",
+    "mindfulness": "attention to the present, awareness of one's own thoughts",
+    "perception": "how we perceive and judge events; opinion shapes experience",
+    "tactics": "battlefield tactics, maneuvers and the use of terrain",
+    "mortality": "death, our mortality and the shortness of life",
+    "present_moment": "living in the present moment, now is all we have",
+    "purpose": "purpose, meaning and what one is made for",
+    "preparation": "being prepared and ready before the challenge comes",
+    "growth": "personal growth, learning and becoming better",
+    "urgency": "urgency, not wasting the little time left",
+    "integrity": "integrity, honesty and being true to one's principles",
+    "impermanence": "impermanence; everything changes, decays and passes away",
+    "change": "change, transformation and the flux of all things",
+    "perspective": "seeing things from a wider perspective, the view from above",
+    "contentment": "contentment and being satisfied with little",
+    "simplicity": "simplicity and freedom from excess",
+    "acceptance": "accepting fate and what happens without complaint",
+    "adversity": "adversity, hardship and misfortune as a test",
+    "happiness": "happiness, joy and a good life",
+    "self_reliance": "self-reliance and depending on oneself, not others",
+    "inner_strength": "inner strength and the citadel of the mind",
+    "learning": "study, learning and acquiring knowledge",
+    "focus": "focus, concentration and avoiding distraction",
+    "perseverance": "perseverance, endurance and not giving up",
+    "control": "what is and is not within our control",
+    "resilience": "resilience and recovering from setbacks",
+    "character": "character and the kind of person one is",
+    "anxiety": "anxiety, worry and fear of the future",
+    "nature": "nature, the natural world and living according to nature",
+    "deception": "deception, feints and misleading the enemy",
+    "opportunity": "seizing opportunity at the right moment",
+    "anger": "anger, rage and controlling one's temper",
+    "fear": "fear and courage in the face of danger",
+    "gratitude": "gratitude, benefits and kindness received",
+    "relationships": "friendship, loyalty and how we treat other people",
+    "meditation": "meditation, stillness and inner peace",
+    "exploration": "exploration, journeys and discovering new things",
+}
+
+
+class TagClassifier:
+    """Scores quote embeddings against tag-description embeddings"""
+
+    def __init__(self,
+                 descriptions: Dict[str, str] = TAG_DESCRIPTIONS,
+                 threshold: float = DEFAULT_THRESHOLD,
+                 max_tags: int = DEFAULT_MAX_TAGS,
+                 encoder: Callable[[List[str]], np.ndarray] = encode):
+        self.tags = list(descriptions)
+        self.threshold = threshold
+        self.max_tags = max_tags
+        self.encoder = encoder
+        with span("tagging.embed_tags"):
+            self.tag_vectors = encoder(
+                [f"{tag.replace('_', ' ')}: {text}" for tag, text in descriptions.items()]
+            )
+
+    def scores(self, vectors: np.ndarray) -> np.ndarray:
+        """(n quotes, n tags) cosine similarities"""
+        return vectors @ self.tag_vectors.T
+
+    def assign(self, vectors: np.ndarray) -> List[List[str]]:
+        """Best tags above the threshold for each quote, strongest first"""
+        scores = self.scores(vectors)
+        k = min(self.max_tags, len(self.tags))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        keep = np.take_along_axis(top_scores, order, axis=1) >= self.threshold
+
+        return [[self.tags[j] for j, ok in zip(row, mask) if ok]
+                for row, mask in zip(top.tolist(), keep.tolist())]
+
+    def embed(self, texts: Sequence[str], blobs: Sequence[Optional[bytes]]) -> np.ndarray:
+        """Quote vectors, reusing stored embeddings and encoding only the rest"""
+        missing = [i for i, blob in enumerate(blobs) if blob is None]
+        stored = [i for i, blob in enumerate(blobs) if blob is not None]
+        vectors = np.empty((len(texts), self.tag_vectors.shape[1]), dtype=EMBEDDING_DTYPE)
+        if missing:
+            vectors[missing] = self.encoder([texts[i] for i in missing])
+        if stored:
+            joined = b"".join(blobs[i] for i in stored)
+            vectors[stored] = np.frombuffer(joined, dtype=EMBEDDING_DTYPE).reshape(len(stored), -1)
+        return vectors
+
+
+def iter_tagging_batches(db: QuoteDatabase,
+                         batch_size: int,
+                         only_untagged: bool = True) -> Iterator[List[Tuple]]:
+    """(id, text, embedding) batches in id order, resumable by id"""
+    last_id = 0
+    while True:
+        rows = db.get_quotes_for_tagging(last_id, batch_size, only_untagged)
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def tag_quotes(db: QuoteDatabase,
+               classifier: TagClassifier,
+               batch_size: int = 1000,
+               only_untagged: bool = True,
+               store_embeddings: bool = True) -> int:
+    """Tag quotes in batches and write the tags back; returns how many were tagged"""
+    total = 0
+    for rows in iter_tagging_batches(db, batch_size, only_untagged):
+        ids = [row[0] for row in rows]
+        blobs = [row[2] for row in rows]
+        with span("tagging.batch"):
+            vectors = classifier.embed([row[1] for row in rows], blobs)
+            tags = classifier.assign(vectors)
+
+        db.update_tags(zip(tags, ids))
+        if store_embeddings:
+            # Encoded anyway; keep them so search and the next run skip the model
+            db.update_embeddings((vector_to_blob(vectors[i]), ids[i])
+                                 for i, blob in enumerate(blobs) if blob is None)
+        total += len(rows)
+    return total
@@ -0,0 +1,237 @@
+"""
+Streaming export/import of the quote database
+
+Two formats are supported:
+
+- JSONL (optionally gzip-compressed when the path ends in `.gz`): one quote
+  per line, tags as a list and embeddings as base64.
+- Columnar (`.stqc`): a compact binary dump made of row groups. Each row
+  group stores every column as its own zlib-compressed chunk, so repetitive
+  columns (author, source, tags) compress well and embedding vectors are
+  kept as raw float32 bytes.
+
+Both directions work one batch at a time, so memory use stays flat no matter
+how many quotes the database holds.
+"""
+
+import base64
+import gzip
+import json
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional
+
+from .config import TRANSFER_BATCH_SIZE
+from .database import QuoteDatabase
+
+
+COLUMNAR_MAGIC = b"STQCOL1\n"
+COLUMNAR_SUFFIX = ".stqc"
+DEFAULT_BATCH_SIZE = TRANSFER_BATCH_SIZE
+
+# Column chunk encodings
+JSON_CHUNK = b"j"
+BLOB_CHUNK = b"b"
+
+
+def detect_format(path: str) -> str:
+    """Pick the dump format from the file name"""
+    return "columnar" if Path(path).suffix == COLUMNAR_SUFFIX else "jsonl"
+
+
+def _open_text(path: str, mode: str) -> IO[str]:
+    """Open a text file, transparently gzip-compressed for `.gz` paths"""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+# JSONL
+# ---------------------------------------------------------------------------
+
+def export_jsonl(db: QuoteDatabase, path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Stream every quote to a JSONL file, returning the number of rows written"""
+    count = 0
+    with _open_text(path, "w") as f:
+        for rows in db.iter_quote_batches(batch_size):
+            lines = []
+            for row in rows:
+                record = dict(row)
+                record["tags"] = json.loads(record["tags"]) if record["tags"] else []
+                if record.get("embedding") is not None:
+                    record["embedding"] = base64.b64encode(record["embedding"]).decode("ascii")
+                lines.append(json.dumps(record, ensure_ascii=False))
+            f.write("\n".join(lines) + "\n")
+            count += len(rows)
+    return count
+
+
+def _iter_jsonl_batches(path: str, batch_size: int) -> Iterator[List[Dict]]:
+    """Read a JSONL dump back as batches of row dicts ready for insertion"""
+    batch = []
+    with _open_text(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record["tags"] = json.dumps(record.get("tags") or [])
+            if record.get("embedding") is not None:
+                record["embedding"] = base64.b64decode(record["embedding"])
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# Columnar
+# ---------------------------------------------------------------------------
+
+def _encode_chunk(values: List) -> bytes:
+    """Encode one column of a row group"""
+    if any(isinstance(value, bytes) for value in values):
+        lengths = [-1 if value is None else len(value) for value in values]
+        header = json.dumps(lengths).encode("utf-8")
+        body = b"".join(value for value in values if value is not None)
+        return BLOB_CHUNK + zlib.compress(struct.pack("<I", len(header)) + header + body)
+    return JSON_CHUNK + zlib.compress(json.dumps(values, ensure_ascii=False).encode("utf-8"))
+
+
+def _decode_chunk(chunk: bytes) -> List:
+    """Decode one column of a row group"""
+    encoding, payload = chunk[:1], zlib.decompress(chunk[1:])
+    if encoding == JSON_CHUNK:
+        return json.loads(payload)
+
+    (header_len,) = struct.unpack_from("<I", payload)
+    lengths = json.loads(payload[4:4 + header_len])
+    values = []
+    offset = 4 + header_len
+    for length in lengths:
+        if length < 0:
+            values.append(None)
+        else:
+            values.append(payload[offset:offset + length])
+            offset += length
+    return values
+
+
+def export_columnar(db: QuoteDatabase, path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Stream every quote to a columnar dump, returning the number of rows written"""
+    count = 0
+    with open(path, "wb") as f:
+        f.write(COLUMNAR_MAGIC)
+        columns = None
+        for rows in db.iter_quote_batches(batch_size):
+            if columns is None:
+                columns = list(rows[0].keys())
+                header = json.dumps({"columns": columns}).encode("utf-8")
+                f.write(struct.pack("<I", len(header)) + header)
+
+            f.write(struct.pack("<I", len(rows)))
+            for column in columns:
+                chunk = _encode_chunk([row[column] for row in rows])
+                f.write(struct.pack("<I", len(chunk)) + chunk)
+            count += len(rows)
+    return count
+
+
+def _read_exact(f: IO[bytes], size: int) -> bytes:
+    """Read exactly `size` bytes or fail on a truncated dump"""
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated columnar dump")
+    return data
+
+
+def _iter_columnar_batches(path: str) -> Iterator[List[Dict]]:
+    """Read a columnar dump back one row group at a time"""
+    with open(path, "rb") as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a quote columnar dump")
+
+        header_size = f.read(4)
+        if not header_size:
+            return  # Empty database was exported
+        (header_len,) = struct.unpack("<I", header_size)
+        columns = json.loads(_read_exact(f, header_len))["columns"]
+
+        while True:
+            row_count_bytes = f.read(4)
+            if not row_count_bytes:
+                break
+            (row_count,) = struct.unpack("<I", row_count_bytes)
+
+            column_values = {}
+            for column in columns:
+                (chunk_len,) = struct.unpack("<I", _read_exact(f, 4))
+                column_values[column] = _decode_chunk(_read_exact(f, chunk_len))
+
+            yield [
+                {column: column_values[column][i] for column in columns}
+                for i in range(row_count)
+            ]
+
+
+def _rebatch(batches: Iterator[List[Dict]], batch_size: int) -> Iterator[List[Dict]]:
+    """Regroup batches of any size into batches of `batch_size` rows"""
+    pending: List[Dict] = []
+    for batch in batches:
+        pending.extend(batch)
+        while len(pending) >= batch_size:
+            yield pending[:batch_size]
+            pending = pending[batch_size:]
+    if pending:
+        yield pending
+
+
+# ---------------------------------------------------------------------------
+# Entry points
+# ---------------------------------------------------------------------------
+
+def export_quotes(db: QuoteDatabase,
+                  path: str,
+                  format: Optional[str] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Export the quotes table to `path` in JSONL or columnar format"""
+    format = format or detect_format(path)
+    if format == "columnar":
+        return export_columnar(db, path, batch_size)
+    return export_jsonl(db, path, batch_size)
+
+
+def import_quotes(db: QuoteDatabase,
+                  path: str,
+                  format: Optional[str] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE,
+                  keep_ids: bool = True) -> int:
+    """
+    Import a dump produced by `export_quotes`, returning the number of rows added.
+
+    With `keep_ids` the original quote ids are preserved, so the target must
+    be empty: batches commit one by one, and a clashing id halfway through
+    would leave a partial import. Otherwise rows are appended with fresh ids.
+    """
+    if keep_ids and db.max_quote_id():
+        raise ValueError(f"{db.db_path} already holds quotes; import into an empty database "
+                         "to keep the exported ids, or append them with new ids "
+                         "(`import --append`)")
+
+    format = format or detect_format(path)
+    if format == "columnar":
+        # Row groups keep the exporter's batch size; regroup to this one
+        batches = _rebatch(_iter_columnar_batches(path), batch_size)
+    else:
+        batches = _iter_jsonl_batches(path, batch_size)
+
+    count = 0
+    for batch in batches:
+        if not keep_ids:
+            for row in batch:
+                row.pop("id", None)
+        count += db.insert_quote_rows(batch)
+    return count
@@ -0,0 +1,70 @@
+"""
+Startup latency regression gate: tools/benchmark.py under pytest
+
+The comparison logic always runs. The full gate runs the suite on the
+default 250 and 10k-quote corpora and compares its wall-clock p95s with a
+baseline, which only means something when both were recorded on the same
+machine. It is marked slow and runs only when a baseline is named: record
+one first, then run the gate against it.
+
+    python tools/benchmark.py --save-baseline --baseline /tmp/bench.json
+    STOIC_TERMINAL_BENCH_BASELINE=/tmp/bench.json pytest tests/test_benchmark.py
+
+Configure with environment variables:
+
+    STOIC_TERMINAL_BENCH_BASELINE    baseline JSON from this machine; enables the gate
+    STOIC_TERMINAL_BENCH_TOLERANCE   allowed p95 slowdown as a fraction (default: 0.25)
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from benchmark import compare  # noqa: E402
+
+
+BENCHMARK = REPO_ROOT / "tools" / "benchmark.py"
+BASELINE = os.environ.get("STOIC_TERMINAL_BENCH_BASELINE")
+TOLERANCE = os.environ.get("STOIC_TERMINAL_BENCH_TOLERANCE", "0.25")
+
+
+def run_benchmark(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, str(BENCHMARK), *args],
+                          capture_output=True, text=True, cwd=REPO_ROOT)
+
+
+def test_compare_flags_latency_and_rss_regressions():
+    """Slowdowns past both the tolerance and the minimum delta count, smaller ones don't"""
+    baseline = {"corpora": {"250": {"tag_search": {"p95": 1.0}, "text_search": {"p95": 10.0},
+                                    "random_quote": {"p95": 0.1}, "peak_rss_mb": 20.0}}}
+    results = {"corpora": {"250": {"tag_search": {"p95": 1.2}, "text_search": {"p95": 14.0},
+                                   "random_quote": {"p95": 0.5}, "peak_rss_mb": 30.0}}}
+
+    regressions = compare(results, baseline, tolerance=0.25, min_delta_ms=0.5)
+
+    assert len(regressions) == 2
+    assert "text_search" in regressions[0]
+    assert "peak_rss_mb" in regressions[1]
+
+
+def test_missing_baseline_fails(tmp_path):
+    result = run_benchmark("--baseline", str(tmp_path / "missing.json"))
+
+    assert result.returncode == 1
+    assert "No baseline" in result.stdout
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not BASELINE, reason="set STOIC_TERMINAL_BENCH_BASELINE to a local baseline")
+def test_no_regressions_vs_baseline(tmp_path):
+    """The default suite stays within tolerance of a baseline from this machine"""
+    result = run_benchmark("--baseline", BASELINE, "--tolerance", TOLERANCE,
+                           "--output", str(tmp_path / "results.json"))
+
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,24 @@
+"""
+Build graph consistency
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from stoic_terminal.build import TARGETS  # noqa: E402
+from stoic_terminal.config import BUILD_TARGETS  # noqa: E402
+
+
+def test_cli_target_names_match_the_build_graph():
+    """The CLI's `build` choices come from config, so they must not drift from TARGETS"""
+    assert tuple(TARGETS) == BUILD_TARGETS
+
+
+def test_dependencies_are_targets_listed_earlier():
+    order = list(TARGETS)
+    for name, target in TARGETS.items():
+        for dep in target.deps:
+            assert dep in TARGETS and order.index(dep) < order.index(name), (name, dep)
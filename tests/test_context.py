@@ -0,0 +1,108 @@
+"""
+Launch context: the recently-shown history the CLI picks quotes against
+
+Covers the framed log (torn records anywhere), compaction, the membership
+window, clearing, and appends from several processes at once.
+"""
+
+import multiprocessing
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from stoic_terminal.history import RECORD_SIZE, ShownHistory, _decode, _encode  # noqa: E402
+
+
+# Concurrent appends: four workers, 2800 ids, one compaction mid-run; the log keeps
+# everything after it
+CAPACITY = 1000
+APPENDS = 700
+
+
+def test_recorded_ids_survive_a_reload(tmp_path):
+    path = tmp_path / "history.bin"
+    history = ShownHistory(path)
+    for quote_id in (3, 70000, 3, 12):
+        history.record(quote_id)
+
+    reloaded = ShownHistory(path)
+    assert list(reloaded.ids) == [3, 70000, 3, 12]
+    assert 70000 in reloaded and 12 in reloaded
+    assert 4 not in reloaded and 10 ** 9 not in reloaded
+
+
+def test_torn_records_are_skipped_wherever_they_are(tmp_path):
+    """A crash mid-append leaves a partial record; later appends must still load"""
+    path = tmp_path / "history.bin"
+    path.write_bytes(_encode([1, 2]) + _encode([99])[:3] + _encode([3, 4])
+                     + b"\xff" * 5 + _encode([5]) + _encode([6])[:7])
+
+    history = ShownHistory(path)
+    assert list(history.ids) == [1, 2, 3, 4, 5]
+    assert 99 not in history
+
+
+def test_log_is_compacted_to_the_newest_ids(tmp_path):
+    path = tmp_path / "history.bin"
+    history = ShownHistory(path, capacity=8)
+    for quote_id in range(1, 41):
+        history.record(quote_id)
+        assert path.stat().st_size < 2 * 8 * RECORD_SIZE
+
+    assert list(ShownHistory(path, capacity=8).ids) == list(range(33, 41))
+    assert list(history.ids)[-8:] == list(range(33, 41))
+
+
+def test_window_limits_membership_not_the_log(tmp_path):
+    path = tmp_path / "history.bin"
+    history = ShownHistory(path, capacity=16, window=2)
+    for quote_id in (1, 2, 3):
+        history.record(quote_id)
+
+    reloaded = ShownHistory(path, capacity=16, window=2)
+    assert len(reloaded) == 3
+    assert 1 not in reloaded and 2 in reloaded and 3 in reloaded
+    assert not ShownHistory(path, window=0).bits
+
+
+def test_clear_forgets_everything(tmp_path):
+    path = tmp_path / "history.bin"
+    history = ShownHistory(path)
+    history.record(7)
+    history.clear()
+
+    assert 7 not in history and len(history) == 0
+    assert len(ShownHistory(path)) == 0
+
+
+def _record_many(path: str, start: int, go):
+    history = ShownHistory(Path(path), capacity=CAPACITY)
+    go.wait()
+    for quote_id in range(start, start + APPENDS):
+        history.record(quote_id)
+
+
+def test_concurrent_appends_and_compactions_keep_the_log_intact(tmp_path):
+    """Appends never land in a log that is being replaced, so none is torn or lost"""
+    path = tmp_path / "history.bin"
+    context = multiprocessing.get_context("fork" if sys.platform != "win32" else "spawn")
+    go = context.Event()
+    workers = [context.Process(target=_record_many, args=(str(path), 10000 * (i + 1), go))
+               for i in range(4)]
+    for worker in workers:
+        worker.start()
+    go.set()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    data = path.read_bytes()
+    ids = _decode(data)
+    assert len(ids) * RECORD_SIZE == len(data)
+    assert len(ids) == 4 * APPENDS - CAPACITY
+    # The log is the tail of one serial order of appends: a lost append would leave a gap
+    for start in (10000, 20000, 30000, 40000):
+        mine = [quote_id for quote_id in ids if start <= quote_id < start + APPENDS]
+        assert mine == list(range(start + APPENDS - len(mine), start + APPENDS))
@@ -0,0 +1,245 @@
+"""
+QuoteDatabase behavior: read-only opens, facets, export/import and migrations
+
+Every test builds its own small database in a temp directory.
+"""
+
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from stoic_terminal import database  # noqa: E402
+from stoic_terminal.authors import resolve_author_id  # noqa: E402
+from stoic_terminal.database import QuoteDatabase  # noqa: E402
+from stoic_terminal.migrations import FACET_COLUMNS, SCHEMA_VERSION, migrate  # noqa: E402
+from stoic_terminal.transfer import export_quotes, import_quotes  # noqa: E402
+
+
+QUOTES = [
+    ("You have power over your mind, not outside events.", "Marcus Aurelius", "stoicism"),
+    ("Waste no more time arguing what a good man should be.", "marcus aurelius", "stoicism"),
+    ("The happiness of your life depends upon the quality of your thoughts.",
+     "Marcus Aurelius Antoninus", "stoicism"),
+    ("Luck is what happens when preparation meets opportunity.", "Seneca", "stoicism"),
+    ("The journey of a thousand miles begins with one step.", "Laozi", "taoism"),
+]
+
+
+def add_quotes(db: QuoteDatabase):
+    for text, author, tradition in QUOTES:
+        db.add_quote(text, author, source="Test", tradition=tradition, tags=["virtue"])
+
+
+def assert_positions_dense(conn: sqlite3.Connection):
+    """Each facet value's positions are exactly 0..count-1, one per quote"""
+    for facet, column in FACET_COLUMNS.items():
+        values = Counter(value for (value,) in conn.execute(
+            f"SELECT {column} FROM quotes WHERE {column} IS NOT NULL"))
+        for value, count in values.items():
+            positions = sorted(row[0] for row in conn.execute(
+                "SELECT position FROM facet_positions WHERE facet = ? AND value = ?",
+                (facet, value)))
+            assert positions == list(range(count)), (facet, value)
+            assert conn.execute("SELECT count FROM facet_counts WHERE facet = ? AND value = ?",
+                                (facet, value)).fetchone()[0] == count
+
+
+@pytest.fixture
+def db_path(tmp_path) -> Path:
+    path = tmp_path / "quotes.db"
+    with QuoteDatabase(str(path)) as db:
+        add_quotes(db)
+    return path
+
+
+# -- Read-only open ---------------------------------------------------------
+
+def test_read_only_sees_writes_in_the_wal(db_path):
+    """A read-only reader of a writable file honours the WAL of a live writer"""
+    writer = QuoteDatabase(str(db_path), threaded=True)
+    reader = QuoteDatabase(str(db_path), read_only=True)
+    try:
+        assert reader.count_quotes() == len(QUOTES)
+        writer.add_quote("No man is free who is not master of himself.", "Epictetus")
+
+        assert (db_path.parent / (db_path.name + "-wal")).stat().st_size > 0
+        assert reader.count_quotes() == len(QUOTES) + 1
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_read_only_refuses_writes(db_path):
+    with QuoteDatabase(str(db_path), read_only=True) as db:
+        with pytest.raises(sqlite3.OperationalError):
+            db.add_quote("Never written", "Nobody")
+    with QuoteDatabase(str(db_path), read_only=True) as db:
+        assert db.count_quotes() == len(QUOTES)
+
+
+def test_read_only_refuses_an_old_schema(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(str(path))
+    migrate(conn, target=SCHEMA_VERSION - 1)
+    conn.close()
+
+    with pytest.raises(sqlite3.DatabaseError, match="open it read-write once"):
+        QuoteDatabase(str(path), read_only=True)
+
+
+def test_static_file_is_opened_immutable(db_path, monkeypatch):
+    """The zipapp's copy skips locks and the WAL, so it must be a file nothing writes"""
+    monkeypatch.setattr(database, "STATIC_DB_PATH", str(db_path))
+    writer = QuoteDatabase(str(db_path), threaded=True)
+    try:
+        writer.add_quote("Written after the copy was made.", "Epictetus")
+        with QuoteDatabase(str(db_path), read_only=True) as static:
+            assert static.count_quotes() == len(QUOTES)
+    finally:
+        writer.close()
+
+
+# -- Facets -----------------------------------------------------------------
+
+def test_facet_counts_merge_author_spellings(db_path):
+    with QuoteDatabase(str(db_path), read_only=True) as db:
+        assert db.facet_counts("author") == [("Marcus Aurelius", 3), ("Lao Tzu", 1),
+                                             ("Seneca", 1)]
+        assert db.facet_counts("tradition") == [("stoicism", 4), ("taoism", 1)]
+        with pytest.raises(ValueError):
+            db.facet_counts("translator")
+
+
+def test_facet_counts_and_positions_follow_writes(db_path):
+    with QuoteDatabase(str(db_path)) as db:
+        db.conn.execute("DELETE FROM quotes WHERE author = 'marcus aurelius'")
+        db.conn.execute("UPDATE quotes SET tradition = 'taoism' WHERE author = 'Seneca'")
+        db.conn.execute("UPDATE quotes SET tradition = NULL WHERE author = 'Laozi'")
+        db.conn.commit()
+        add_quotes(db)
+
+        assert db.facet_counts("author")[0] == ("Marcus Aurelius", 5)
+        assert db.facet_counts("tradition") == [("stoicism", 6), ("taoism", 2)]
+        assert_positions_dense(db.conn)
+
+
+def test_random_quote_by_facet_resolves_aliases_and_skips_excluded(db_path):
+    with QuoteDatabase(str(db_path), read_only=True) as db:
+        marcus = {quote["id"] for quote in db.search_by_tags(["virtue"])
+                  if "Marcus" in quote["author"] or "marcus" in quote["author"]}
+        for _ in range(20):
+            quote = db.get_random_quote_by_facet("author", "Emperor Marcus Aurelius")
+            assert quote["id"] in marcus
+
+        kept = min(marcus)
+        for _ in range(20):
+            quote = db.get_random_quote_by_facet("author", "Marcus Aurelius",
+                                                 exclude=marcus - {kept})
+            assert quote["id"] == kept
+
+        # Every candidate excluded: a repeat beats nothing
+        assert db.get_random_quote_by_facet("tradition", "taoism", exclude={5}) is not None
+        assert db.get_random_quote_by_facet("author", "Zeno of Citium") is None
+
+
+# -- Export and import ------------------------------------------------------
+
+@pytest.mark.parametrize("name", ["quotes.jsonl", "quotes.jsonl.gz", "quotes.stqc"])
+def test_export_import_round_trip(db_path, tmp_path, name):
+    dump = tmp_path / name
+    copy_path = tmp_path / "copy.db"
+    with QuoteDatabase(str(db_path), read_only=True) as source:
+        assert export_quotes(source, str(dump), batch_size=2) == len(QUOTES)
+        expected = source.get_all_quotes()
+        counts = source.facet_counts("author")
+
+    with QuoteDatabase(str(copy_path)) as copy:
+        assert import_quotes(copy, str(dump), batch_size=3) == len(QUOTES)
+        assert copy.get_all_quotes() == expected
+        assert copy.facet_counts("author") == counts
+        assert_positions_dense(copy.conn)
+
+
+def test_import_keeping_ids_needs_an_empty_database(db_path, tmp_path):
+    dump = tmp_path / "quotes.stqc"
+    with QuoteDatabase(str(db_path), read_only=True) as source:
+        export_quotes(source, str(dump))
+
+    with QuoteDatabase(str(db_path)) as target:
+        with pytest.raises(ValueError, match="already holds quotes"):
+            import_quotes(target, str(dump))
+        assert target.count_quotes() == len(QUOTES)
+
+        assert import_quotes(target, str(dump), keep_ids=False) == len(QUOTES)
+        assert target.count_quotes() == 2 * len(QUOTES)
+        assert target.max_quote_id() == 2 * len(QUOTES)
+
+
+# -- Migrations -------------------------------------------------------------
+
+class Interrupted(Exception):
+    pass
+
+
+def test_backfill_resumes_after_an_interruption(tmp_path):
+    """A backfill stopped after a chunk picks up at its checkpoint, writes included"""
+    path = tmp_path / "upgrade.db"
+    conn = sqlite3.connect(str(path))
+    migrate(conn, target=SCHEMA_VERSION - 1)
+    cursor = conn.cursor()
+    for i in range(25):
+        text, author, tradition = QUOTES[i % len(QUOTES)]
+        cursor.execute("INSERT INTO quotes (text, author, tradition, length_category, "
+                       "author_id) VALUES (?, ?, ?, 'bite-sized', ?)",
+                       (f"{text} ({i})", author, tradition, resolve_author_id(cursor, author)))
+    conn.commit()
+
+    chunks = []
+
+    def stop_after_two(migration, last_id):
+        chunks.append(last_id)
+        if len(chunks) == 2:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        migrate(conn, chunk_size=10, progress=stop_after_two)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION - 1
+    assert conn.execute("SELECT version, last_id FROM migration_progress").fetchall() == [
+        (SCHEMA_VERSION, 20)
+    ]
+
+    # Written mid-upgrade: placed by the new triggers, so the backfill must skip it
+    conn.execute("INSERT INTO quotes (text, author, tradition, length_category, author_id) "
+                 "VALUES ('Added during the upgrade.', 'Seneca', 'stoicism', 'medium', "
+                 "(SELECT author_id FROM quotes WHERE author = 'Seneca' LIMIT 1))")
+    conn.commit()
+
+    chunks.clear()
+    assert migrate(conn, chunk_size=10, progress=lambda m, last_id: chunks.append(last_id)) \
+        == SCHEMA_VERSION
+    assert chunks == [26]  # Only the rows after the checkpoint
+    assert conn.execute("SELECT COUNT(*) FROM migration_progress").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM facet_positions "
+                        "WHERE facet = 'tradition'").fetchone()[0] == 26
+    assert_positions_dense(conn)
+    conn.close()
+
+    with QuoteDatabase(str(path), read_only=True) as db:
+        assert db.facet_counts("author")[0] == ("Marcus Aurelius", 15)
+
+
+# -- Full-text search -------------------------------------------------------
+
+def test_search_snippet_highlights_the_matching_column(db_path):
+    with QuoteDatabase(str(db_path), read_only=True) as db:
+        [by_text] = db.search_text("preparation")
+        by_author = db.search_text("Seneca")
+
+    assert "[preparation]" in by_text["snippet"]
+    assert by_author and all("[Seneca]" in quote["snippet"] for quote in by_author)
@@ -0,0 +1,150 @@
+"""
+Peak memory of low-memory mode
+
+The corpus is the cached synthetic one from tools/synthetic_corpus.py (built
+on first use). The vector file holds random unit vectors for the same
+number of rows and is cached next to it. Queries are encoded with a small
+random static table.
+
+A normal run uses 10k quotes. The full-scale check, a budgeted semantic
+search over 1M vectors (1.5 GB) in a process of its own, is marked slow
+and runs only when the size is set, e.g. STOIC_TERMINAL_TEST_QUOTES=1000000
+(building that corpus and vector file takes a few minutes the first time).
+
+Configure with environment variables:
+
+    STOIC_TERMINAL_TEST_QUOTES    corpus size (default: 10000); enables slow tests
+    STOIC_TERMINAL_TEST_PEAK_MB   tracemalloc peak limit for streamed queries (default: 16)
+    STOIC_TERMINAL_TEST_RSS_MB    peak RSS limit of a budgeted search process (default: 96)
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from stoic_terminal.database import QuoteDatabase  # noqa: E402
+from stoic_terminal.embeddings import EMBEDDING_DIM, write_vector_file  # noqa: E402
+from stoic_terminal.memory import MemoryBudget, budgeted_search  # noqa: E402
+from stoic_terminal.static_encoder import UNKNOWN_TOKEN, StaticEncoder  # noqa: E402
+from synthetic_corpus import DEFAULT_CORPUS_DIR, corpus_path  # noqa: E402
+
+
+QUOTES = int(os.environ.get("STOIC_TERMINAL_TEST_QUOTES", 10_000))
+FULL_SCALE = "STOIC_TERMINAL_TEST_QUOTES" in os.environ
+PEAK_MB = float(os.environ.get("STOIC_TERMINAL_TEST_PEAK_MB", 16))
+RSS_MB = float(os.environ.get("STOIC_TERMINAL_TEST_RSS_MB", 96))
+
+# Runs in a fresh process, so its peak RSS is the budgeted search's alone
+SEARCH_SCRIPT = """
+import json, resource, sys
+from stoic_terminal.database import QuoteDatabase
+from stoic_terminal.memory import MemoryBudget, budgeted_search
+
+db_path, vectors_path, encoder_dir, budget_mb = sys.argv[1:5]
+with QuoteDatabase(db_path, read_only=True, low_memory=True) as db:
+    result = budgeted_search(db, "Time and virtue", 10, MemoryBudget(float(budget_mb)),
+                             per_author=2, vectors_path=vectors_path, encoder_dir=encoder_dir)
+print(json.dumps({"mode": result["mode"], "reason": result["reason"],
+                  "quotes": len(result["quotes"]),
+                  "peak_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+@pytest.fixture(scope="module")
+def corpus() -> Path:
+    return corpus_path(QUOTES)
+
+
+@pytest.fixture(scope="module")
+def vector_file() -> Path:
+    """Random unit vectors for QUOTES rows (ids 1..QUOTES), written once"""
+    path = DEFAULT_CORPUS_DIR / f"vectors_{QUOTES}.bin"
+    if not path.exists():
+        rng = np.random.default_rng(42)
+
+        def batches():
+            for start in range(1, QUOTES + 1, 50_000):
+                stop = min(start + 50_000, QUOTES + 1)
+                vectors = rng.standard_normal((stop - start, EMBEDDING_DIM)).astype(np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                yield np.arange(start, stop), vectors
+
+        write_vector_file(path, batches())
+    return path
+
+
+@pytest.fixture(scope="module")
+def encoder_dir(tmp_path_factory) -> Path:
+    """A static query encoder over a handful of words, with random vectors"""
+    directory = tmp_path_factory.mktemp("static_encoder")
+    vocab = [UNKNOWN_TOKEN, "time", "and", "virtue", "death", "wisdom"]
+    vectors = np.random.default_rng(1).standard_normal((len(vocab), EMBEDDING_DIM))
+    StaticEncoder(vocab, vectors).save(directory)
+    return directory
+
+
+def test_streamed_queries_stay_under_peak(corpus):
+    """Walking every quote and every tag match allocates about one batch, not the corpus"""
+    with QuoteDatabase(str(corpus), read_only=True, low_memory=True) as db:
+        tracemalloc.start()
+        try:
+            total = sum(1 for _ in db.iter_all_quotes())
+            tagged = sum(1 for _ in db.iter_search_by_tags(["stoicism", "time"]))
+            picked = db.get_random_quote_by_tags(["virtue"], exclude={1, 2, 3})
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert total == QUOTES
+    assert 0 < tagged < total
+    assert picked is not None and "virtue" in picked["tags"]
+    assert peak < PEAK_MB * 1024 * 1024, f"peak {peak / 1024 / 1024:.1f} MiB"
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not FULL_SCALE, reason="set STOIC_TERMINAL_TEST_QUOTES for full scale")
+def test_budgeted_search_stays_under_rss(corpus, vector_file, encoder_dir):
+    """Budgeted semantic search scans every vector yet keeps the process under the RSS limit"""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT / "src"))
+    output = subprocess.run(
+        [sys.executable, "-c", SEARCH_SCRIPT, str(corpus), str(vector_file), str(encoder_dir),
+         str(RSS_MB)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output)
+
+    assert result["mode"] == "semantic", result["reason"]
+    assert result["quotes"] == 10
+    assert result["peak_kib"] < RSS_MB * 1024, f"peak RSS {result['peak_kib'] / 1024:.1f} MiB"
+
+
+def test_exceeded_budget_falls_back_to_tags(corpus, vector_file, tmp_path):
+    """With no room for numpy and a block, search still answers, from tags alone"""
+    encoder_dir = tmp_path / "static_encoder"
+    encoder_dir.mkdir()
+    (encoder_dir / "vectors.npy").touch()  # Present, so only the budget can stop it
+
+    with QuoteDatabase(str(corpus), read_only=True, low_memory=True) as db:
+        tracemalloc.start()
+        try:
+            result = budgeted_search(db, "Time and virtue", 5, MemoryBudget(1),
+                                     vectors_path=vector_file, encoder_dir=encoder_dir)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert result["mode"] == "tags"
+    assert "budget" in result["reason"]
+    assert len(result["quotes"]) == 5
+    assert all({"time", "virtue"} & set(quote["tags"]) for quote in result["quotes"])
+    assert peak < PEAK_MB * 1024 * 1024
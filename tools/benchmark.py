@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Startup Latency Benchmark Suite
+
+Measures the hot paths behind a terminal launch against synthetic corpora:
+
+- db_open / db_open_rw: QuoteDatabase construction (read-only and read-write)
+- random_quote, tag_search, text_search: the query paths
+- art_select, render: ASCII art selection and full display rendering
+- cli_end_to_end: a fresh `stoic-terminal` process, the real startup cost
+
+Each corpus runs in its own process so peak RSS is attributable. Results
+(p50/p95/p99 in ms, peak RSS in MB) are saved as JSON and compared against
+a stored baseline (tools/benchmark_baseline.json, recorded on the default
+250 and 10k-quote corpora); any regression beyond the tolerance fails the
+run, and so does a missing baseline unless --save-baseline is given.
+tests/test_benchmark.py runs the same gate under pytest.
+
+Usage:
+    python tools/benchmark.py                                  # 250 + 10k quotes
+    python tools/benchmark.py --sizes 250 10000 100000 1000000
+    python tools/benchmark.py --save-baseline                  # record a new baseline
+    python tools/benchmark.py --baseline other_baseline.json --tolerance 0.3
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_corpus import DEFAULT_CORPUS_DIR, corpus_path  # noqa: E402
+
+
+DEFAULT_SIZES = [250, 10_000]
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "benchmark_baseline.json"
+DEFAULT_OUTPUT = Path("benchmark_results.json")
+
+# Targets from the implementation plan, in milliseconds (p95)
+PLAN_TARGETS_MS = {
+    "cli_end_to_end": 500.0,
+    "tag_search": 5.0,
+    "text_search": 5.0,
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, rank - 1)]
+
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident set size in MB (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(who).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def measure(func: Callable[[], object], repeats: int, budget_s: float) -> Dict:
+    """Time `func` up to `repeats` times (at least 5) within a time budget"""
+    func()  # Warm-up: page cache, lazy imports
+    samples = []
+    deadline = time.perf_counter() + budget_s
+    while len(samples) < repeats and (len(samples) < 5 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "runs": len(samples),
+        "mean": round(sum(samples) / len(samples), 3),
+        "p50": round(percentile(samples, 50), 3),
+        "p95": round(percentile(samples, 95), 3),
+        "p99": round(percentile(samples, 99), 3),
+    }
+
+
+def run_corpus(db_path: str, repeats: int, budget_s: float, cli_repeats: int) -> Dict:
+    """Run every benchmark against one corpus (executes in a child process)"""
+    from stoic_terminal.art_matching import database_fingerprint
+    from stoic_terminal.ascii_art import ASCIIArtLoader
+    from stoic_terminal.database import QuoteDatabase
+    from stoic_terminal.display import render_quote
+
+    results = {}
+
+    def open_read_only():
+        QuoteDatabase(db_path, read_only=True).close()
+
+    def open_read_write():
+        QuoteDatabase(db_path).close()
+
+    results["db_open"] = measure(open_read_only, repeats, budget_s)
+    results["db_open_rw"] = measure(open_read_write, repeats, budget_s)
+
+    db = QuoteDatabase(db_path, read_only=True)
+    results["random_quote"] = measure(db.get_random_quote, repeats, budget_s)
+    results["tag_search"] = measure(lambda: db.search_by_tags(["stoicism"]), repeats, budget_s)
+    results["text_search"] = measure(lambda: db.search_text("death time", limit=10),
+                                     repeats, budget_s)
+
+    quote = db.get_random_quote()
+    loader = ASCIIArtLoader(db_fingerprint=database_fingerprint(db))
+    results["art_select"] = measure(lambda: loader.get_art_for_quote(quote, 80),
+                                    repeats, budget_s)
+    art = loader.get_art_for_quote(quote, 80)
+    results["render"] = measure(lambda: render_quote(quote, art[0] if art else None, 80,
+                                                         headers=loader.headers),
+                                repeats, budget_s)
+    db.close()
+
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT / "src"))
+    command = [sys.executable, "-m", "stoic_terminal.cli", "--db", db_path, "--width", "80"]
+
+    def invoke_cli():
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+
+    results["cli_end_to_end"] = measure(invoke_cli, cli_repeats, budget_s * 5)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    results["cli_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """List every p95 latency or peak RSS regression versus the baseline"""
+    regressions = []
+    for size, benchmarks in results["corpora"].items():
+        base_benchmarks = baseline.get("corpora", {}).get(size)
+        if not base_benchmarks:
+            continue
+
+        for name, stats in benchmarks.items():
+            base = base_benchmarks.get(name)
+            if base is None:
+                continue
+            if isinstance(stats, dict):
+                current, previous = stats["p95"], base["p95"]
+                if current > previous * (1 + tolerance) and current - previous > min_delta_ms:
+                    regressions.append(
+                        f"{size} quotes / {name}: p95 {current:.2f}ms vs baseline {previous:.2f}ms"
+                    )
+            elif stats > base * (1 + tolerance):
+                regressions.append(f"{size} quotes / {name}: {stats}MB vs baseline {base}MB")
+    return regressions
+
+
+def print_report(results: Dict):
+    """Print a per-corpus latency table"""
+    for size, benchmarks in results["corpora"].items():
+        print()
+        print(f"📊 {int(size):,} QUOTES")
+        print("-" * 70)
+        print(f"  {'benchmark':16s} {'runs':>5s} {'p50':>10s} {'p95':>10s} {'p99':>10s}")
+        for name, stats in benchmarks.items():
+            if not isinstance(stats, dict):
+                continue
+            target = PLAN_TARGETS_MS.get(name)
+            status = ""
+            if target is not None:
+                status = "✓" if stats["p95"] <= target else f"✗ (target {target:g}ms)"
+            print(f"  {name:16s} {stats['runs']:5d} {stats['p50']:8.2f}ms {stats['p95']:8.2f}ms "
+                  f"{stats['p99']:8.2f}ms {status}")
+        print(f"  peak RSS: {benchmarks['peak_rss_mb']}MB "
+              f"(CLI process: {benchmarks['cli_peak_rss_mb']}MB)")
+
+
+def main():
+    """Run the benchmark suite"""
+    parser = argparse.ArgumentParser(description="Stoic Terminal startup latency benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Synthetic corpus sizes to benchmark")
+    parser.add_argument("--repeats", type=int, default=200, help="Max runs per benchmark")
+    parser.add_argument("--cli-repeats", type=int, default=20, help="Max CLI invocations")
+    parser.add_argument("--budget", type=float, default=2.0,
+                        help="Seconds per benchmark before stopping early (min 5 runs)")
+    parser.add_argument("--corpus-dir", type=Path, default=DEFAULT_CORPUS_DIR,
+                        help="Where synthetic corpora are cached")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown before failing (fraction, default 0.25)")
+    parser.add_argument("--min-delta", type=float, default=0.5,
+                        help="Ignore regressions smaller than this many ms")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Stoic Terminal Benchmarks")
+    print("=" * 70)
+
+    # Without a baseline there is nothing to gate on; fail before the slow part
+    if not args.save_baseline and not args.baseline.exists():
+        print(f"✗ No baseline at {args.baseline}; run with --save-baseline to record one")
+        sys.exit(1)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "corpora": {},
+    }
+
+    # Fresh process per corpus keeps peak RSS numbers independent
+    context = multiprocessing.get_context("spawn")
+    for size in args.sizes:
+        db_path = corpus_path(size, args.corpus_dir)
+        print(f"  Running {size:,}-quote corpus...")
+        with context.Pool(1) as pool:
+            results["corpora"][str(size)] = pool.apply(
+                run_corpus, (str(db_path), args.repeats, args.budget, args.cli_repeats)
+            )
+
+    print_report(results)
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print()
+    print(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    regressions = compare(results, json.loads(args.baseline.read_text()),
+                          args.tolerance, args.min_delta)
+    print()
+    print("=" * 70)
+    if regressions:
+        print(f"✗ {len(regressions)} REGRESSION(S) vs {args.baseline}")
+        for regression in regressions:
+            print(f"  ✗ {regression}")
+        sys.exit(1)
+    print(f"✓ No regressions vs {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Compressed Storage Report
+
+Copies a synthetic corpus per size and compresses the copy with a trained
+zstd dictionary (`stoic-terminal compress`). It then reports, plain vs
+compressed:
+
+- file size and bytes held in text / source_context / tags
+- compression time
+- p50 latency of the read paths: fetch one quote, random quote, FTS
+  search, tag search, and a full streaming pass
+- a check that search and tag results are identical on both files
+
+Corpora come from tools/synthetic_corpus.py (cached by size). The 1M corpus
+takes a few minutes to build and compress the first time.
+
+Usage:
+    python tools/compression_report.py
+    python tools/compression_report.py --sizes 250 10000 --db quotes_v1.db
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark import measure  # noqa: E402
+from synthetic_corpus import corpus_path  # noqa: E402
+from stoic_terminal.compression import COMPRESSED_COLUMNS, compress_database  # noqa: E402
+from stoic_terminal.database import QuoteDatabase  # noqa: E402
+
+
+DEFAULT_SIZES = [250, 10_000, 1_000_000]
+QUERIES = ["death", "fear of death", "time", "anger nature", "thou art", "virtue reason"]
+TAG_QUERIES = [["wisdom"], ["mortality", "time"], ["courage"]]
+
+
+def column_bytes(db: QuoteDatabase) -> int:
+    """Stored bytes of the compressible columns (BLOB or TEXT)"""
+    total = " + ".join(f"COALESCE(LENGTH(CAST({column} AS BLOB)), 0)"
+                       for column in COMPRESSED_COLUMNS)
+    return db.conn.execute(f"SELECT SUM({total}) FROM quotes").fetchone()[0] or 0
+
+
+def read_paths(db_path: Path, repeats: int, budget_s: float) -> Dict:
+    """Latencies (ms) of the read paths plus results for the equivalence check"""
+    db = QuoteDatabase(str(db_path), read_only=True)
+    max_id = db.max_quote_id()
+    rng = random.Random(0)
+    results = {
+        "size_kib": db_path.stat().st_size / 1024,
+        "column_kib": column_bytes(db) / 1024,
+        "get_by_id": measure(lambda: db.get_quotes_by_ids([rng.randint(1, max_id)]),
+                             repeats, budget_s)["p50"],
+        "random": measure(db.get_random_quote, repeats, budget_s)["p50"],
+        "search": measure(lambda: db.search_text(rng.choice(QUERIES), limit=10),
+                          repeats, budget_s)["p50"],
+        "tags": measure(lambda: db.search_by_tags(rng.choice(TAG_QUERIES), "all"),
+                        max(5, repeats // 10), budget_s)["p50"],
+    }
+    start = time.perf_counter()
+    for _ in db.iter_quotes(5000):
+        pass
+    results["scan_ms"] = (time.perf_counter() - start) * 1000
+
+    results["answers"] = (
+        [[q['id'] for q in db.search_text(query, limit=20)] for query in QUERIES]
+        + [[q['id'] for q in db.search_by_tags(tags, "all")] for tags in TAG_QUERIES]
+    )
+    sample = db.get_quotes_by_ids(list(range(1, min(max_id, 200) + 1)))
+    results["sample"] = [(q['text'], q['source_context'], q['tags']) for q in sample]
+    db.close()
+    return results
+
+
+def run_size(source: Path, workdir: Path, repeats: int, budget_s: float) -> Dict:
+    plain = workdir / f"{source.stem}_plain.db"
+    packed = workdir / f"{source.stem}_zstd.db"
+    shutil.copy(source, plain)
+    shutil.copy(source, packed)
+
+    # Same layout for both files, so size differences come from compression only
+    with QuoteDatabase(str(plain)) as db:
+        db.conn.execute("VACUUM")
+
+    start = time.perf_counter()
+    with QuoteDatabase(str(packed)) as db:
+        count = db.count_quotes()
+        info = compress_database(db.conn, db.codec)
+    compress_s = time.perf_counter() - start
+
+    return {"count": count, "dict_kib": info["dict_bytes"] / 1024, "compress_s": compress_s,
+            "plain": read_paths(plain, repeats, budget_s),
+            "zstd": read_paths(packed, repeats, budget_s)}
+
+
+def print_size(result: Dict):
+    plain, zstd = result["plain"], result["zstd"]
+    print(f"\n📊 {result['count']:,} QUOTES  (dictionary {result['dict_kib']:.0f} KiB, "
+          f"compressed in {result['compress_s']:.1f}s)")
+    print("-" * 70)
+    print(f"  {'':22s} {'plain':>12s} {'zstd':>12s} {'ratio':>8s}")
+    for key, label, unit in [("size_kib", "database file", "KiB"),
+                             ("column_kib", "text/context/tags", "KiB"),
+                             ("get_by_id", "fetch one quote p50", "ms"),
+                             ("random", "random quote p50", "ms"),
+                             ("search", "FTS search p50", "ms"),
+                             ("tags", "tag search p50", "ms"),
+                             ("scan_ms", "full streaming pass", "ms")]:
+        ratio = zstd[key] / plain[key] if plain[key] else 0
+        fmt = "{:>9,.0f} {}" if unit == "KiB" else "{:>10.3f}{}"
+        print(f"  {label:22s} {fmt.format(plain[key], unit):>12s} "
+              f"{fmt.format(zstd[key], unit):>12s} {ratio:7.2f}x")
+
+    same = plain["answers"] == zstd["answers"] and plain["sample"] == zstd["sample"]
+    print("  ✓ identical search, tag and row results" if same
+          else "  ✗ results differ between plain and compressed")
+    return same
+
+
+def main():
+    """Measure compressed storage against plain storage at several corpus sizes"""
+    parser = argparse.ArgumentParser(description="Report on zstd-compressed quote storage")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Synthetic corpus sizes (default: 250 10000 1000000)")
+    parser.add_argument("--db", action="append", default=[],
+                        help="Also report on this real database (repeatable)")
+    parser.add_argument("--repeats", type=int, default=200, help="Max runs per read path")
+    parser.add_argument("--budget", type=float, default=2.0, help="Seconds per read path")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Compressed Storage Report")
+    print("=" * 70)
+
+    sources: List[Path] = [Path(db) for db in args.db]
+    sources += [corpus_path(size) for size in args.sizes]
+    ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        for source in sources:
+            print(f"\n  {source}")
+            ok &= print_size(run_size(source, Path(workdir), args.repeats, args.budget))
+            for path in Path(workdir).iterdir():
+                path.unlink()
+
+    print()
+    if not ok:
+        print("✗ Compressed storage changed query results")
+        sys.exit(1)
+    print("✓ Compressed storage returns the same results")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Static Query Encoder Report
+
+Compares the torch-free static token table (`stoic-terminal distill`) with
+the full all-MiniLM-L6-v2 model on the real corpus, so each deployment can
+choose its query path (STOIC_TERMINAL_ENCODER=full|static):
+
+- quote-as-query agreement: every stored `quotes.embedding` is the full
+  model's vector for that quote's text, so sampled quotes are re-encoded
+  with the static table and both neighbour lists are compared (the quote
+  itself excluded). This needs no torch at all.
+- free-text queries, when sentence-transformers is installed
+- top-1 agreement, overlap@k and cosine to the full-model vector
+- table load time and per-query encode latency for each path
+
+Usage:
+    python tools/encoder_report.py --db quotes_v1.db
+    python tools/encoder_report.py --db quotes_v1.db --sample 2000 --k 1 5 10 20
+"""
+
+import argparse
+import importlib.util
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark import percentile  # noqa: E402
+from stoic_terminal.config import STATIC_ENCODER_DIR  # noqa: E402
+from stoic_terminal.database import QuoteDatabase  # noqa: E402
+from stoic_terminal.embeddings import EmbeddingMatrix  # noqa: E402
+from stoic_terminal.static_encoder import StaticEncoder  # noqa: E402
+
+
+FREE_TEXT_QUERIES = [
+    "dealing with loss", "fear of death", "how to handle anger", "patience in adversity",
+    "the shortness of life", "what is in my control", "leading an army", "knowing your enemy",
+    "friendship and loyalty", "living according to nature", "wealth does not bring happiness",
+    "courage under pressure", "accepting change", "the value of time", "self-discipline",
+    "deception in war", "gratitude", "solitude and reflection", "justice", "humility",
+]
+
+
+def neighbours(matrix: EmbeddingMatrix, query: np.ndarray, k: int, exclude: int = -1) -> List[int]:
+    """Row indices of the top k, optionally without one row (the query quote itself)"""
+    top = matrix.top_n(query, k + 1)
+    return [int(row) for row in top if row != exclude][:k]
+
+
+def agreement(reference: np.ndarray, static: np.ndarray, matrix: EmbeddingMatrix,
+              ks: List[int], exclude: List[int]) -> Dict[str, float]:
+    """Top-1 agreement, mean overlap@k and mean cosine over query pairs"""
+    overlap = {k: [] for k in ks}
+    top1 = []
+    max_k = max(ks)
+    for ref, stat, skip in zip(reference, static, exclude):
+        a = neighbours(matrix, ref, max_k, skip)
+        b = neighbours(matrix, stat, max_k, skip)
+        top1.append(bool(a) and bool(b) and a[0] == b[0])
+        for k in ks:
+            overlap[k].append(len(set(a[:k]) & set(b[:k])) / k)
+    results = {"top1": float(np.mean(top1)),
+               "cosine": float(np.mean(np.sum(reference * static, axis=1)))}
+    results.update({f"overlap@{k}": float(np.mean(values)) for k, values in overlap.items()})
+    return results
+
+
+def latencies_ms(encode: Callable[[List[str]], np.ndarray], queries: List[str]) -> List[float]:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        encode([query])
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def print_agreement(title: str, results: Dict[str, float], n: int):
+    print(f"\n📊 {title} ({n} queries)")
+    print("-" * 70)
+    print(f"  Top-1 agreement:        {results['top1']:6.1%}")
+    for key, value in results.items():
+        if key.startswith("overlap@"):
+            print(f"  Mean {key + ':':18s} {value:6.1%}")
+    print(f"  Mean cosine to full:    {results['cosine']:6.3f}")
+
+
+def main():
+    """Report how closely the static encoder tracks the full model"""
+    parser = argparse.ArgumentParser(description="Evaluate the static query encoder")
+    parser.add_argument("--db", default="quotes_v1.db", help="Embedded quote database")
+    parser.add_argument("--table", type=Path, default=STATIC_ENCODER_DIR,
+                        help=f"Static encoder directory (default: {STATIC_ENCODER_DIR})")
+    parser.add_argument("--sample", type=int, default=500, help="Quotes used as queries")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10], help="Overlap depths")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Static Query Encoder Report")
+    print("=" * 70)
+
+    db = QuoteDatabase(args.db, read_only=True)
+    matrix = EmbeddingMatrix.from_database(db)
+    if not len(matrix):
+        print("✗ ERROR: no stored embeddings in", args.db, "(run `stoic-terminal embed`)")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        static = StaticEncoder.load(args.table)
+    except FileNotFoundError:
+        print("✗ ERROR: no static table in", args.table, "(run `stoic-terminal distill`)")
+        sys.exit(1)
+    load_ms = (time.perf_counter() - start) * 1000
+    if static.dim != matrix.dim:
+        print(f"✗ ERROR: table has {static.dim} dims, stored embeddings have {matrix.dim}")
+        sys.exit(1)
+
+    sample = min(args.sample, len(matrix))
+    rows = sorted(random.Random(args.seed).sample(range(len(matrix)), sample))
+    quotes = {q['id']: q['text'] for q in db.get_quotes_by_ids([int(matrix.ids[r]) for r in rows])}
+    db.close()
+    texts = [quotes[int(matrix.ids[row])] for row in rows]
+
+    print(f"  Corpus:  {len(matrix):,} embedded quotes from {args.db}")
+    print(f"  Table:   {len(static.tokens):,} tokens x {static.dim} dims, loaded in {load_ms:.1f}ms")
+
+    static_vectors = static.encode(texts)
+    results = agreement(matrix.vectors[rows], static_vectors, matrix, args.k, rows)
+    print_agreement("QUOTE-AS-QUERY AGREEMENT (full = stored embedding)", results, len(rows))
+
+    static_ms = latencies_ms(static.encode, FREE_TEXT_QUERIES * 5)
+    print("\n⏱  QUERY ENCODE LATENCY")
+    print("-" * 70)
+    print(f"  static:  p50 {percentile(static_ms, 50):7.3f}ms   "
+          f"p95 {percentile(static_ms, 95):7.3f}ms   (+{load_ms:.0f}ms table load, no torch)")
+
+    if importlib.util.find_spec("sentence_transformers"):
+        from stoic_terminal.embeddings import encode, load_model
+
+        start = time.perf_counter()
+        load_model()
+        model_ms = (time.perf_counter() - start) * 1000
+        full_ms = latencies_ms(encode, FREE_TEXT_QUERIES * 5)
+        print(f"  full:    p50 {percentile(full_ms, 50):7.3f}ms   "
+              f"p95 {percentile(full_ms, 95):7.3f}ms   (+{model_ms:.0f}ms model load)")
+
+        free = agreement(encode(FREE_TEXT_QUERIES), static.encode(FREE_TEXT_QUERIES), matrix,
+                         args.k, [-1] * len(FREE_TEXT_QUERIES))
+        print_agreement("FREE-TEXT QUERY AGREEMENT", free, len(FREE_TEXT_QUERIES))
+    else:
+        print("  full:    skipped (sentence-transformers not installed)")
+
+    print()
+    depth = max(args.k)
+    if results[f"overlap@{depth}"] >= 0.7:
+        print(f"✓ Static path keeps {results[f'overlap@{depth}']:.0%} of the full model's "
+              f"top {depth}: fine where torch is unavailable or launch time matters")
+    else:
+        print(f"⚠ Static path keeps only {results[f'overlap@{depth}']:.0%} of the full model's "
+              f"top {depth}: prefer the full model where quality matters")
+
+
+if __name__ == '__main__':
+    main()
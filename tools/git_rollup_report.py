@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Git Rollup Report
+
+Replays a synthetic commit history spanning several years through the git
+session store (stoic_terminal.git_analyzer). Commits come in day-by-day
+batches, as if `stoic-terminal git-activity` ran once a day. After each
+simulated year it reports the store's size and row counts.
+
+It then times theme detection at the end of the history two ways:
+
+- rollups   `GitSessionStore.activity()`: a few pre-aggregated rows
+- raw JSON  every session row of the last five weeks, planned schema style:
+            decode the commit_messages JSON and match the theme patterns
+            on every launch (the raw rows are kept for this comparison)
+
+Everything runs in a throwaway directory.
+
+Usage:
+    python tools/git_rollup_report.py
+    python tools/git_rollup_report.py --years 5 --commits-per-day 12 --runs 200
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark import measure  # noqa: E402
+from stoic_terminal.git_analyzer import (BASELINE_WEEKS, GitSessionStore,  # noqa: E402
+                                         commit_themes)
+
+
+MESSAGES = [
+    "Fix crash when the config file is missing", "Add weather provider fallback",
+    "Refactor the art loader", "Update README with install steps", "Implement tag filter",
+    "Revert broken cache change", "Add tests for the scheduler", "Debug flaky timeout",
+    "Bump version", "Clean up imports", "Support zsh hooks", "Fix off-by-one in pager",
+]
+
+
+def synthetic_day(day_start: float, commits_per_day: int, rng: random.Random,
+                  counter: List[int]) -> List[Dict]:
+    """One day's commits in one or two sessions, some days none"""
+    if rng.random() < 0.3:
+        return []
+    commits = []
+    for session_start in rng.sample([9, 14, 20], rng.choice([1, 2])):
+        at = day_start + session_start * 3600
+        for _ in range(max(1, int(rng.gauss(commits_per_day / 2, 2)))):
+            at += rng.randint(60, 1800)
+            counter[0] += 1
+            commits.append({"sha": f"{counter[0]:040x}", "time": int(at),
+                            "message": rng.choice(MESSAGES), "lines": rng.randint(1, 400)})
+    return sorted(commits, key=lambda commit: commit["time"])
+
+
+def raw_scan(raw: sqlite3.Connection, now: float) -> Counter:
+    """Theme counts from raw session JSON, the way the plain schema would be read"""
+    themes: Counter = Counter()
+    cutoff = now - 7 * (BASELINE_WEEKS + 1) * 86400
+    for (messages,) in raw.execute("SELECT commit_messages FROM raw_sessions "
+                                   "WHERE session_end >= ?", (cutoff,)):
+        for message in json.loads(messages):
+            themes.update(commit_themes(message))
+    return themes
+
+
+def main():
+    """Replay years of commits and report store size and theme-detection cost"""
+    parser = argparse.ArgumentParser(description="Report git rollup store size and read cost")
+    parser.add_argument("--years", type=int, default=3, help="Years of history (default: 3)")
+    parser.add_argument("--commits-per-day", type=int, default=10,
+                        help="Average commits on an active day (default: 10)")
+    parser.add_argument("--runs", type=int, default=100, help="Timed reads per method")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Git Rollup Report")
+    print("=" * 70)
+
+    rng = random.Random(args.seed)
+    counter = [0]
+    start = time.time() - args.years * 365 * 86400
+    start -= start % 86400
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = GitSessionStore(Path(workdir) / "git_sessions.db")
+        raw = sqlite3.connect(str(Path(workdir) / "raw.db"))
+        raw.execute("CREATE TABLE raw_sessions (session_end INTEGER, commit_messages TEXT)")
+        raw.execute("CREATE INDEX idx_raw_end ON raw_sessions(session_end)")
+
+        print(f"\n📦 STORE GROWTH ({args.commits_per_day} commits per active day)")
+        print("-" * 70)
+        print(f"  {'year':>4s} {'commits':>9s} {'size':>9s} {'sessions':>9s} "
+              f"{'rollups':>8s} {'themes':>7s}")
+        ingest_seconds = 0.0
+        now = start
+        for day in range(args.years * 365):
+            now = start + day * 86400
+            commits = synthetic_day(now, args.commits_per_day, rng, counter)
+            begin = time.perf_counter()
+            store.ingest("/synthetic/repo", commits)
+            store.close_idle(now + 86400)
+            store.compact(now + 86400)
+            ingest_seconds += time.perf_counter() - begin
+            if commits:
+                raw.execute("INSERT INTO raw_sessions VALUES (?, ?)",
+                            (commits[-1]["time"], json.dumps([c["message"] for c in commits])))
+            if (day + 1) % 365 == 0:
+                stats = store.stats()
+                print(f"  {(day + 1) // 365:4d} {counter[0]:9,d} {stats['bytes'] / 1024:7.0f}KB "
+                      f"{stats['git_sessions']:9,d} {stats['git_rollups']:8,d} "
+                      f"{stats['git_rollup_themes']:7,d}")
+        raw.commit()
+
+        now += 86400
+        rollup_ms = measure(lambda: store.activity(now), args.runs, budget_s=10.0)
+        raw_ms = measure(lambda: raw_scan(raw, now), args.runs, budget_s=10.0)
+        activity = store.activity(now)
+        store.close()
+        raw.close()
+
+    print(f"\n  Daily update: {ingest_seconds / (args.years * 365) * 1000:.2f}ms average")
+    print(f"\n🔎 THEME DETECTION ({args.runs} reads)")
+    print("-" * 70)
+    print(f"  {'method':9s} {'p50':>9s} {'p95':>9s}")
+    for name, timing in (("rollups", rollup_ms), ("raw JSON", raw_ms)):
+        print(f"  {name:9s} {timing['p50']:7.3f}ms {timing['p95']:7.3f}ms")
+    print(f"\n  Last week: {activity['commits_week']} commits, {activity['intensity']}, "
+          f"themes {', '.join(activity['themes'])}")
+
+    speedup = raw_ms["p50"] / max(rollup_ms["p50"], 1e-6)
+    icon = "✓" if speedup >= 1 else "⚠"
+    print(f"\n{icon} Rollups read {speedup:.1f}x faster than re-parsing raw session JSON (p50)")
+
+
+if __name__ == '__main__':
+    main()
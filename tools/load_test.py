@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Quote Service Load Test
+
+Drives the local HTTP/JSON service (`stoic-terminal serve`) with concurrent
+keep-alive clients for a fixed duration and reports requests/sec and
+latency percentiles per endpoint.
+
+By default it starts an in-process server on a free port against --db;
+pass --url to test a server that is already running.
+
+Usage:
+    python tools/load_test.py --db /tmp/stoic-terminal-corpora/quotes_10000.db
+    python tools/load_test.py --url http://127.0.0.1:8765 --clients 16 --duration 20
+"""
+
+import argparse
+import http.client
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import quote, urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark import percentile  # noqa: E402
+
+
+SEARCH_TERMS = ["death", "time", "fear", "anger", "nature", "war", "virtue", "mind",
+                "friend", "fortune", "reason", "soul", "enemy", "pleasure", "change"]
+TAGS = ["stoicism", "wisdom", "strategy", "mortality", "time", "virtue", "adversity"]
+
+# Endpoint mix: mostly random quotes (terminal splash), some searches
+MIX = [("random", 0.5), ("search", 0.3), ("tags", 0.2)]
+
+
+def make_path(kind: str, rng: random.Random) -> str:
+    if kind == "random":
+        return "/random"
+    if kind == "search":
+        return f"/search?q={quote(rng.choice(SEARCH_TERMS))}&limit=10"
+    return f"/tags?tags={rng.choice(TAGS)}&limit=10"
+
+
+def client(host: str, port: int, deadline: float, seed: int,
+           latencies: Dict[str, List[float]], errors: List[str], lock: threading.Lock):
+    """One keep-alive client issuing requests back to back until the deadline"""
+    rng = random.Random(seed)
+    kinds, weights = zip(*MIX)
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    local = defaultdict(list)
+    local_errors = []
+
+    while time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        start = time.perf_counter()
+        try:
+            conn.request("GET", make_path(kind, rng))
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                local_errors.append(f"{kind}: HTTP {response.status}")
+        except (OSError, http.client.HTTPException) as e:
+            local_errors.append(f"{kind}: {e}")
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        local[kind].append((time.perf_counter() - start) * 1000)
+
+    conn.close()
+    with lock:
+        for kind, samples in local.items():
+            latencies[kind].extend(samples)
+        errors.extend(local_errors)
+
+
+def main():
+    """Run the load test and print throughput and tail latency"""
+    parser = argparse.ArgumentParser(description="Load-test the local quote service")
+    parser.add_argument("--db", help="Database to serve from an in-process server")
+    parser.add_argument("--url", help="Existing server to test instead")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--pool-size", type=int, default=4, help="In-process server pool size")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="In-process server response cache size (0 disables)")
+    args = parser.parse_args()
+
+    if not args.db and not args.url:
+        parser.error("pass --db or --url")
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        from stoic_terminal.server import make_server
+
+        server = make_server(args.db, port=0, pool_size=args.pool_size,
+                             cache_size=args.cache_size)
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print("=" * 70)
+    print("Quote Service Load Test")
+    print("=" * 70)
+    print(f"  Target:   http://{host}:{port}")
+    print(f"  Clients:  {args.clients} for {args.duration:g}s")
+    print()
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: List[str] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=client, args=(host, port, deadline, i, latencies, errors, lock))
+        for i in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if server:
+        server.shutdown()
+        server.server_close()
+        server.service.close()
+
+    total = sum(len(samples) for samples in latencies.values())
+    print("📊 RESULTS")
+    print("-" * 70)
+    print(f"  {'endpoint':10s} {'requests':>9s} {'req/s':>9s} {'p50':>9s} {'p95':>9s} "
+          f"{'p99':>9s} {'max':>9s}")
+    for kind, samples in sorted(latencies.items()) + [("all", sum(latencies.values(), []))]:
+        if not samples:
+            continue
+        print(f"  {kind:10s} {len(samples):9d} {len(samples) / elapsed:9.0f} "
+              f"{percentile(samples, 50):7.2f}ms {percentile(samples, 95):7.2f}ms "
+              f"{percentile(samples, 99):7.2f}ms {max(samples):7.2f}ms")
+    print()
+    print(f"  Throughput: {total / elapsed:,.0f} requests/sec")
+
+    if errors:
+        print(f"✗ {len(errors)} ERROR(S), e.g. {errors[0]}")
+        sys.exit(1)
+    print("✓ No errors")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Time-to-Prompt Harness
+
+Spawns batches of interactive shells at once, the way a tmux or terminal
+session restore does. For each shell it measures the time until the first
+prompt is printed. Each batch runs with three .bashrc/.zshrc setups:
+
+- none    empty rc file (the shell's own startup cost)
+- sync    `stoic-terminal` run directly from the rc file
+- async   the `stoic-terminal shell-init` hooks (cached frame + background refill)
+
+For the async hooks it then waits for the background refills to finish.
+It reports how many Python refills the batch started; the other shells
+saw the lease and started none. It also reports how many refills rendered
+a quote; the rest found the lock taken or the cache fresh. Refills are
+counted from STOIC_TERMINAL_TRACE records. Everything runs against a
+throwaway state directory, so the real history and prompt cache are left
+alone.
+
+Usage:
+    python tools/prompt_latency.py
+    python tools/prompt_latency.py --db quotes_v1.db --parallel 1 8 32 --shells bash zsh
+"""
+
+import argparse
+import json
+import os
+import select
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark import percentile  # noqa: E402
+from synthetic_corpus import corpus_path  # noqa: E402
+from stoic_terminal.prompt import DUE_FILE  # noqa: E402
+
+
+PROMPT_MARKER = "<<stoic-prompt>>"
+DEFAULT_PARALLEL = [1, 8, 32]
+MODES = ["none", "sync", "async"]
+
+
+def stoic_command() -> List[str]:
+    """How to run the CLI from this checkout (installed script if on PATH)"""
+    installed = shutil.which("stoic-terminal")
+    return [installed] if installed else [sys.executable, "-m", "stoic_terminal.cli"]
+
+
+def write_rc(shell: str, mode: str, db: str, workdir: Path, env: Dict[str, str]) -> Path:
+    """An rc file for one setup; the async hooks are generated once, like a cached init file"""
+    lines = [f"PS1='{PROMPT_MARKER}'"]
+    if shell == "zsh":
+        lines = ["setopt NO_PROMPT_SP", f"PS1='{PROMPT_MARKER}'"]
+    command = stoic_command() + ["--db", db, "--width", "80"]
+    if mode == "sync":
+        lines.append(shlex.join(command))
+    elif mode == "async":
+        init = subprocess.run(stoic_command() + ["--db", db, "shell-init", shell],
+                              env=env, capture_output=True, text=True, check=True).stdout
+        lines.append(init)
+    rc = workdir / f"{shell}_{mode}.rc"
+    rc.write_text("\n".join(lines) + "\n")
+    return rc
+
+
+def spawn(shell: str, rc: Path, env: Dict[str, str]) -> subprocess.Popen:
+    if shell == "zsh":
+        env = dict(env, ZDOTDIR=str(rc.parent / f"zdot_{rc.stem}"))
+        Path(env["ZDOTDIR"]).mkdir(exist_ok=True)
+        shutil.copy(rc, Path(env["ZDOTDIR"]) / ".zshrc")
+        args = ["zsh", "-i"]
+    else:
+        args = ["bash", "--noprofile", "--rcfile", str(rc), "-i"]
+    return subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, env=env)
+
+
+def time_to_prompt(shell: str, rc: Path, count: int, env: Dict[str, str],
+                   timeout: float = 60.0) -> List[float]:
+    """Start `count` shells at once; ms until each one prints its first prompt"""
+    start = time.perf_counter()
+    procs = [spawn(shell, rc, env) for _ in range(count)]
+    pending = {proc.stderr.fileno(): proc for proc in procs}
+    buffers = {fd: b"" for fd in pending}
+    latencies = []
+    while pending and time.perf_counter() - start < timeout:
+        ready, _, _ = select.select(list(pending), [], [], 0.5)
+        for fd in ready:
+            chunk = os.read(fd, 65536)
+            buffers[fd] += chunk
+            if PROMPT_MARKER.encode() in buffers[fd] or not chunk:
+                latencies.append((time.perf_counter() - start) * 1000)
+                proc = pending.pop(fd)
+                proc.stdin.write(b"exit\n")
+                proc.stdin.flush()
+    for proc in procs:
+        try:
+            proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return latencies
+
+
+def refill_counts(trace_path: Path) -> Dict[str, int]:
+    started = rendered = 0
+    if trace_path.exists():
+        for line in trace_path.read_text().splitlines():
+            record = json.loads(line)
+            if "prompt-refill" in record["argv"]:
+                started += 1
+                rendered += any(span["name"] == "prompt.render" for span in record["spans"])
+    return {"started": started, "rendered": rendered}
+
+
+def wait_for_refills(trace_path: Path, quiet: float = 2.0, timeout: float = 120.0) -> Dict:
+    """Wait until background refills stop exiting (no new trace record for `quiet` seconds)"""
+    deadline = time.time() + timeout
+    counts = refill_counts(trace_path)
+    last_change = time.time()
+    while time.time() - last_change < quiet and time.time() < deadline:
+        time.sleep(0.1)
+        latest = refill_counts(trace_path)
+        if latest != counts:
+            counts, last_change = latest, time.time()
+    return counts
+
+
+def wait_until_due(cache_dir: Path):
+    """Sleep until the hooks' lease has expired, so the next batch may start a refill"""
+    try:
+        due = int((cache_dir / DUE_FILE).read_text())
+    except (OSError, ValueError):
+        return
+    time.sleep(max(0.0, due - time.time()) + 0.1)
+
+
+def main():
+    """Measure time-to-prompt for parallel shell spawns"""
+    parser = argparse.ArgumentParser(description="Measure shell time-to-prompt")
+    parser.add_argument("--db", help="Quote database (default: 10k-quote synthetic corpus)")
+    parser.add_argument("--parallel", type=int, nargs="+", default=DEFAULT_PARALLEL,
+                        help="Shells started at once per batch (default: 1 8 32)")
+    parser.add_argument("--shells", nargs="+", default=["bash", "zsh"],
+                        help="Shells to test, if installed (default: bash zsh)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Time-to-Prompt Harness")
+    print("=" * 70)
+
+    db = str(Path(args.db).resolve()) if args.db else str(corpus_path(10_000))
+    print(f"  Database: {db}")
+    print(f"  CPUs:     {os.cpu_count()}")
+
+    slowest = {}
+    for shell in args.shells:
+        if not shutil.which(shell):
+            print(f"\n⚠ {shell} not installed, skipped")
+            continue
+
+        print(f"\n🐚 {shell.upper()}")
+        print("-" * 70)
+        print(f"  {'setup':7s} {'shells':>6s} {'p50':>9s} {'p95':>9s} {'max':>9s}   refills")
+        for count in args.parallel:
+            for mode in MODES:
+                with tempfile.TemporaryDirectory() as workdir:
+                    workdir = Path(workdir)
+                    env = dict(os.environ,
+                               PYTHONPATH=os.pathsep.join(
+                                   [str(REPO_ROOT / "src"), os.environ.get("PYTHONPATH", "")]),
+                               STOIC_TERMINAL_STATE=str(workdir / "state"),
+                               STOIC_TERMINAL_TRACE=str(workdir / "trace.jsonl"))
+                    rc = write_rc(shell, mode, db, workdir, env)
+                    if mode == "async":
+                        # Warm the cache, as every shell after the first one finds it
+                        time_to_prompt(shell, rc, 1, env)
+                        wait_for_refills(workdir / "trace.jsonl")
+                        (workdir / "trace.jsonl").unlink(missing_ok=True)
+                        wait_until_due(workdir / "state" / "prompt")
+
+                    latencies = time_to_prompt(shell, rc, count, env)
+                    refills = ""
+                    if mode == "async":
+                        counts = wait_for_refills(workdir / "trace.jsonl")
+                        frame = workdir / "state" / "prompt" / "next.txt"
+                        refills = (f"{counts['rendered']} rendered / {counts['started']} started"
+                                   + ("" if frame.exists() else "  ✗ no cached frame"))
+                print(f"  {mode:7s} {count:6d} {percentile(latencies, 50):7.1f}ms "
+                      f"{percentile(latencies, 95):7.1f}ms {max(latencies):7.1f}ms   {refills}")
+                slowest[(shell, mode, count)] = max(latencies)
+
+    if not slowest:
+        print("\n✗ No shells to test")
+        sys.exit(1)
+
+    print()
+    for shell in args.shells:
+        for count in args.parallel:
+            if (shell, "async", count) in slowest:
+                base = slowest[(shell, "none", count)]
+                sync = slowest[(shell, "sync", count)]
+                hooked = slowest[(shell, "async", count)]
+                print(f"✓ {shell} x{count}: hooks add {hooked - base:+.0f}ms to the slowest "
+                      f"prompt (synchronous launch adds {sync - base:+.0f}ms)")
+
+
+if __name__ == '__main__':
+    main()
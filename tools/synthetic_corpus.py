@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Synthetic Quote Corpus Builder
+
+Builds quote databases of arbitrary size (250 → 1M+ quotes) for benchmarks
+and scale tests. Quote text is sampled from the word distribution of the
+bundled Meditations text so FTS, compression and wrapping behave like the
+real corpus. Corpora are cached by size and reused across runs.
+
+Usage:
+    python tools/synthetic_corpus.py 10000 /tmp/quotes_10k.db
+"""
+
+import json
+import random
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from stoic_terminal.database import QuoteDatabase  # noqa: E402
+
+
+SOURCE_TEXT = REPO_ROOT / "data" / "gutenberg_sources" / "meditations.txt"
+DEFAULT_CORPUS_DIR = Path(tempfile.gettempdir()) / "stoic-terminal-corpora"
+
+TAGS = [
+    "stoicism", "wisdom", "mortality", "time", "virtue", "adversity", "perseverance",
+    "strategy", "discipline", "courage", "patience", "learning", "nature", "change",
+    "impermanence", "duty", "happiness", "gratitude", "leadership", "mindfulness",
+    "friendship", "justice", "anger", "fear", "focus", "action", "perspective",
+]
+TRADITIONS = ["stoic", "military_strategy", "wisdom", "philosophy", "inspirational", "general"]
+REAL_AUTHORS = ["Marcus Aurelius", "Seneca", "Sun Tzu", "Epictetus", "Confucius", "Lao Tzu"]
+BATCH_SIZE = 10_000
+
+
+def load_vocabulary() -> List[str]:
+    """Words of the bundled Meditations text, with their natural frequencies"""
+    words = re.findall(r"[a-z']+", SOURCE_TEXT.read_text(encoding="utf-8").lower())
+    return [word for word in words if len(word) > 1 or word in ("a", "i")]
+
+
+def generate_rows(count: int, seed: int = 42, embedding_dim: int = 0) -> Iterator[Dict]:
+    """Yield raw quote rows (tags JSON-encoded) ready for insert_quote_rows"""
+    rng = random.Random(seed)
+    vocabulary = load_vocabulary()
+    authors = REAL_AUTHORS + [f"Philosopher {i}" for i in range(200)]
+
+    if embedding_dim:
+        import numpy as np
+        np_rng = np.random.default_rng(seed)
+
+    for _ in range(count):
+        words = rng.choices(vocabulary, k=rng.choice((8, 12, 18, 25, 40, 70)))
+        text = " ".join(words).capitalize() + "."
+        length = len(text)
+        if length <= 150:
+            length_category = "bite-sized"
+        elif length <= 400:
+            length_category = "medium"
+        else:
+            length_category = "extended"
+
+        row = {
+            "text": text,
+            "author": rng.choice(authors),
+            "source": f"Book of {rng.choice(vocabulary).capitalize()}",
+            "source_context": f"Book {rng.randint(1, 12)}, Section {rng.randint(1, 60)}",
+            "source_year": rng.randint(-500, 200),
+            "length_category": length_category,
+            "tradition": rng.choice(TRADITIONS),
+            "tags": json.dumps(rng.sample(TAGS, rng.randint(3, 5))),
+            "copyright_status": "public_domain",
+        }
+        if embedding_dim:
+            vector = np_rng.standard_normal(embedding_dim).astype(np.float32)
+            row["embedding"] = (vector / np.linalg.norm(vector)).tobytes()
+        yield row
+
+
+def build_corpus(count: int, path: Path, seed: int = 42, embedding_dim: int = 0) -> Path:
+    """Create a synthetic quote database with `count` quotes at `path`"""
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+
+    db = QuoteDatabase(str(path))
+    # Bulk load: durability doesn't matter for a throwaway corpus
+    db.conn.execute("PRAGMA synchronous = OFF")
+    db.conn.execute("PRAGMA journal_mode = MEMORY")
+
+    batch = []
+    for row in generate_rows(count, seed, embedding_dim):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.insert_quote_rows(batch)
+            batch = []
+    db.insert_quote_rows(batch)
+
+    db.conn.execute("PRAGMA optimize")
+    db.close()
+    return path
+
+
+def corpus_path(count: int,
+                corpus_dir: Path = DEFAULT_CORPUS_DIR,
+                embedding_dim: int = 0) -> Path:
+    """Return a cached synthetic corpus of `count` quotes, building it on first use"""
+    corpus_dir = Path(corpus_dir)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    suffix = f"_e{embedding_dim}" if embedding_dim else ""
+    path = corpus_dir / f"quotes_{count}{suffix}.db"
+
+    if not path.exists():
+        print(f"Building synthetic corpus of {count:,} quotes → {path}", file=sys.stderr)
+        build_corpus(count, path.with_suffix(".tmp"), embedding_dim=embedding_dim)
+        path.with_suffix(".tmp").rename(path)
+    else:
+        # Cached under an older schema: read-write opening upgrades it (read-only refuses)
+        QuoteDatabase(str(path)).close()
+    return path
+
+
+def main():
+    """Build a single corpus from the command line"""
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+
+    path = build_corpus(int(sys.argv[1]), Path(sys.argv[2]))
+    print(f"✓ Wrote {sys.argv[1]} synthetic quotes to {path}")
+
+
+if __name__ == '__main__':
+    main()
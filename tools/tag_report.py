@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Automatic Tagger Report
+
+Runs the vectorized tag classifier over the hand-tagged quotes and compares
+its tags with the curated ones:
+
+- throughput (quotes encoded and classified per minute)
+- micro precision / recall / F1 over a threshold sweep
+- hit rate of the top predicted tag
+- per-tag precision / recall for the common tags
+
+Only tags in the classifier's vocabulary can be predicted, so hand tags
+outside it are reported as coverage rather than counted as misses.
+
+Usage:
+    python tools/tag_report.py --db quotes_v1.db
+    python tools/tag_report.py --db quotes_v1.db --reencode   # ignore stored embeddings
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Set
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from stoic_terminal.database import QuoteDatabase  # noqa: E402
+from stoic_terminal.tagging import DEFAULT_MAX_TAGS, TagClassifier  # noqa: E402
+
+
+THRESHOLDS = [0.2, 0.25, 0.3, 0.35, 0.4, 0.45]
+
+
+def score(predicted: List[List[str]], expected: List[Set[str]]) -> Dict[str, float]:
+    """Micro-averaged precision, recall and F1"""
+    hits = sum(len(set(p) & e) for p, e in zip(predicted, expected))
+    n_predicted = sum(len(p) for p in predicted)
+    n_expected = sum(len(e) for e in expected)
+    precision = hits / n_predicted if n_predicted else 0.0
+    recall = hits / n_expected if n_expected else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1, "tags": n_predicted}
+
+
+def main():
+    """Compare automatic tags against the hand-tagged quotes"""
+    parser = argparse.ArgumentParser(description="Evaluate the automatic tagger")
+    parser.add_argument("--db", default="quotes_v1.db", help="Hand-tagged quote database")
+    parser.add_argument("--max-tags", type=int, default=DEFAULT_MAX_TAGS)
+    parser.add_argument("--reencode", action="store_true",
+                        help="Encode every quote instead of using stored embeddings")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Automatic Tagger Report")
+    print("=" * 70)
+
+    # One streamed pass; an IN (...) with a parameter per quote overflows SQLite's limit
+    db = QuoteDatabase(args.db, read_only=True)
+    rows, hand_tags = [], []
+    for quotes in db.iter_quotes():
+        for quote in quotes:
+            if quote['tags']:
+                rows.append((quote['id'], quote['text'], quote['embedding']))
+                hand_tags.append(set(quote['tags']))
+    db.close()
+
+    if not rows:
+        print("✗ ERROR: no hand-tagged quotes in", args.db)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    classifier = TagClassifier(max_tags=args.max_tags)
+    setup_s = time.perf_counter() - start
+
+    vocabulary = set(classifier.tags)
+    expected = [tags & vocabulary for tags in hand_tags]
+    all_hand_tags = Counter(tag for tags in hand_tags for tag in tags)
+    covered = sum(count for tag, count in all_hand_tags.items() if tag in vocabulary)
+
+    start = time.perf_counter()
+    blobs = [None] * len(rows) if args.reencode else [row[2] for row in rows]
+    vectors = classifier.embed([row[1] for row in rows], blobs)
+    scores = classifier.scores(vectors)
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("⚡ THROUGHPUT")
+    print("-" * 70)
+    print(f"  Quotes:              {len(rows):,} ({sum(b is None for b in blobs):,} encoded)")
+    print(f"  Tag setup:           {setup_s * 1000:.0f} ms (model load + {len(vocabulary)} tags)")
+    print(f"  Embed + score:       {elapsed * 1000:.0f} ms "
+          f"({len(rows) / max(elapsed, 1e-9) * 60:,.0f} quotes/min)")
+
+    print()
+    print("🏷  COVERAGE")
+    print("-" * 70)
+    print(f"  Hand tags in vocabulary: {covered}/{sum(all_hand_tags.values())} "
+          f"({covered / sum(all_hand_tags.values()):.0%})")
+
+    print()
+    print("📊 THRESHOLD SWEEP (micro-averaged, vocabulary tags only)")
+    print("-" * 70)
+    print(f"  {'threshold':>9s} {'precision':>10s} {'recall':>8s} {'F1':>6s} {'tags/quote':>11s}")
+    best = None
+    for threshold in THRESHOLDS:
+        classifier.threshold = threshold
+        result = score(classifier.assign(vectors), expected)
+        print(f"  {threshold:9.2f} {result['precision']:10.2f} {result['recall']:8.2f} "
+              f"{result['f1']:6.2f} {result['tags'] / len(rows):11.2f}")
+        if best is None or result["f1"] > best[1]["f1"]:
+            best = (threshold, result)
+
+    top1 = np.argmax(scores, axis=1)
+    top1_hits = sum(classifier.tags[j] in e for j, e in zip(top1, expected) if e)
+    print()
+    print(f"  Top tag is a hand tag: {top1_hits}/{sum(1 for e in expected if e)}")
+    print(f"  Best threshold:        {best[0]:.2f} (F1 {best[1]['f1']:.2f})")
+
+    classifier.threshold = best[0]
+    predicted = classifier.assign(vectors)
+    print()
+    print(f"📋 PER TAG @ {best[0]:.2f} (tags with 3+ hand-tagged quotes)")
+    print("-" * 70)
+    print(f"  {'tag':16s} {'support':>8s} {'predicted':>10s} {'precision':>10s} {'recall':>8s}")
+    for tag, support in all_hand_tags.most_common():
+        if tag not in vocabulary or support < 3:
+            continue
+        predicted_count = sum(tag in p for p in predicted)
+        hits = sum(tag in p and tag in e for p, e in zip(predicted, expected))
+        precision = hits / predicted_count if predicted_count else 0.0
+        print(f"  {tag:16s} {support:8d} {predicted_count:10d} {precision:10.2f} "
+              f"{hits / support:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
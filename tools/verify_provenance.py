@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Gutenberg Provenance Verifier
+
+Checks that every hand-entered quote in add_gutenberg_quotes.py really
+appears in the bundled Project Gutenberg text it is attributed to. When a
+quote claims a `line_range`, it is checked against those lines. A quote
+that isn't there, or that has no range, is searched for across the whole
+book. Source texts and their line-offset indexes are memory-mapped (see
+stoic_terminal.provenance), and the indexes persist between runs as
+`<file>.lineidx`.
+
+The quotes are read from the script's source with `ast`, so nothing is
+imported and no database is needed. With --db the stored quotes for
+these sources are verified as well. They take their line ranges from the
+script entry with the same text, since the database doesn't store ranges.
+
+Statuses:
+- verified   in the claimed lines (± a few lines of slack)
+- moved      verbatim in the book, but not where the range points
+- unclaimed  verbatim in the book, no range given
+- fuzzy      only a close match (edited or paraphrased wording)
+- missing    not found in the book
+
+Usage:
+    python tools/verify_provenance.py
+    python tools/verify_provenance.py --db quotes_v1.db --verbose
+"""
+
+import argparse
+import ast
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from stoic_terminal.provenance import (  # noqa: E402
+    SOURCE_FILES, SourceText, normalize_words, open_sources,
+)
+
+
+SCRIPT = REPO_ROOT / "add_gutenberg_quotes.py"
+STATUS_ORDER = ["verified", "moved", "unclaimed", "fuzzy", "missing"]
+STATUS_ICONS = {"verified": "✓", "moved": "↪", "unclaimed": "·", "fuzzy": "≈", "missing": "✗"}
+
+
+def _literal(node: ast.AST):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return None
+
+
+def script_claims(path: Path = SCRIPT) -> List[Dict]:
+    """
+    {"text", "source", "line_range", "context"} for every quote dict in the
+    script. The source comes from the `source=` keyword of the add_quote
+    call in the same function.
+    """
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    claims = []
+    for function in tree.body:
+        if not isinstance(function, ast.FunctionDef):
+            continue
+        source = None
+        quotes = []
+        for node in ast.walk(function):
+            if isinstance(node, ast.Call) and getattr(node.func, "attr", None) == "add_quote":
+                for keyword in node.keywords:
+                    if keyword.arg == "source":
+                        source = _literal(keyword.value)
+            elif isinstance(node, ast.Dict):
+                keys = [_literal(key) if key is not None else None for key in node.keys]
+                if "text" in keys:
+                    quote = {key: _literal(value) for key, value in zip(keys, node.values)}
+                    quotes.append(quote)
+        for quote in quotes:
+            claims.append({"text": quote["text"], "source": source,
+                           "line_range": quote.get("line_range"),
+                           "context": quote.get("context")})
+    return claims
+
+
+def database_quotes(db_path: str, claims: List[Dict]) -> List[Dict]:
+    """Stored quotes from the bundled sources, with line ranges matched from the script"""
+    from stoic_terminal.database import QuoteDatabase
+
+    ranges = {(claim["source"], " ".join(normalize_words(claim["text"]))): claim["line_range"]
+              for claim in claims}
+    quotes = []
+    with QuoteDatabase(db_path, read_only=True) as db:
+        for batch in db.iter_quotes():
+            for quote in batch:
+                if quote['source'] not in SOURCE_FILES:
+                    continue
+                key = (quote['source'], " ".join(normalize_words(quote['text'])))
+                quotes.append({"id": quote['id'], "text": quote['text'],
+                               "source": quote['source'], "line_range": ranges.get(key),
+                               "context": quote['source_context']})
+    return quotes
+
+
+def verify_all(quotes: List[Dict], texts: Dict[str, SourceText]) -> List[Dict]:
+    results = []
+    for quote in quotes:
+        text = texts.get(quote["source"])
+        if text is None:
+            result = {"status": "missing", "claimed": None, "found": None, "score": 0.0,
+                      "note": "no source text"}
+        else:
+            result = text.verify(quote["text"], quote["line_range"])
+        results.append({**quote, **result})
+    return results
+
+
+def _lines(span: Optional[tuple]) -> str:
+    if not span:
+        return "-"
+    return str(span[0]) if span[0] == span[1] else f"{span[0]}-{span[1]}"
+
+
+def print_results(title: str, results: List[Dict], verbose: bool) -> bool:
+    """Summary per source plus details for every problem; False if any quote is unsound"""
+    print(f"\n📚 {title}")
+    print("-" * 70)
+    sources = sorted({result["source"] for result in results}, key=str)
+    for source in sources:
+        rows = [result for result in results if result["source"] == source]
+        counts = {status: sum(1 for r in rows if r["status"] == status) for status in STATUS_ORDER}
+        summary = "  ".join(f"{STATUS_ICONS[s]} {counts[s]} {s}" for s in STATUS_ORDER if counts[s])
+        print(f"  {str(source):16s} {len(rows):3d} quotes   {summary}")
+
+    shown = [r for r in results if verbose or r["status"] in ("moved", "fuzzy", "missing")]
+    for result in shown:
+        where = f"claimed {_lines(result['claimed'])}, found {_lines(result['found'])}"
+        if result["status"] == "fuzzy":
+            where += f" ({result['score']:.0%} of shingles)"
+        label = f"#{result['id']} " if "id" in result else ""
+        print(f"    {STATUS_ICONS[result['status']]} {label}{result['status']:9s} {where}")
+        print(f"      \"{result['text'][:60]}...\"" if len(result['text']) > 60
+              else f"      \"{result['text']}\"")
+    return not any(result["status"] == "missing" for result in results)
+
+
+def main():
+    """Verify quote provenance against the bundled Gutenberg texts"""
+    parser = argparse.ArgumentParser(description="Verify Gutenberg quote provenance")
+    parser.add_argument("--script", type=Path, default=SCRIPT,
+                        help="Script holding the hand-entered quotes")
+    parser.add_argument("--db", help="Also verify the stored quotes in this database")
+    parser.add_argument("--verbose", "-v", action="store_true",
+                        help="List every quote, not only the problems")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Gutenberg Provenance Verifier")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    texts = open_sources()
+    open_ms = (time.perf_counter() - start) * 1000
+    for name in SOURCE_FILES:
+        if name in texts:
+            print(f"  {name:16s} {texts[name].line_count:6,d} lines  {texts[name].path.name}")
+        else:
+            print(f"  ⚠ {name}: source text not found at {SOURCE_FILES[name]}")
+
+    start = time.perf_counter()
+    claims = script_claims(args.script)
+    ok = print_results(f"{args.script.name} ({len(claims)} quotes)",
+                       verify_all(claims, texts), args.verbose)
+    if args.db:
+        stored = database_quotes(args.db, claims)
+        ok &= print_results(f"{args.db} ({len(stored)} stored quotes)",
+                            verify_all(stored, texts), args.verbose)
+    verify_ms = (time.perf_counter() - start) * 1000
+
+    for text in texts.values():
+        text.close()
+
+    print(f"\n⏱  Opened sources in {open_ms:.1f}ms, verified in {verify_ms:.1f}ms")
+    print()
+    if not ok:
+        print("✗ Some quotes were not found in their source text")
+        sys.exit(1)
+    print("✓ Every quote was found in its source text")
+
+
+if __name__ == '__main__':
+    main()
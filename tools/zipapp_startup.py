@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Zipapp Startup Comparison
+
+Times the display path (`stoic-terminal --width 80`) launched two ways:
+
+- source   the package from a directory, as a uv tool or editable install
+           runs it: modules are found through sys.path and compiled into
+           __pycache__ on first run
+- zipapp   the single-file bundle (stoic_terminal.bundle), with -OO bytecode
+           and its data embedded
+
+Each way is timed cold and warm:
+
+- cold   first launch on a fresh machine or container. Source runs get a
+         fresh copy of the package with no __pycache__. Zipapp runs get an
+         empty cache, so the bundled data is copied out first.
+- warm   every later launch, with those caches filled
+
+Both use the same database copy and a catalog compiled for it, in a
+throwaway directory, so the repo's data/ is left alone. The OS page cache
+is warm for both; dropping it needs root and is not attempted.
+
+Usage:
+    python tools/zipapp_startup.py
+    python tools/zipapp_startup.py --db quotes_v1.db --cold-runs 10 --warm-runs 30
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from benchmark import percentile  # noqa: E402
+from synthetic_corpus import corpus_path  # noqa: E402
+
+
+PACKAGE_DIR = REPO_ROOT / "src" / "stoic_terminal"
+DISPLAY_ARGS = ["--width", "80", "--no-history"]
+
+
+def prepare(db_path: str, workdir: Path) -> Dict[str, Path]:
+    """Database copy, catalog and bundle for both setups"""
+    from stoic_terminal.bundle import build_bundle
+    from stoic_terminal.catalog import compile_catalog
+    from stoic_terminal.database import QuoteDatabase
+
+    data = workdir / "data"
+    data.mkdir()
+    db_copy = data / "quotes.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("VACUUM INTO ?", (str(db_copy),))
+    conn.close()
+    with QuoteDatabase(str(db_copy), read_only=True) as db:
+        compile_catalog(db, output=data / "art_catalog.json", matches_output=None)
+
+    bundle = workdir / "stoic-terminal.pyz"
+    result = build_bundle(bundle, str(db_copy), {"art_catalog.json": data / "art_catalog.json"})
+    print(f"  Bundle:   {result['size'] / 1024 / 1024:.1f} MiB ({result['modules']} modules, "
+          f"{result['code_bytes'] / 1024:.0f} KiB bytecode, "
+          f"{result['data_bytes'] / 1024 / 1024:.1f} MiB data)")
+    return {"data": data, "db": db_copy, "bundle": bundle}
+
+
+def timed(command: List[str], env: Dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def source_run(paths: Dict[str, Path], workdir: Path) -> Callable[[bool], float]:
+    """One launch from a package directory; cold gets a copy without __pycache__"""
+    base_env = {key: value for key, value in os.environ.items()
+                if not key.startswith(("STOIC_TERMINAL", "PYTHON"))}
+    base_env.update(STOIC_TERMINAL_DATA=str(paths["data"]), STOIC_TERMINAL_DB=str(paths["db"]),
+                    STOIC_TERMINAL_STATE=str(workdir / "state"))
+    warm_root = workdir / "warm_source"
+    shutil.copytree(PACKAGE_DIR, warm_root / "stoic_terminal",
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    command = [sys.executable, "-m", "stoic_terminal.cli"] + DISPLAY_ARGS
+
+    def run(cold: bool) -> float:
+        root = warm_root
+        if cold:
+            root = Path(tempfile.mkdtemp(dir=workdir))
+            shutil.copytree(PACKAGE_DIR, root / "stoic_terminal",
+                            ignore=shutil.ignore_patterns("__pycache__"))
+        return timed(command, dict(base_env, PYTHONPATH=str(root)))
+
+    return run
+
+
+def zipapp_run(paths: Dict[str, Path], workdir: Path) -> Callable[[bool], float]:
+    """One launch of the bundle; cold gets an empty cache, so the data is copied out first"""
+    base_env = {key: value for key, value in os.environ.items()
+                if not key.startswith(("STOIC_TERMINAL", "PYTHON"))}
+    base_env.update(STOIC_TERMINAL_STATE=str(workdir / "state"))
+    warm_cache = workdir / "warm_cache"
+    command = [sys.executable, str(paths["bundle"])] + DISPLAY_ARGS
+
+    def run(cold: bool) -> float:
+        cache = Path(tempfile.mkdtemp(dir=workdir)) if cold else warm_cache
+        return timed(command, dict(base_env, XDG_CACHE_HOME=str(cache)))
+
+    return run
+
+
+def main():
+    """Compare cold and warm startup of the source install and the zipapp"""
+    parser = argparse.ArgumentParser(description="Compare source and zipapp startup")
+    parser.add_argument("--db", help="Quote database (default: 10k-quote synthetic corpus)")
+    parser.add_argument("--cold-runs", type=int, default=10, help="Cold launches per setup")
+    parser.add_argument("--warm-runs", type=int, default=20, help="Warm launches per setup")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Zipapp Startup Comparison")
+    print("=" * 70)
+
+    db_path = str(Path(args.db).resolve()) if args.db else str(corpus_path(10_000))
+    print(f"  Database: {db_path}")
+    print(f"  Python:   {sys.version.split()[0]}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        paths = prepare(db_path, workdir)
+        for name, make in (("source", source_run), ("zipapp", zipapp_run)):
+            run = make(paths, workdir)
+            cold = [run(True) for _ in range(args.cold_runs)]
+            run(False)  # Fill the warm caches
+            warm = [run(False) for _ in range(args.warm_runs)]
+            results[name] = {"cold": cold, "warm": warm}
+
+    print()
+    print(f"🚀 DISPLAY PATH ({args.cold_runs} cold, {args.warm_runs} warm launches)")
+    print("-" * 70)
+    print(f"  {'setup':8s} {'cold p50':>10s} {'cold p95':>10s} {'warm p50':>10s} {'warm p95':>10s}")
+    for name, samples in results.items():
+        print(f"  {name:8s} {percentile(samples['cold'], 50):8.1f}ms "
+              f"{percentile(samples['cold'], 95):8.1f}ms "
+              f"{percentile(samples['warm'], 50):8.1f}ms {percentile(samples['warm'], 95):8.1f}ms")
+
+    print()
+    for phase in ("cold", "warm"):
+        source = percentile(results["source"][phase], 50)
+        bundled = percentile(results["zipapp"][phase], 50)
+        icon = "✓" if bundled <= source else "⚠"
+        print(f"{icon} {phase}: zipapp {bundled:.1f}ms vs source {source:.1f}ms "
+              f"({bundled - source:+.1f}ms, p50)")
+
+
+if __name__ == '__main__':
+    main()